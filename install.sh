@@ -34,6 +34,18 @@ else
     INSTALL_DIR="$HOME/LaunchLab"
 fi
 
+# Offline image bundle shipped alongside the installer. Resolved now, as
+# later steps run inside $INSTALL_DIR: the current directory first, then
+# the directory install.sh is in.
+IMAGE_BUNDLE="${LAUNCHLAB_IMAGE_BUNDLE:-launchlab-images.tar.gz}"
+if [[ "$IMAGE_BUNDLE" != /* ]]; then
+    if [ ! -f "$IMAGE_BUNDLE" ] && [ -f "${BASH_SOURCE[0]}" ]; then
+        IMAGE_BUNDLE="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)/$IMAGE_BUNDLE"
+    else
+        IMAGE_BUNDLE="$(pwd)/$IMAGE_BUNDLE"
+    fi
+fi
+
 # Banner
 clear
 echo -e "${CYAN}"
@@ -498,6 +510,18 @@ if [[ $START_SERVICES =~ ^[Nn]$ ]]; then
     log_warning "Services not started"
     log_info "Start manually with: cd $INSTALL_DIR && docker compose -f docker-compose.yml -f docker-compose.init.yml up -d"
 else
+    # Load offline image bundle if one was shipped alongside the installer
+    if [ -f "$IMAGE_BUNDLE" ] && command -v python3 &> /dev/null; then
+        log_info "Loading offline image bundle: $IMAGE_BUNDLE"
+        python3 scripts/images.py import "$IMAGE_BUNDLE" || log_warning "Bundle incomplete, missing images will be pulled"
+    fi
+
+    # Pre-pull all images in parallel instead of one by one during 'up'
+    if command -v python3 &> /dev/null; then
+        log_info "Pre-pulling container images in parallel..."
+        python3 scripts/images.py pull || log_warning "Some images failed to pre-pull, 'docker compose up' will retry"
+    fi
+
     log_info "Starting services with automatic initialization (this may take 2-3 minutes)..."
     docker compose -f docker-compose.yml -f docker-compose.init.yml up -d
 
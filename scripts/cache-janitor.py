@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Cache Janitor
+Keeps regenerable cache directories under a size budget with LRU eviction
+
+Managed directories (same ones backup.sh skips as regenerable):
+- Jellyfin cache (transcodes, resized images)
+- Immich thumbnails
+- Immich encoded (transcoded) videos
+
+Each pass:
+1. Refreshes an in-memory index of every managed file. Only directories
+   whose mtime changed since the last pass are re-listed; in the others
+   only recently written files are re-stat'ed, so files still growing
+   (transcode segments, model downloads) are counted at their current size.
+2. If a directory is over budget, evicts least recently used files
+   (by atime, falling back to mtime) down to LOW_WATERMARK of the budget.
+3. Never deletes files written/used within MIN_AGE or currently open by
+   any process (needs pid: host to see other containers' processes).
+4. Writes stats (size, reclaimed bytes, eviction rate) to STATS_FILE.
+"""
+
+import heapq
+import json
+import os
+import signal
+import sys
+import tempfile
+import time
+from collections import deque
+
+# Configuration from environment
+# Comma-separated "path=budget" pairs; budget 0 disables eviction for that path
+JANITOR_BUDGETS = os.environ.get('JANITOR_BUDGETS', '/data/jellyfin/cache=20G')
+INTERVAL = int(os.environ.get('JANITOR_INTERVAL', '300'))  # seconds between passes
+MIN_AGE = int(os.environ.get('JANITOR_MIN_AGE', '600'))  # never evict files used more recently
+LOW_WATERMARK = float(os.environ.get('JANITOR_LOW_WATERMARK', '0.9'))  # evict down to this fraction
+CHECK_OPEN_FILES = os.environ.get('JANITOR_CHECK_OPEN_FILES', 'true').lower() == 'true'
+DRY_RUN = os.environ.get('JANITOR_DRY_RUN', 'false').lower() == 'true'
+STATS_FILE = os.environ.get('STATS_FILE', '/state/stats.json')
+PROC_DIR = os.environ.get('PROC_DIR', '/proc')
+
+# Eviction rate window
+RATE_WINDOW = 3600  # seconds
+
+# Files written within this long are re-stat'ed each pass; older ones are
+# finished cache entries and keep their indexed size
+GROWING_WINDOW = max(MIN_AGE, 3 * INTERVAL)
+
+RUNNING = True
+
+def log(msg):
+    print(f"[Cache Janitor] {msg}", flush=True)
+
+def parse_size(value):
+    """Parse '20G', '500M', '1024' into bytes"""
+    value = value.strip().upper().rstrip('B')
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value or 0)
+
+def format_size(num_bytes):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f}TB"
+
+def parse_budgets(spec):
+    """Parse 'path=budget,...' into an ordered dict of path -> bytes"""
+    budgets = {}
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        path, _, budget = item.partition('=')
+        budgets[path.strip().rstrip('/')] = parse_size(budget)
+    return budgets
+
+# ==============================================
+# Incremental index
+# ==============================================
+
+def file_entry(st):
+    """(disk bytes, last used, dev, ino, mtime) for a stat result"""
+    disk_bytes = st.st_blocks * 512 if hasattr(st, 'st_blocks') else st.st_size
+    return (disk_bytes, max(st.st_atime, st.st_mtime), st.st_dev, st.st_ino, st.st_mtime)
+
+class CacheIndex:
+    """
+    Per-root file index refreshed from directory mtimes
+
+    Adding or removing a file updates its parent directory's mtime, so
+    unchanged directories keep their cached listing and only need a stat
+    for files written within GROWING_WINDOW. Access times are re-checked
+    at eviction time, right before each candidate is deleted.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.dirs = {}  # path -> {'mtime': ns, 'files': {name: entry}, 'subdirs': [paths]}
+        self.listed = 0
+
+    def refresh(self):
+        """Bring the index up to date, returns number of directories re-listed"""
+        self.listed = 0
+        seen = set()
+        stack = [self.root]
+        while stack:
+            path = stack.pop()
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            seen.add(path)
+
+            cached = self.dirs.get(path)
+            if cached is None or cached['mtime'] != mtime:
+                cached = self._list(path, mtime)
+                self.dirs[path] = cached
+                self.listed += 1
+            else:
+                self._restat(path, cached, time.time() - GROWING_WINDOW)
+            stack.extend(cached['subdirs'])
+
+        for path in [p for p in self.dirs if p not in seen]:
+            del self.dirs[path]
+        return self.listed
+
+    def _list(self, path, mtime):
+        files, subdirs = {}, []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            files[entry.name] = file_entry(entry.stat(follow_symlinks=False))
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return {'mtime': mtime, 'files': files, 'subdirs': subdirs}
+
+    def _restat(self, path, cached, since):
+        """Update sizes of files written after since - writing to a file doesn't touch its directory"""
+        files = cached['files']
+        for name in [n for n, entry in files.items() if entry[4] >= since]:
+            try:
+                files[name] = file_entry(os.stat(os.path.join(path, name), follow_symlinks=False))
+            except OSError:
+                del files[name]
+
+    def total_bytes(self):
+        return sum(entry[0] for d in self.dirs.values() for entry in d['files'].values())
+
+    def file_count(self):
+        return sum(len(d['files']) for d in self.dirs.values())
+
+    def iter_files(self):
+        for dir_path, d in self.dirs.items():
+            for name, entry in d['files'].items():
+                yield os.path.join(dir_path, name), entry
+
+    def forget(self, path):
+        d = self.dirs.get(os.path.dirname(path))
+        if d:
+            d['files'].pop(os.path.basename(path), None)
+
+# ==============================================
+# Open file detection
+# ==============================================
+
+def open_file_ids():
+    """
+    Return {(dev, ino)} of every regular file open by any visible process
+
+    Matching on device/inode works across containers, where the same file
+    has a different path in each mount namespace. Returns None when /proc
+    can't be read, in which case only MIN_AGE protects recent files.
+    """
+    ids = set()
+    readable = 0
+    try:
+        pids = [p for p in os.listdir(PROC_DIR) if p.isdigit()]
+    except OSError:
+        return None
+
+    for pid in pids:
+        fd_dir = os.path.join(PROC_DIR, pid, 'fd')
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        readable += 1
+        for fd in fds:
+            try:
+                st = os.stat(os.path.join(fd_dir, fd))
+            except OSError:
+                continue
+            ids.add((st.st_dev, st.st_ino))
+
+    return ids if readable > 1 else None
+
+# ==============================================
+# Eviction
+# ==============================================
+
+def evict(index, budget, open_ids, now):
+    """
+    Evict least recently used files until under LOW_WATERMARK * budget
+
+    In dry-run mode nothing is deleted and the index is left alone, so the
+    next pass still sees the real usage; the counts are what would go.
+
+    Returns:
+        (files evicted, bytes reclaimed, files skipped as busy)
+    """
+    total = index.total_bytes()
+    target = int(budget * LOW_WATERMARK)
+    heap = [(entry[1], path, entry) for path, entry in index.iter_files()]
+    heapq.heapify(heap)
+
+    evicted = reclaimed = busy = 0
+    while heap and total > target:
+        last_used, path, entry = heapq.heappop(heap)
+        if now - last_used < MIN_AGE:
+            break  # Everything left is newer
+
+        # Re-check: atime may have moved since the directory was indexed
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except FileNotFoundError:
+            index.forget(path)
+            total -= entry[0]
+            continue
+        except OSError:
+            continue
+        current = file_entry(st)
+        if current[1] > last_used:
+            heapq.heappush(heap, (current[1], path, current))
+            continue
+
+        if open_ids is not None and (current[2], current[3]) in open_ids:
+            busy += 1
+            continue
+
+        if not DRY_RUN:
+            try:
+                os.unlink(path)
+            except OSError as e:
+                log(f"⚠ Could not delete {path}: {e}")
+                continue
+            index.forget(path)
+        total -= current[0]  # projected in dry-run mode, index untouched
+        evicted += 1
+        reclaimed += current[0]
+
+    return evicted, reclaimed, busy
+
+# ==============================================
+# Stats
+# ==============================================
+
+def write_stats(stats):
+    """Atomically write stats JSON"""
+    directory = os.path.dirname(STATS_FILE)
+    if not directory or not os.path.isdir(directory):
+        return
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.stats-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(stats, f, indent=2)
+    os.replace(tmp_path, STATS_FILE)
+
+def run_pass(indexes, budgets, totals, history):
+    """Refresh all indexes, evict where over budget, return stats dict"""
+    started = time.time()
+    for index in indexes.values():
+        index.refresh()
+
+    over_budget = any(budgets[root] and indexes[root].total_bytes() > budgets[root] for root in indexes)
+    open_ids = open_file_ids() if (CHECK_OPEN_FILES and over_budget) else None
+    if CHECK_OPEN_FILES and over_budget and open_ids is None:
+        log("⚠ Cannot read open files from /proc, relying on JANITOR_MIN_AGE only")
+
+    directories = {}
+    for root, index in indexes.items():
+        budget = budgets[root]
+        evicted = reclaimed = busy = 0
+        if budget and index.total_bytes() > budget:
+            evicted, reclaimed, busy = evict(index, budget, open_ids, time.time())
+            action = 'would evict' if DRY_RUN else 'evicted'
+            log(f"{root}: {action} {evicted} files, {format_size(reclaimed)} "
+                f"(skipped {busy} open)")
+
+        if DRY_RUN:
+            totals[root]['would_reclaim_bytes'] = reclaimed
+            evicted = reclaimed = 0
+        totals[root]['evicted_files'] += evicted
+        totals[root]['reclaimed_bytes'] += reclaimed
+        history.append((time.time(), root, evicted, reclaimed))
+
+        directories[root] = {
+            'size_bytes': index.total_bytes(),
+            'budget_bytes': budget,
+            'files': index.file_count(),
+            'dirs_relisted': index.listed,
+            'evicted_files_total': totals[root]['evicted_files'],
+            'reclaimed_bytes_total': totals[root]['reclaimed_bytes'],
+            'would_reclaim_bytes_last_pass': totals[root]['would_reclaim_bytes'],
+            'busy_skipped_last_pass': busy,
+        }
+
+    # Eviction rate over the last hour
+    while history and history[0][0] < time.time() - RATE_WINDOW:
+        history.popleft()
+    for root in directories:
+        window = [h for h in history if h[1] == root]
+        directories[root]['evictions_per_hour'] = sum(h[2] for h in window)
+        directories[root]['reclaimed_bytes_per_hour'] = sum(h[3] for h in window)
+
+    return {
+        'updated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'pass_seconds': round(time.time() - started, 3),
+        'dry_run': DRY_RUN,
+        'directories': directories,
+    }
+
+def handle_signal(signum, frame):
+    global RUNNING
+    RUNNING = False
+
+def main():
+    log("Starting cache janitor...")
+    budgets = parse_budgets(JANITOR_BUDGETS)
+    roots = [root for root in budgets if os.path.isdir(root)]
+
+    for root, budget in budgets.items():
+        if root not in roots:
+            log(f"⚠ Directory not found, skipping: {root}")
+        else:
+            log(f"  {root}: budget {format_size(budget) if budget else 'unlimited'}")
+
+    if not roots:
+        log("✗ No managed directories found")
+        sys.exit(1)
+
+    if DRY_RUN:
+        log("ℹ Dry run: nothing will be deleted")
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    indexes = {root: CacheIndex(root) for root in roots}
+    totals = {root: {'evicted_files': 0, 'reclaimed_bytes': 0, 'would_reclaim_bytes': 0} for root in roots}
+    history = deque()
+
+    while RUNNING:
+        stats = run_pass(indexes, budgets, totals, history)
+        write_stats(stats)
+        summary = ', '.join(
+            f"{os.path.basename(root)}={format_size(d['size_bytes'])}"
+            for root, d in stats['directories'].items())
+        log(f"Pass complete in {stats['pass_seconds']}s: {summary}")
+
+        deadline = time.time() + INTERVAL
+        while RUNNING and time.time() < deadline:
+            time.sleep(1)
+
+    log("✓ Stopped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+LaunchLab Container Stats
+Records per-container CPU, memory, block I/O and network into a fixed-size ring file
+
+Commands:
+  collect   Sample the Docker Engine stats API every STATS_INTERVAL seconds
+  report    Top consumers over a time range
+  query     Time series for one container
+
+Usage:
+  python3 scripts/container-stats.py report --since 2h --sort cpu
+  python3 scripts/container-stats.py report --since "2024-11-02 20:00" --until "2024-11-02 23:00"
+  python3 scripts/container-stats.py query immich-server --since 30m
+
+Ring file layout (little-endian, preallocated, safe to mmap read-only
+while the collector writes):
+  header   64 bytes    magic, version, record size, capacity, records written
+  names    256 x 64    container name per slot
+  records  capacity x RECORD  oldest overwritten first
+
+Each record holds one container's sample: CPU % (of one core) and
+memory at sample time, and block/network bytes since its previous
+sample.
+"""
+
+import argparse
+import http.client
+import json
+import mmap
+import os
+import re
+import resource
+import signal
+import socket
+import struct
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+# Configuration
+DOCKER_SOCKET = os.environ.get('DOCKER_SOCKET', '/var/run/docker.sock')
+STATS_FILE = os.environ.get('STATS_FILE', os.path.join(PROJECT_ROOT, 'data', 'stats', 'containers.ring'))
+INTERVAL = int(os.environ.get('STATS_INTERVAL', '15'))  # seconds between samples
+RING_MB = int(os.environ.get('STATS_RING_MB', '64'))  # file size, fixed
+PROJECT = os.environ.get('STATS_PROJECT', '')  # compose project to record (default: own project)
+
+MAGIC = b'LLCS'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIQ')  # magic, version, record size, capacity, records written
+HEADER_SIZE = 64
+MAX_SLOTS = 256
+NAME_SIZE = 64
+DATA_OFFSET = HEADER_SIZE + MAX_SLOTS * NAME_SIZE
+# time, slot, reserved, cpu %, memory, block read, block write, net rx, net tx
+RECORD = struct.Struct('<IHHfQQQQQ')
+
+RUNNING = True
+
+def log(msg):
+    print(f"[Container Stats] {msg}", flush=True)
+
+def format_size(num_bytes):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f}TB"
+
+# ==============================================
+# Ring file
+# ==============================================
+
+class Ring:
+    """Fixed-size record ring backed by an mmap'ed file"""
+
+    def __init__(self, path, writable=False, size_mb=RING_MB):
+        if writable and not os.path.exists(path):
+            self._create(path, size_mb)
+        self.file = open(path, 'r+b' if writable else 'rb')
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        self.map = mmap.mmap(self.file.fileno(), 0, access=access)
+
+        magic, version, record_size, self.capacity, _ = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"{path} is not a version {VERSION} stats ring")
+        self.names = [self._name(slot) for slot in range(MAX_SLOTS)]
+
+    @staticmethod
+    def _create(path, size_mb):
+        capacity = (size_mb * 1024 * 1024 - DATA_OFFSET) // RECORD.size
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            f.truncate(DATA_OFFSET + capacity * RECORD.size)
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, capacity, 0))
+        log(f"Created {path} ({size_mb}MB, {capacity} records)")
+
+    def _name(self, slot):
+        raw = self.map[HEADER_SIZE + slot * NAME_SIZE:HEADER_SIZE + (slot + 1) * NAME_SIZE]
+        return raw.rstrip(b'\0').decode('utf-8', 'replace')
+
+    @property
+    def count(self):
+        return HEADER.unpack_from(self.map, 0)[4]
+
+    def slot_for(self, name):
+        """Slot of a container name, assigning a free one if new"""
+        if name in self.names:
+            return self.names.index(name)
+        for slot, existing in enumerate(self.names):
+            if not existing:
+                encoded = name.encode('utf-8')[:NAME_SIZE]
+                self.map[HEADER_SIZE + slot * NAME_SIZE:HEADER_SIZE + slot * NAME_SIZE + len(encoded)] = encoded
+                self.names[slot] = name
+                return slot
+        raise RuntimeError("All container slots in use, delete the ring file to start over")
+
+    def append(self, records):
+        """Write records, then publish the new count (readers never see half a record)"""
+        count = self.count
+        for record in records:
+            offset = DATA_OFFSET + (count % self.capacity) * RECORD.size
+            RECORD.pack_into(self.map, offset, *record)
+            count += 1
+        struct.pack_into('<Q', self.map, HEADER.size - 8, count)
+
+    def flush(self):
+        self.map.flush()
+
+    def _read(self, index):
+        return RECORD.unpack_from(self.map, DATA_OFFSET + (index % self.capacity) * RECORD.size)
+
+    def records(self, since, until):
+        """Yield records with since <= time < until, oldest first"""
+        count = self.count
+        first = max(0, count - self.capacity)
+        # Records are appended in time order: binary search the start
+        lo, hi = first, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._read(mid)[0] < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        for index in range(lo, count):
+            record = self._read(index)
+            if record[0] >= until:
+                break
+            yield record
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+# ==============================================
+# Docker Engine API
+# ==============================================
+
+class DockerConnection(http.client.HTTPConnection):
+    """HTTP over the Docker unix socket"""
+
+    def __init__(self, path):
+        super().__init__('localhost', timeout=30)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+class Docker:
+    def __init__(self, path):
+        self.path = path
+        self.conn = DockerConnection(path)
+
+    def get(self, endpoint):
+        for attempt in range(2):
+            try:
+                self.conn.request('GET', endpoint)
+                response = self.conn.getresponse()
+                data = response.read()
+                if response.status != 200:
+                    raise RuntimeError(f"{endpoint}: HTTP {response.status}")
+                return json.loads(data)
+            except (OSError, http.client.HTTPException):
+                self.conn.close()
+                self.conn = DockerConnection(self.path)
+                if attempt:
+                    raise
+
+def own_project(docker):
+    """Compose project of the container we run in, if any"""
+    try:
+        info = docker.get(f"/containers/{socket.gethostname()}/json")
+        return info['Config']['Labels'].get('com.docker.compose.project', '')
+    except (OSError, RuntimeError, KeyError, ValueError):
+        return ''
+
+def list_containers(docker, project):
+    containers = docker.get('/containers/json')
+    if project:
+        containers = [c for c in containers
+                      if c.get('Labels', {}).get('com.docker.compose.project') == project]
+    return [(c['Id'], c['Names'][0].lstrip('/')) for c in containers]
+
+def counters(stats):
+    """Extract (cpu ns, memory bytes, block read, block write, net rx, net tx) from a stats response"""
+    cpu = stats.get('cpu_stats', {}).get('cpu_usage', {}).get('total_usage', 0)
+
+    memory = stats.get('memory_stats', {})
+    detail = memory.get('stats', {})
+    # Same as `docker stats`: page cache that can be dropped is not counted
+    inactive = detail.get('inactive_file', detail.get('total_inactive_file', 0))
+    mem = max(memory.get('usage', 0) - inactive, 0)
+
+    read = write = 0
+    for entry in (stats.get('blkio_stats', {}).get('io_service_bytes_recursive') or []):
+        op = entry.get('op', '').lower()
+        if op == 'read':
+            read += entry.get('value', 0)
+        elif op == 'write':
+            write += entry.get('value', 0)
+
+    rx = tx = 0
+    for interface in (stats.get('networks') or {}).values():
+        rx += interface.get('rx_bytes', 0)
+        tx += interface.get('tx_bytes', 0)
+    return cpu, mem, read, write, rx, tx
+
+# ==============================================
+# Commands
+# ==============================================
+
+def handle_signal(signum, frame):
+    global RUNNING
+    RUNNING = False
+
+def cmd_collect(args):
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    docker = Docker(DOCKER_SOCKET)
+    project = PROJECT or own_project(docker)
+    ring = Ring(STATS_FILE, writable=True)
+    log(f"Collecting every {INTERVAL}s into {STATS_FILE} "
+        f"({ring.capacity} records, project: {project or 'all containers'})")
+
+    previous = {}  # container id -> (monotonic time, counters)
+    passes = 0
+    cpu_used = 0.0
+    while RUNNING:
+        started = time.monotonic()
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        records = []
+        try:
+            containers = list_containers(docker, project)
+        except (OSError, RuntimeError, ValueError) as e:
+            log(f"⚠ Cannot list containers: {e}")
+            containers = []
+
+        for container_id, name in containers:
+            try:
+                stats = docker.get(f"/containers/{container_id}/stats?stream=false&one-shot=true")
+            except (OSError, RuntimeError, ValueError):
+                continue
+            now = time.monotonic()
+            current = counters(stats)
+            last = previous.get(container_id)
+            previous[container_id] = (now, current)
+            if not last:
+                continue  # Need two samples for rates
+
+            elapsed_ns = (now - last[0]) * 1e9
+            # Counters reset when a container restarts
+            deltas = [c - p if c >= p else c for c, p in zip(current, last[1])]
+            cpu_pct = 100.0 * deltas[0] / elapsed_ns if elapsed_ns else 0.0
+            records.append((int(time.time()), ring.slot_for(name), 0, cpu_pct,
+                            current[1], deltas[2], deltas[3], deltas[4], deltas[5]))
+
+        gone = set(previous) - {c[0] for c in containers}
+        for container_id in gone:
+            del previous[container_id]
+
+        ring.append(records)
+        passes += 1
+        usage_after = resource.getrusage(resource.RUSAGE_SELF)
+        cpu_used += (usage_after.ru_utime + usage_after.ru_stime) - (usage_before.ru_utime + usage_before.ru_stime)
+        if passes % max(3600 // INTERVAL, 1) == 0:
+            ring.flush()
+            log(f"{passes} passes, {len(containers)} containers, own CPU {cpu_used / passes * 1000:.1f}ms/pass, "
+                f"RSS {usage_after.ru_maxrss / 1024:.0f}MB")
+
+        deadline = started + INTERVAL
+        while RUNNING and time.monotonic() < deadline:
+            time.sleep(min(1, max(deadline - time.monotonic(), 0)))
+
+    ring.flush()
+    ring.close()
+    log("✓ Stopped")
+    return 0
+
+def parse_time(value, now):
+    """'2h', '30m', '1d', 'now', epoch seconds or 'YYYY-MM-DD HH:MM' -> epoch"""
+    if value == 'now':
+        return int(now)
+    match = re.fullmatch(r'(\d+)([smhd])', value)
+    if match:
+        return int(now - int(match.group(1)) * {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[match.group(2)])
+    if value.isdigit():
+        return int(value)
+    for fmt in ('%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M', '%Y-%m-%d'):
+        try:
+            return int(time.mktime(time.strptime(value, fmt)))
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised time: {value}")
+
+def open_ring():
+    if not os.path.exists(STATS_FILE):
+        log(f"✗ No stats file at {STATS_FILE} - is the container-stats service running?")
+        return None
+    return Ring(STATS_FILE)
+
+def cmd_report(args):
+    ring = open_ring()
+    if not ring:
+        return 1
+    now = time.time()
+    since, until = parse_time(args.since, now), parse_time(args.until, now)
+
+    totals = {}
+    for ts, slot, _, cpu, mem, read, write, rx, tx in ring.records(since, until):
+        t = totals.setdefault(slot, {'samples': 0, 'cpu_sum': 0.0, 'cpu_max': 0.0, 'mem_sum': 0,
+                                     'mem_max': 0, 'read': 0, 'write': 0, 'rx': 0, 'tx': 0})
+        t['samples'] += 1
+        t['cpu_sum'] += cpu
+        t['cpu_max'] = max(t['cpu_max'], cpu)
+        t['mem_sum'] += mem
+        t['mem_max'] = max(t['mem_max'], mem)
+        t['read'] += read
+        t['write'] += write
+        t['rx'] += rx
+        t['tx'] += tx
+
+    if not totals:
+        log("No samples in that range")
+        return 0
+
+    rows = []
+    for slot, t in totals.items():
+        rows.append({
+            'container': ring.names[slot],
+            'cpu_avg': t['cpu_sum'] / t['samples'],
+            'cpu_max': t['cpu_max'],
+            'mem_avg': t['mem_sum'] / t['samples'],
+            'mem_max': t['mem_max'],
+            'io': t['read'] + t['write'],
+            'read': t['read'],
+            'write': t['write'],
+            'net': t['rx'] + t['tx'],
+            'samples': t['samples'],
+        })
+    key = {'cpu': 'cpu_avg', 'mem': 'mem_max', 'io': 'io', 'net': 'net'}[args.sort]
+    rows.sort(key=lambda r: r[key], reverse=True)
+    rows = rows[:args.top]
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+
+    span = f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(since))} → " \
+           f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(min(until, now)))}"
+    print(f"Top {len(rows)} containers by {args.sort}, {span}")
+    print(f"{'CONTAINER':<24} {'CPU AVG':>8} {'CPU MAX':>8} {'MEM AVG':>9} {'MEM MAX':>9} "
+          f"{'DISK READ':>10} {'DISK WRITE':>10} {'NET':>9}")
+    for r in rows:
+        print(f"{r['container'][:24]:<24} {r['cpu_avg']:>7.1f}% {r['cpu_max']:>7.1f}% "
+              f"{format_size(r['mem_avg']):>9} {format_size(r['mem_max']):>9} "
+              f"{format_size(r['read']):>10} {format_size(r['write']):>10} {format_size(r['net']):>9}")
+    return 0
+
+def cmd_query(args):
+    ring = open_ring()
+    if not ring:
+        return 1
+    if args.container not in ring.names:
+        log(f"✗ No samples for {args.container}")
+        return 1
+    slot = ring.names.index(args.container)
+    now = time.time()
+    since, until = parse_time(args.since, now), parse_time(args.until, now)
+
+    # Downsample into buckets so long ranges stay readable
+    buckets = {}
+    for ts, record_slot, _, cpu, mem, read, write, rx, tx in ring.records(since, until):
+        if record_slot != slot:
+            continue
+        b = buckets.setdefault(ts - ts % args.step, [0, 0.0, 0, 0, 0])
+        b[0] += 1
+        b[1] = max(b[1], cpu)
+        b[2] = max(b[2], mem)
+        b[3] += read + write
+        b[4] += rx + tx
+
+    print(f"{args.container}: {args.step}s buckets (max CPU/memory, total disk/network)")
+    print(f"{'TIME':<17} {'CPU':>7} {'MEMORY':>9} {'DISK':>9} {'NET':>9}")
+    for start in sorted(buckets):
+        _, cpu, mem, disk, net = buckets[start]
+        print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(start)):<17} {cpu:>6.1f}% "
+              f"{format_size(mem):>9} {format_size(disk):>9} {format_size(net):>9}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-container resource history')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('collect', help='Sample container stats into the ring file')
+
+    report = sub.add_parser('report', help='Top consumers over a time range')
+    report.add_argument('--since', default='1h', help='Start: 2h, 30m, 1d or "YYYY-MM-DD HH:MM" (default: 1h)')
+    report.add_argument('--until', default='now', help='End (default: now)')
+    report.add_argument('--sort', choices=['cpu', 'mem', 'io', 'net'], default='cpu')
+    report.add_argument('--top', type=int, default=10)
+    report.add_argument('--json', action='store_true', help='Machine-readable output')
+
+    query = sub.add_parser('query', help='Time series for one container')
+    query.add_argument('container')
+    query.add_argument('--since', default='1h')
+    query.add_argument('--until', default='now')
+    query.add_argument('--step', type=int, default=60, help='Bucket size in seconds')
+
+    args = parser.parse_args()
+    try:
+        return {'collect': cmd_collect, 'report': cmd_report, 'query': cmd_query}[args.command](args)
+    except ValueError as e:
+        log(f"✗ {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
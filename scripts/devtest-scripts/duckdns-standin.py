@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for DuckDNS, used by test-dyndns.sh
+
+HTTP (--http-port):
+  GET /update?domains=&token=&ip=   DuckDNS update API (OK / KO)
+  GET /ip                           the simulated public IP (an IP source for dyndns.py)
+  GET /set-ip?ip=1.2.3.4            change the simulated public IP
+  GET /fail?count=N                 answer the next N updates with HTTP 500
+  GET /stats                        {"updates": n, "failed": n, "record": ip, "public_ip": ip}
+
+DNS (--dns-port, UDP):
+  A queries for <domain>.duckdns.org answer the published IP, but only
+  --delay seconds after the update, like a record making its way out.
+"""
+
+import argparse
+import json
+import socket
+import struct
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+state = {'public_ip': '1.2.3.4', 'record': None, 'visible_at': 0, 'previous': None,
+         'updates': 0, 'failed': 0, 'fail_next': 0}
+lock = threading.Lock()
+
+def make_handler(domain, token, delay):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def reply(self, code, body):
+            data = body.encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            query = dict(urllib.parse.parse_qsl(url.query))
+            with lock:
+                if url.path == '/ip':
+                    return self.reply(200, state['public_ip'] + '\n')
+                if url.path == '/set-ip':
+                    state['public_ip'] = query['ip']
+                    return self.reply(200, 'OK')
+                if url.path == '/fail':
+                    state['fail_next'] = int(query.get('count', 1))
+                    return self.reply(200, 'OK')
+                if url.path == '/stats':
+                    return self.reply(200, json.dumps({k: state[k] for k in ('updates', 'failed', 'record', 'public_ip')}))
+                if url.path == '/update':
+                    if state['fail_next']:
+                        state['fail_next'] -= 1
+                        state['failed'] += 1
+                        return self.reply(500, 'Internal Server Error')
+                    if query.get('domains') != domain or query.get('token') != token:
+                        return self.reply(200, 'KO')
+                    ip = query.get('ip')
+                    changed = ip != state['record']
+                    if changed:
+                        state['previous'] = state['record']
+                        state['record'] = ip
+                        state['visible_at'] = time.monotonic() + delay
+                    state['updates'] += 1
+                    return self.reply(200, f"OK\n{ip}\n\n{'UPDATED' if changed else 'NOCHANGE'}")
+            self.reply(404, 'Not Found')
+
+    return Handler
+
+def serve_dns(port, hostname):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', port))
+    while True:
+        data, addr = sock.recvfrom(512)
+        query_id = data[:2]
+        offset, labels = 12, []
+        while data[offset]:
+            labels.append(data[offset + 1:offset + 1 + data[offset]].decode())
+            offset += data[offset] + 1
+        question = data[12:offset + 5]
+        with lock:
+            visible = state['record'] if time.monotonic() >= state['visible_at'] else state['previous']
+        answers = b''
+        if '.'.join(labels).lower() == hostname and visible:
+            answers = b'\xc0\x0c' + struct.pack('>HHIH', 1, 1, 60, 4) + socket.inet_aton(visible)
+        header = query_id + struct.pack('>HHHHH', 0x8180, 1, 1 if answers else 0, 0, 0)
+        sock.sendto(header + question + answers, addr)
+
+def main():
+    parser = argparse.ArgumentParser(description='DuckDNS stand-in')
+    parser.add_argument('--http-port', type=int, default=18080)
+    parser.add_argument('--dns-port', type=int, default=18053)
+    parser.add_argument('--domain', default='launchlab-test')
+    parser.add_argument('--token', default='test-token')
+    parser.add_argument('--delay', type=float, default=3, help='Seconds before an update shows in DNS')
+    args = parser.parse_args()
+
+    threading.Thread(target=serve_dns, args=(args.dns_port, f"{args.domain}.duckdns.org"), daemon=True).start()
+    server = ThreadingHTTPServer(('127.0.0.1', args.http_port), make_handler(args.domain, args.token, args.delay))
+    print(f"DuckDNS stand-in: http://127.0.0.1:{args.http_port}, DNS 127.0.0.1:{args.dns_port}", flush=True)
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
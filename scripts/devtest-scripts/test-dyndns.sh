@@ -0,0 +1,192 @@
+#!/bin/bash
+# ==============================================
+# LAUNCHLAB DYNAMIC DNS UPDATER TEST
+# ==============================================
+# Runs scripts/dyndns.py against duckdns-standin.py (DuckDNS update
+# API, a fake public-IP source and a DNS server on localhost).
+# Verifies updates happen only on IP change, failures are retried,
+# the cached IP survives a restart, --force re-publishes, and reports
+# time-to-propagate.
+# Needs python3 only - no Docker, no network.
+# ==============================================
+
+set -e
+
+# Colors
+GREEN='\033[0;32m'
+BLUE='\033[0;34m'
+YELLOW='\033[1;33m'
+RED='\033[0;31m'
+NC='\033[0m'
+
+log_info() { echo -e "${BLUE}[TEST]${NC} $1"; }
+log_success() { echo -e "${GREEN}[TEST]${NC} $1"; }
+log_warning() { echo -e "${YELLOW}[TEST]${NC} $1"; }
+log_error() { echo -e "${RED}[TEST]${NC} $1"; }
+
+# ==============================================
+# Configuration
+# ==============================================
+
+REPO_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+
+HTTP_PORT=18480
+DNS_PORT=18453
+DNS_DELAY=3      # Seconds the stand-in waits before DNS shows a new record
+MAX_WAIT_SECONDS=30
+
+TEST_DIR=$(mktemp -d)
+STANDIN_PID=""
+UPDATER_PID=""
+
+# ==============================================
+# Cleanup function
+# ==============================================
+
+cleanup() {
+    local exit_code=$?
+    [ -n "$UPDATER_PID" ] && kill "$UPDATER_PID" 2>/dev/null || true
+    [ -n "$STANDIN_PID" ] && kill "$STANDIN_PID" 2>/dev/null || true
+    if [ $exit_code -ne 0 ] && [ -f "$TEST_DIR/updater.log" ]; then
+        log_warning "Updater log:"
+        cat "$TEST_DIR/updater.log"
+    fi
+    rm -rf "$TEST_DIR"
+    exit $exit_code
+}
+
+trap cleanup EXIT INT TERM
+
+standin() { curl -fsS "http://127.0.0.1:$HTTP_PORT/$1"; }
+
+stat_field() { standin stats | python3 -c "import json,sys; print(json.load(sys.stdin)['$1'])"; }
+
+# Extra arguments go to dyndns.py; start_updater runs it in the background
+run_updater() {
+    DYNDNS_PROVIDER=duckdns \
+    DUCKDNS_DOMAIN=launchlab-test \
+    DUCKDNS_TOKEN=test-token \
+    DUCKDNS_URL="http://127.0.0.1:$HTTP_PORT" \
+    DYNDNS_IP_SOURCES="http://127.0.0.1:$HTTP_PORT/ip" \
+    DYNDNS_DNS_SERVER="127.0.0.1:$DNS_PORT" \
+    DYNDNS_CHECK_INTERVAL=1 \
+    DYNDNS_BACKOFF_MIN=1 \
+    DYNDNS_BACKOFF_MAX=4 \
+    STATE_DIR="$TEST_DIR/state" \
+        python3 "$REPO_ROOT/scripts/dyndns.py" "$@" >> "$TEST_DIR/updater.log" 2>&1
+}
+
+start_updater() {
+    run_updater &
+    UPDATER_PID=$!
+}
+
+stop_updater() {
+    kill "$UPDATER_PID" 2>/dev/null || true
+    wait "$UPDATER_PID" 2>/dev/null || true
+    UPDATER_PID=""
+}
+
+# Wait until the stand-in has seen $1 successful updates
+wait_for_updates() {
+    local waited=0
+    while [ $waited -lt $MAX_WAIT_SECONDS ]; do
+        if [ "$(stat_field updates)" -ge "$1" ]; then
+            return 0
+        fi
+        sleep 1
+        waited=$((waited + 1))
+    done
+    return 1
+}
+
+# Wait until the updater logged propagation of $1
+wait_for_propagation() {
+    local waited=0
+    while [ $waited -lt $MAX_WAIT_SECONDS ]; do
+        if grep -q "→ $1 on 127.0.0.1:$DNS_PORT" "$TEST_DIR/updater.log"; then
+            return 0
+        fi
+        sleep 1
+        waited=$((waited + 1))
+    done
+    return 1
+}
+
+# ==============================================
+# Start Test
+# ==============================================
+
+echo ""
+echo "=========================================="
+echo "  LaunchLab Dynamic DNS Updater Test"
+echo "=========================================="
+echo ""
+
+log_info "Starting DuckDNS stand-in (HTTP $HTTP_PORT, DNS $DNS_PORT, ${DNS_DELAY}s DNS delay)..."
+python3 "$REPO_ROOT/scripts/devtest-scripts/duckdns-standin.py" \
+    --http-port $HTTP_PORT --dns-port $DNS_PORT --delay $DNS_DELAY > "$TEST_DIR/standin.log" 2>&1 &
+STANDIN_PID=$!
+sleep 1
+
+# Step 1: First run publishes the current IP
+start_updater
+if ! wait_for_updates 1; then
+    log_error "Initial update never reached the stand-in"
+    exit 1
+fi
+log_success "Initial IP published ($(stat_field record))"
+
+# Step 2: No change -> no further updates
+sleep 5
+if [ "$(stat_field updates)" -ne 1 ]; then
+    log_error "Updater pushed $(stat_field updates) updates without an IP change"
+    exit 1
+fi
+log_success "No updates while the IP is unchanged (5 checks)"
+
+# Step 3: IP change -> one update, then propagation is measured
+standin "set-ip?ip=5.6.7.8" > /dev/null
+if ! wait_for_updates 2 || ! wait_for_propagation 5.6.7.8; then
+    log_error "IP change to 5.6.7.8 not published/propagated"
+    exit 1
+fi
+log_success "IP change published: $(grep '→ 5.6.7.8 on' "$TEST_DIR/updater.log" | sed 's/.*: //')"
+
+# Step 4: Provider errors -> retried with backoff until it works
+standin "fail?count=2" > /dev/null
+standin "set-ip?ip=9.9.9.9" > /dev/null
+if ! wait_for_updates 3; then
+    log_error "Update not retried after failures"
+    exit 1
+fi
+if [ "$(stat_field failed)" -ne 2 ] || [ "$(stat_field record)" != "9.9.9.9" ]; then
+    log_error "Expected 2 failed attempts then 9.9.9.9 (failed: $(stat_field failed), record: $(stat_field record))"
+    exit 1
+fi
+log_success "Update retried after 2 failures"
+
+# Step 5: Restart -> cached IP, no update
+wait_for_propagation 9.9.9.9 || true
+stop_updater
+start_updater
+sleep 4
+if [ "$(stat_field updates)" -ne 3 ]; then
+    log_error "Updater re-published after restart despite cached IP"
+    exit 1
+fi
+log_success "Cached IP survives restart (no update)"
+
+# Step 6: --force re-publishes the cached IP
+stop_updater
+if ! run_updater --once --force || [ "$(stat_field updates)" -ne 4 ]; then
+    log_error "--once --force did not re-publish (updates: $(stat_field updates))"
+    exit 1
+fi
+log_success "Forced update re-published $(stat_field record)"
+
+echo ""
+log_info "Last propagation (state.json):"
+python3 -c "import json; print(json.dumps(json.load(open('$TEST_DIR/state/state.json'))['last_propagation'], indent=2))"
+echo ""
+log_success "TEST PASSED - Dynamic DNS updater works against the stand-in"
@@ -0,0 +1,115 @@
+#!/bin/bash
+# ==============================================
+# LAUNCHLAB IMAGE BUNDLE TEST
+# ==============================================
+# Tests scripts/images.py against a local registry
+# standing in for Docker Hub / GHCR:
+#   mirror -> pull --registry -> export -> import
+# Uses small images so it runs in about a minute.
+# ==============================================
+
+set -e
+
+# Colors
+GREEN='\033[0;32m'
+BLUE='\033[0;34m'
+YELLOW='\033[1;33m'
+RED='\033[0;31m'
+NC='\033[0m'
+
+log_info() { echo -e "${BLUE}[TEST]${NC} $1"; }
+log_success() { echo -e "${GREEN}[TEST]${NC} $1"; }
+log_warning() { echo -e "${YELLOW}[TEST]${NC} $1"; }
+log_error() { echo -e "${RED}[TEST]${NC} $1"; }
+
+# ==============================================
+# Configuration
+# ==============================================
+
+REPO_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+IMAGES_PY="$REPO_ROOT/scripts/images.py"
+
+REGISTRY_NAME="launchlab-test-registry"
+REGISTRY_PORT=5099
+REGISTRY="localhost:${REGISTRY_PORT}"
+TEST_IMAGES=("alpine:3.20" "busybox:1.36")
+
+WORK_DIR="$(mktemp -d)"
+COMPOSE_FILE="$WORK_DIR/docker-compose.yml"
+BUNDLE="$WORK_DIR/bundle.tar.gz"
+
+# ==============================================
+# Cleanup function
+# ==============================================
+
+cleanup() {
+    local exit_code=$?
+    log_info "Cleaning up..."
+    docker rm -f "$REGISTRY_NAME" >/dev/null 2>&1 || true
+    for image in "${TEST_IMAGES[@]}"; do
+        docker rmi "$REGISTRY/library/$image" >/dev/null 2>&1 || true
+    done
+    rm -rf "$WORK_DIR"
+    exit $exit_code
+}
+
+trap cleanup EXIT INT TERM
+
+remove_test_images() {
+    for image in "${TEST_IMAGES[@]}"; do
+        docker rmi "$image" "$REGISTRY/library/$image" >/dev/null 2>&1 || true
+    done
+}
+
+# ==============================================
+# Start Test
+# ==============================================
+
+echo ""
+echo "=========================================="
+echo "  LaunchLab Image Bundle Test"
+echo "=========================================="
+echo ""
+
+# Compose file referencing only the test images
+{
+    echo "services:"
+    i=0
+    for image in "${TEST_IMAGES[@]}"; do
+        echo "  svc$i:"
+        echo "    image: $image"
+        i=$((i + 1))
+    done
+} > "$COMPOSE_FILE"
+
+log_info "Starting local registry on port $REGISTRY_PORT..."
+docker run -d --name "$REGISTRY_NAME" -p "${REGISTRY_PORT}:5000" registry:2 >/dev/null
+
+log_info "Seeding registry with test images..."
+for image in "${TEST_IMAGES[@]}"; do
+    docker pull --quiet "$image" >/dev/null
+done
+python3 "$IMAGES_PY" mirror --registry "$REGISTRY" -f "$COMPOSE_FILE"
+remove_test_images
+
+# Step 1: Parallel pull through the registry stand-in
+log_info "Pulling via local registry..."
+python3 "$IMAGES_PY" pull --registry "$REGISTRY" -f "$COMPOSE_FILE"
+for image in "${TEST_IMAGES[@]}"; do
+    docker image inspect "$image" >/dev/null 2>&1 || { log_error "Missing after pull: $image"; exit 1; }
+done
+log_success "Pull via registry works"
+
+# Step 2: Export bundle
+python3 "$IMAGES_PY" export "$BUNDLE" -f "$COMPOSE_FILE"
+[ -s "$BUNDLE" ] || { log_error "Bundle not written"; exit 1; }
+log_success "Bundle exported ($(du -h "$BUNDLE" | cut -f1))"
+
+# Step 3: Import with registry gone and images removed
+docker rm -f "$REGISTRY_NAME" >/dev/null
+remove_test_images
+python3 "$IMAGES_PY" import "$BUNDLE" -f "$COMPOSE_FILE"
+log_success "Bundle imported with no registry available"
+
+echo ""
+log_success "TEST PASSED - Pre-pull and offline bundle work"
@@ -0,0 +1,179 @@
+#!/bin/bash
+# ==============================================
+# LAUNCHLAB SPLIT-NODE IMMICH ML TEST
+# ==============================================
+# Runs two compose projects on this machine:
+#   - "ML node":   docker-compose.ml-node.yml
+#   - "main host": immich-ml + immich-ml-proxy from
+#                  docker-compose.yml + docker-compose.ml-remote.yml
+# Verifies requests reach the remote node, fall back to
+# the local container when it stops, and return after recovery.
+# Both projects are rendered without container_name pins and on
+# their own subnet, so a running LaunchLab stack is left alone.
+# ==============================================
+
+set -e
+
+# Colors
+GREEN='\033[0;32m'
+BLUE='\033[0;34m'
+YELLOW='\033[1;33m'
+RED='\033[0;31m'
+NC='\033[0m'
+
+log_info() { echo -e "${BLUE}[TEST]${NC} $1"; }
+log_success() { echo -e "${GREEN}[TEST]${NC} $1"; }
+log_warning() { echo -e "${YELLOW}[TEST]${NC} $1"; }
+log_error() { echo -e "${RED}[TEST]${NC} $1"; }
+
+# ==============================================
+# Configuration
+# ==============================================
+
+REPO_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+
+NODE_PROJECT="launchlab-ml-test-node"
+MAIN_PROJECT="launchlab-ml-test-main"
+ML_NODE_PORT=3013
+TEST_SUBNET_PREFIX="${TEST_SUBNET_PREFIX:-172.31.222}"  # /24 used instead of homelab-net's
+LOCAL_ML_IP="$TEST_SUBNET_PREFIX.22"
+
+MAX_WAIT_SECONDS=300
+FAIL_TIMEOUT=30  # Must match fail_timeout in immich-ml-proxy.conf.template
+
+TEST_DIR=$(mktemp -d)
+
+# Render compose files ($2...) to $1 without container_name, and with
+# fixed 172.20.0.x addresses moved into the test subnet
+render() {
+    local out=$1
+    shift
+    docker compose "$@" config --format json | python3 -c '
+import json, sys
+old, new = "172.20.0.", sys.argv[1] + "."
+config = json.load(sys.stdin)
+for service in config["services"].values():
+    service.pop("container_name", None)
+    for net in (service.get("networks") or {}).values():
+        if net and net.get("ipv4_address", "").startswith(old):
+            net["ipv4_address"] = net["ipv4_address"].replace(old, new, 1)
+    env = service.get("environment") or {}
+    for key, value in env.items():
+        if isinstance(value, str) and value.startswith(old):
+            env[key] = value.replace(old, new, 1)
+json.dump(config, sys.stdout, indent=2)
+' "$TEST_SUBNET_PREFIX" > "$out"
+}
+
+node_compose() {
+    docker compose -p "$NODE_PROJECT" -f "$TEST_DIR/node.json" "$@"
+}
+
+main_compose() {
+    docker compose -p "$MAIN_PROJECT" -f "$TEST_DIR/main.json" "$@"
+}
+
+# ==============================================
+# Cleanup function
+# ==============================================
+
+cleanup() {
+    local exit_code=$?
+    log_info "Cleaning up test containers..."
+    main_compose down 2>/dev/null || true
+    node_compose down 2>/dev/null || true
+    rm -rf "$TEST_DIR"
+    exit $exit_code
+}
+
+trap cleanup EXIT INT TERM
+
+# Print "<body> <upstream>" for one /ping through the proxy
+probe() {
+    local output
+    output=$(main_compose exec -T immich-ml-proxy wget -S -qO- http://127.0.0.1:3003/ping 2>&1 || true)
+    local body=$(echo "$output" | grep -o 'pong' | head -1)
+    local upstream=$(echo "$output" | grep -i 'X-ML-Upstream' | sed 's/.*X-ML-Upstream: *//I' | tr -d '\r ' | tail -1)
+    echo "${body:-none} ${upstream:-none}"
+}
+
+wait_for_pong() {
+    local waited=0
+    while [ $waited -lt $MAX_WAIT_SECONDS ]; do
+        if [ "$(probe | cut -d' ' -f1)" == "pong" ]; then
+            return 0
+        fi
+        sleep 5
+        waited=$((waited + 5))
+    done
+    return 1
+}
+
+# ==============================================
+# Start Test
+# ==============================================
+
+echo ""
+echo "=========================================="
+echo "  LaunchLab Split-Node ML Test"
+echo "=========================================="
+echo ""
+
+log_info "Rendering test projects (subnet $TEST_SUBNET_PREFIX.0/24)..."
+ML_NODE_BIND=0.0.0.0 ML_NODE_PORT=$ML_NODE_PORT \
+    render "$TEST_DIR/node.json" -p "$NODE_PROJECT" -f "$REPO_ROOT/docker-compose.ml-node.yml"
+IMMICH_ML_REMOTE="host.docker.internal:$ML_NODE_PORT" \
+DOCKER_SUBNET="$TEST_SUBNET_PREFIX.0/24" DOCKER_GATEWAY="$TEST_SUBNET_PREFIX.1" \
+    render "$TEST_DIR/main.json" -p "$MAIN_PROJECT" --project-directory "$REPO_ROOT" \
+    -f "$REPO_ROOT/docker-compose.yml" -f "$REPO_ROOT/docker-compose.ml-remote.yml" \
+    immich-ml immich-ml-proxy
+
+log_info "Starting ML node project ($NODE_PROJECT, port $ML_NODE_PORT)..."
+node_compose up -d
+
+log_info "Starting main host ML services ($MAIN_PROJECT)..."
+main_compose up -d --no-deps immich-ml immich-ml-proxy
+
+log_info "Waiting for ML API through proxy (up to ${MAX_WAIT_SECONDS}s)..."
+if ! wait_for_pong; then
+    log_error "ML API never answered through immich-ml-proxy"
+    exit 1
+fi
+
+# Step 1: Remote node serves requests
+read -r BODY UPSTREAM <<< "$(probe)"
+if [ "$UPSTREAM" == "${LOCAL_ML_IP}:3003" ] || [ "$UPSTREAM" == "none" ]; then
+    log_error "Expected remote node, got upstream: $UPSTREAM"
+    exit 1
+fi
+log_success "Remote node serving requests (upstream: $UPSTREAM)"
+
+# Step 2: Remote node down -> local fallback
+log_info "Stopping ML node..."
+node_compose stop
+
+read -r BODY UPSTREAM <<< "$(probe)"
+if [ "$BODY" != "pong" ] || [[ "$UPSTREAM" != *"${LOCAL_ML_IP}:3003"* ]]; then
+    log_error "Fallback failed (body: $BODY, upstream: $UPSTREAM)"
+    exit 1
+fi
+log_success "Local fallback serving requests (upstream: $UPSTREAM)"
+
+# Step 3: Remote node back -> traffic returns after fail_timeout
+log_info "Restarting ML node..."
+node_compose start
+sleep $((FAIL_TIMEOUT + 5))
+
+if ! wait_for_pong; then
+    log_error "ML API unavailable after node restart"
+    exit 1
+fi
+read -r BODY UPSTREAM <<< "$(probe)"
+if [ "$UPSTREAM" == "${LOCAL_ML_IP}:3003" ]; then
+    log_error "Traffic did not return to remote node"
+    exit 1
+fi
+log_success "Remote node serving requests again (upstream: $UPSTREAM)"
+
+echo ""
+log_success "TEST PASSED - Split-node ML with local fallback works"
@@ -0,0 +1,553 @@
+#!/usr/bin/env python3
+"""
+DNS Resolution Benchmark
+Replays a mixed query load against Pi-hole (or any resolver) and reports latency
+
+Query categories:
+- local:    .ll names from config/pihole/custom.list
+- popular:  common internet domains (cache hits after first lookup)
+- blocked:  ad/tracker domains Pi-hole answers with 0.0.0.0
+- nxdomain: random names that do not exist
+
+Usage:
+  # Benchmark Pi-hole from the host
+  python3 scripts/dns-benchmark.py --server 127.0.0.1
+
+  # Compare host path against the VPN path (run from a VPN client)
+  python3 scripts/dns-benchmark.py --server 127.0.0.1 --server 172.20.0.4
+
+  # Offline run against the built-in stub resolver
+  python3 scripts/dns-benchmark.py --offline
+
+  # Run only the stub resolver
+  python3 scripts/dns-benchmark.py --serve --port 5353
+
+Standard library only - runs on any host or VPN client with Python 3.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import selectors
+import socket
+import socketserver
+import string
+import struct
+import sys
+import threading
+import time
+import zlib
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+CUSTOM_LIST = os.path.join(PROJECT_ROOT, 'config', 'pihole', 'custom.list')
+
+# Defaults
+DNS_SERVER = os.environ.get('DNS_SERVER', '127.0.0.1')
+DNS_PORT = int(os.environ.get('DNS_PORT', '53'))
+DEFAULT_MIX = 'local=40,popular=40,blocked=10,nxdomain=10'
+
+# Fallback when custom.list is not available (e.g. on a VPN client)
+DEFAULT_LOCAL_NAMES = [
+    'media.ll', 'photos.ll', 'docs.ll', 'portainer.ll', 'chat.ll',
+    'matrix.ll', 'pihole.ll', 'vpn.ll', 'homelab.local',
+]
+
+POPULAR_NAMES = [
+    'google.com', 'youtube.com', 'facebook.com', 'wikipedia.org',
+    'amazon.com', 'apple.com', 'microsoft.com', 'github.com',
+    'cloudflare.com', 'netflix.com', 'reddit.com', 'instagram.com',
+    'whatsapp.net', 'icloud.com', 'duckdns.org', 'docker.io',
+]
+
+BLOCKED_NAMES = [
+    'doubleclick.net', 'googleadservices.com', 'ads.yahoo.com',
+    'adservice.google.com', 'pagead2.googlesyndication.com',
+    'ad.doubleclick.net', 'analytics.twitter.com', 'ads.linkedin.com',
+]
+
+NXDOMAIN_SUFFIX = 'example.com'
+
+# DNS constants
+TYPE_A = 1
+CLASS_IN = 1
+RCODE_NAMES = {0: 'NOERROR', 1: 'FORMERR', 2: 'SERVFAIL', 3: 'NXDOMAIN', 4: 'NOTIMP', 5: 'REFUSED'}
+
+def log(msg):
+    print(f"[DNS Bench] {msg}", file=sys.stderr, flush=True)
+
+# ==============================================
+# DNS wire format
+# ==============================================
+
+def encode_name(name):
+    """Encode a hostname as DNS labels"""
+    out = b''
+    for label in name.rstrip('.').split('.'):
+        out += bytes([len(label)]) + label.encode('ascii')
+    return out + b'\x00'
+
+def build_query(query_id, name):
+    """Build a recursive A query"""
+    header = struct.pack('!HHHHHH', query_id, 0x0100, 1, 0, 0, 0)
+    return header + encode_name(name) + struct.pack('!HH', TYPE_A, CLASS_IN)
+
+def skip_name(data, offset):
+    """Return the offset just past a (possibly compressed) name"""
+    while True:
+        length = data[offset]
+        if length == 0:
+            return offset + 1
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        offset += length + 1
+
+def read_name(data, offset):
+    """Decode a name (no compression, used for the question section)"""
+    labels = []
+    while data[offset]:
+        length = data[offset]
+        labels.append(data[offset + 1:offset + 1 + length].decode('ascii', 'replace'))
+        offset += length + 1
+    return '.'.join(labels).lower(), offset + 1
+
+def parse_response(data):
+    """
+    Parse the fields the benchmark needs from a response
+
+    Returns:
+        Dict with id, rcode, answers, ttl (first A record) and address
+    """
+    query_id, flags, qdcount, ancount, _, _ = struct.unpack('!HHHHHH', data[:12])
+    offset = 12
+    for _ in range(qdcount):
+        offset = skip_name(data, offset) + 4
+
+    result = {'id': query_id, 'rcode': flags & 0x000F, 'answers': ancount,
+              'ttl': None, 'address': None}
+
+    for _ in range(ancount):
+        offset = skip_name(data, offset)
+        rtype, _, ttl, rdlength = struct.unpack('!HHIH', data[offset:offset + 10])
+        offset += 10
+        if rtype == TYPE_A and result['address'] is None:
+            result['ttl'] = ttl
+            result['address'] = socket.inet_ntoa(data[offset:offset + 4])
+        offset += rdlength
+
+    return result
+
+def build_response(query, rcode=0, address=None, ttl=0):
+    """Build a response to query with at most one A record"""
+    query_id, flags = struct.unpack('!HH', query[:4])
+    question_end = skip_name(query, 12) + 4
+    ancount = 1 if address else 0
+    header = struct.pack('!HHHHHH', query_id, 0x8080 | (flags & 0x0100) | rcode, 1, ancount, 0, 0)
+    response = header + query[12:question_end]
+    if address:
+        response += struct.pack('!HHHIH', 0xC00C, TYPE_A, CLASS_IN, ttl, 4)
+        response += socket.inet_aton(address)
+    return response
+
+# ==============================================
+# Query mix
+# ==============================================
+
+def load_local_names(path):
+    """Read .ll and local names from a hosts-style file"""
+    if not os.path.exists(path):
+        return list(DEFAULT_LOCAL_NAMES)
+
+    names = []
+    with open(path) as f:
+        for line in f:
+            parts = line.split('#', 1)[0].split()
+            names.extend(name.lower() for name in parts[1:])
+    return names or list(DEFAULT_LOCAL_NAMES)
+
+def parse_mix(spec):
+    """Parse 'local=40,popular=40,...' into a weights dict"""
+    weights = {}
+    for item in spec.split(','):
+        category, _, weight = item.partition('=')
+        category = category.strip()
+        if category not in ('local', 'popular', 'blocked', 'nxdomain'):
+            raise ValueError(f"Unknown query category: {category}")
+        try:
+            weights[category] = float(weight)
+        except ValueError:
+            raise ValueError(f"Invalid weight for {category}: '{weight}'") from None
+    return {k: v for k, v in weights.items() if v > 0}
+
+def random_label(length=12):
+    return ''.join(random.choice(string.ascii_lowercase + string.digits) for _ in range(length))
+
+def generate_queries(count, weights, local_names, nxdomain_suffix):
+    """Return a list of (category, name) tuples following the mix"""
+    pools = {
+        'local': local_names,
+        'popular': POPULAR_NAMES,
+        'blocked': BLOCKED_NAMES,
+    }
+    categories = list(weights)
+    queries = []
+    for category in random.choices(categories, weights=[weights[c] for c in categories], k=count):
+        if category == 'nxdomain':
+            name = f"nx-{random_label()}.{nxdomain_suffix}"
+        else:
+            name = random.choice(pools[category])
+        queries.append((category, name))
+    return queries
+
+# ==============================================
+# Load generator
+# ==============================================
+
+def run_benchmark(server, port, queries, qps, timeout):
+    """
+    Send queries open-loop at a fixed rate from a single UDP socket
+
+    Sending is scheduled on the clock rather than on replies, so a slow
+    resolver shows up as latency and timeouts instead of lowering the
+    offered load.
+
+    Returns:
+        List of result dicts (category, name, latency_ms, rcode, ttl, address, error)
+    """
+    family = socket.AF_INET6 if ':' in server else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    sock.connect((server, port))
+
+    selector = selectors.DefaultSelector()
+    selector.register(sock, selectors.EVENT_READ)
+
+    interval = 1.0 / qps
+    outstanding = {}
+    results = []
+    next_index = 0
+    start = time.perf_counter()
+
+    while next_index < len(queries) or outstanding:
+        now = time.perf_counter()
+
+        # Send everything that is due
+        while next_index < len(queries) and start + next_index * interval <= now:
+            category, name = queries[next_index]
+            query_id = random.randrange(0x10000)
+            while query_id in outstanding:
+                query_id = random.randrange(0x10000)
+            try:
+                sock.send(build_query(query_id, name))
+                outstanding[query_id] = (time.perf_counter(), category, name)
+            except OSError as e:
+                results.append({'category': category, 'name': name, 'latency_ms': None,
+                                'rcode': None, 'ttl': None, 'address': None, 'error': str(e)})
+            next_index += 1
+
+        # Expire timed-out queries
+        now = time.perf_counter()
+        for query_id in [q for q, (sent, _, _) in outstanding.items() if now - sent > timeout]:
+            _, category, name = outstanding.pop(query_id)
+            results.append({'category': category, 'name': name, 'latency_ms': None,
+                            'rcode': None, 'ttl': None, 'address': None, 'error': 'timeout'})
+
+        # Wait for the next send slot, a reply or the oldest deadline
+        deadlines = []
+        if next_index < len(queries):
+            deadlines.append(start + next_index * interval)
+        if outstanding:
+            deadlines.append(min(sent for sent, _, _ in outstanding.values()) + timeout)
+        if not deadlines:
+            break
+        wait = max(0.0, min(deadlines) - time.perf_counter())
+
+        for _ in selector.select(wait):
+            while True:
+                try:
+                    data = sock.recv(4096)
+                except (BlockingIOError, InterruptedError):
+                    break
+                except OSError:
+                    # ICMP port unreachable surfaces here on connected sockets
+                    break
+                received = time.perf_counter()
+                try:
+                    response = parse_response(data)
+                except (struct.error, IndexError):
+                    continue
+                entry = outstanding.pop(response['id'], None)
+                if entry is None:
+                    continue
+                sent, category, name = entry
+                results.append({'category': category, 'name': name,
+                                'latency_ms': (received - sent) * 1000,
+                                'rcode': response['rcode'], 'ttl': response['ttl'],
+                                'address': response['address'], 'error': None})
+
+    selector.close()
+    sock.close()
+    return results
+
+# ==============================================
+# Reporting
+# ==============================================
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(results):
+    """
+    Aggregate results per category and overall
+
+    Cache behaviour is inferred two ways:
+    - cold vs warm: first lookup of a name vs repeat lookups
+    - ttl-decayed: repeats whose TTL is lower than the first answer,
+      which means the resolver served them from its cache
+    """
+    groups = {'all': results}
+    for r in results:
+        groups.setdefault(r['category'], []).append(r)
+
+    summary = {}
+    for category, items in groups.items():
+        latencies = sorted(r['latency_ms'] for r in items if r['latency_ms'] is not None)
+        timeouts = sum(1 for r in items if r['error'] == 'timeout')
+        errors = sum(1 for r in items if r['error'] and r['error'] != 'timeout')
+        rcodes = {}
+        for r in items:
+            if r['rcode'] is not None:
+                label = RCODE_NAMES.get(r['rcode'], str(r['rcode']))
+                rcodes[label] = rcodes.get(label, 0) + 1
+
+        first_ttl = {}
+        cold, warm = [], []
+        decayed = repeats = 0
+        for r in items:
+            if r['latency_ms'] is None:
+                continue
+            if r['name'] not in first_ttl:
+                first_ttl[r['name']] = r['ttl']
+                cold.append(r['latency_ms'])
+                continue
+            warm.append(r['latency_ms'])
+            repeats += 1
+            if r['ttl'] is not None and first_ttl[r['name']] is not None and r['ttl'] < first_ttl[r['name']]:
+                decayed += 1
+
+        cold.sort()
+        warm.sort()
+        blocked = sum(1 for r in items if r['address'] == '0.0.0.0')
+
+        summary[category] = {
+            'queries': len(items),
+            'answered': len(latencies),
+            'timeouts': timeouts,
+            'errors': errors,
+            'error_rate': (timeouts + errors) / len(items) if items else 0.0,
+            'rcodes': rcodes,
+            'blocked_answers': blocked,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'max_ms': latencies[-1] if latencies else None,
+            'cold_p50_ms': percentile(cold, 50),
+            'warm_p50_ms': percentile(warm, 50),
+            'repeats': repeats,
+            'ttl_decayed_repeats': decayed,
+        }
+    return summary
+
+def fmt_ms(value):
+    return f"{value:7.2f}" if value is not None else "      -"
+
+def print_report(server, port, qps, elapsed, summary):
+    """Print a human-readable report for one server"""
+    print("")
+    print(f"Resolver: {server}:{port}  (target {qps:g} qps, {elapsed:.1f}s)")
+    print(f"  {'category':<9} {'queries':>7} {'p50':>7} {'p95':>7} {'p99':>7} "
+          f"{'cold':>7} {'warm':>7} {'errors':>7}  rcodes")
+    order = ['local', 'popular', 'blocked', 'nxdomain', 'all']
+    for category in [c for c in order if c in summary]:
+        s = summary[category]
+        rcodes = ' '.join(f"{k}={v}" for k, v in sorted(s['rcodes'].items()))
+        print(f"  {category:<9} {s['queries']:>7} {fmt_ms(s['p50_ms'])} {fmt_ms(s['p95_ms'])} "
+              f"{fmt_ms(s['p99_ms'])} {fmt_ms(s['cold_p50_ms'])} {fmt_ms(s['warm_p50_ms'])} "
+              f"{s['error_rate'] * 100:6.1f}%  {rcodes}")
+
+    total = summary['all']
+    if total['repeats']:
+        print(f"  Cache: {total['ttl_decayed_repeats']}/{total['repeats']} repeat lookups "
+              f"served from cache (TTL decayed)")
+    if 'blocked' in summary:
+        s = summary['blocked']
+        print(f"  Blocking: {s['blocked_answers']}/{s['answered']} blocked queries answered 0.0.0.0")
+
+# ==============================================
+# Stub resolver (offline runs)
+# ==============================================
+
+class StubResolver(socketserver.ThreadingMixIn, socketserver.UDPServer):
+    """
+    Minimal Pi-hole stand-in
+
+    Local names answer immediately, blocked names answer 0.0.0.0, and
+    anything else pays a simulated upstream delay on a cache miss and
+    is then cached for its TTL (NXDOMAIN included).
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, local_records, miss_latency_ms=25.0, ttl=60):
+        super().__init__(address, StubHandler)
+        self.local_records = local_records
+        self.blocked = set(BLOCKED_NAMES)
+        self.miss_latency = miss_latency_ms / 1000.0
+        self.ttl = ttl
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def resolve(self, name):
+        """Return (rcode, address, ttl) for name"""
+        if name in self.local_records:
+            return 0, self.local_records[name], 0
+        if name in self.blocked:
+            return 0, '0.0.0.0', 2
+
+        now = time.monotonic()
+        with self.lock:
+            cached = self.cache.get(name)
+        if cached and cached[2] > now:
+            return cached[0], cached[1], int(cached[2] - now)
+
+        # Simulated upstream lookup
+        time.sleep(self.miss_latency)
+        if name.startswith('nx-'):
+            rcode, address = 3, None
+        else:
+            digest = zlib.crc32(name.encode())
+            rcode, address = 0, f"198.18.{(digest >> 8) & 0xFF}.{digest & 0xFF}"
+        with self.lock:
+            self.cache[name] = (rcode, address, time.monotonic() + self.ttl)
+        return rcode, address, self.ttl
+
+class StubHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        data, sock = self.request
+        try:
+            name, _ = read_name(data, 12)
+            rcode, address, ttl = self.server.resolve(name)
+            sock.sendto(build_response(data, rcode, address, ttl), self.client_address)
+        except (struct.error, IndexError, UnicodeDecodeError):
+            pass
+
+def start_stub_resolver(port, local_names, miss_latency_ms):
+    """Start the stub resolver on 127.0.0.1 in a background thread"""
+    records = {name: '172.20.0.2' for name in local_names}
+    server = StubResolver(('127.0.0.1', port), records, miss_latency_ms)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+# ==============================================
+# Main
+# ==============================================
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='LaunchLab DNS resolution benchmark')
+    parser.add_argument('--server', action='append',
+                        help=f'Resolver to test, repeat to compare paths (default: {DNS_SERVER})')
+    parser.add_argument('--port', type=int, default=DNS_PORT, help='Resolver port')
+    parser.add_argument('--qps', type=float, default=50.0, help='Target queries per second')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load per server')
+    parser.add_argument('--timeout', type=float, default=2.0, help='Per-query timeout in seconds')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Query mix weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--local-names', default=CUSTOM_LIST, help='Hosts file with local names')
+    parser.add_argument('--nxdomain-suffix', default=NXDOMAIN_SUFFIX, help='Parent domain for NXDOMAIN names')
+    parser.add_argument('--seed', type=int, help='Random seed for a repeatable query sequence')
+    parser.add_argument('--json', action='store_true', help='Print JSON summary instead of a table')
+    parser.add_argument('--offline', action='store_true', help='Benchmark the built-in stub resolver')
+    parser.add_argument('--serve', action='store_true', help='Only run the stub resolver')
+    parser.add_argument('--miss-latency', type=float, default=25.0,
+                        help='Stub resolver simulated upstream delay in ms')
+    return parser
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.qps <= 0:
+        parser.error('--qps must be greater than 0')
+    try:
+        weights = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(f"--mix: {e}")
+    if not weights:
+        parser.error('--mix needs at least one category with a positive weight')
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    local_names = load_local_names(args.local_names)
+
+    if args.serve:
+        port = args.port if args.port != 53 else 5353
+        server = start_stub_resolver(port, local_names, args.miss_latency)
+        log(f"Stub resolver listening on 127.0.0.1:{port} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+        return 0
+
+    stub = None
+    servers = args.server or [DNS_SERVER]
+    port = args.port
+    if args.offline:
+        stub = start_stub_resolver(0, local_names, args.miss_latency)
+        servers = ['127.0.0.1']
+        port = stub.server_address[1]
+        log(f"Offline mode: stub resolver on 127.0.0.1:{port}")
+
+    count = max(1, int(args.qps * args.duration))
+    queries = generate_queries(count, weights, local_names, args.nxdomain_suffix)
+
+    reports = {}
+    for server in servers:
+        log(f"Sending {count} queries to {server}:{port} at {args.qps:g} qps...")
+        start = time.perf_counter()
+        results = run_benchmark(server, port, queries, args.qps, args.timeout)
+        elapsed = time.perf_counter() - start
+        summary = summarize(results)
+        reports[server] = summary
+        if not args.json:
+            print_report(server, port, args.qps, elapsed, summary)
+
+    if stub:
+        stub.shutdown()
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    elif len(servers) > 1:
+        baseline = reports[servers[0]]['all']['p50_ms']
+        print("")
+        print(f"Path comparison (p50 vs {servers[0]}):")
+        for server in servers[1:]:
+            p50 = reports[server]['all']['p50_ms']
+            if baseline is not None and p50 is not None:
+                print(f"  {server}: {p50 - baseline:+.2f} ms")
+
+    failed = all(r['all']['answered'] == 0 for r in reports.values())
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        log("✗ Interrupted by user")
+        sys.exit(1)
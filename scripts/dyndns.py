@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+LaunchLab Dynamic DNS Updater
+Publishes the public IP to DuckDNS (or another provider) only when it changes
+
+Every DYNDNS_CHECK_INTERVAL seconds the public IPv4 is read from the first
+source in DYNDNS_IP_SOURCES that answers. Sources are URLs returning a page
+with the IP in it: a what's-my-IP service or the router's status page. The
+last published IP is cached in STATE_DIR, so restarts don't trigger updates.
+When the IP changes, the provider is updated. Failed updates are retried
+with exponential backoff. The updater then queries DYNDNS_DNS_SERVER until
+the name resolves to the new IP and logs the time to propagate.
+
+Providers:
+  duckdns   DUCKDNS_DOMAIN, DUCKDNS_TOKEN (DUCKDNS_URL to point at a stand-in)
+  dyndns2   DYNDNS2_URL, DYNDNS2_HOSTNAME, DYNDNS2_USER, DYNDNS2_PASSWORD
+            (No-IP, Dynu, many routers' "custom" option)
+
+Usage:
+  python3 scripts/dyndns.py           # run forever (container command)
+  python3 scripts/dyndns.py --once    # check and update once, then exit
+  python3 scripts/dyndns.py --once --force   # publish even if the cached IP matches
+"""
+
+import argparse
+import base64
+import ipaddress
+import json
+import os
+import random
+import re
+import signal
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timezone
+
+# Configuration
+PROVIDER = os.environ.get('DYNDNS_PROVIDER', 'duckdns')
+CHECK_INTERVAL = int(os.environ.get('DYNDNS_CHECK_INTERVAL', '60'))
+IP_SOURCES = [s.strip() for s in os.environ.get(
+    'DYNDNS_IP_SOURCES', 'https://api.ipify.org,https://ipv4.icanhazip.com,https://ifconfig.me/ip'
+).split(',') if s.strip()]
+REFRESH_HOURS = float(os.environ.get('DYNDNS_REFRESH_HOURS', '24'))  # re-publish even without change, 0 = never
+BACKOFF_MIN = int(os.environ.get('DYNDNS_BACKOFF_MIN', '30'))
+BACKOFF_MAX = int(os.environ.get('DYNDNS_BACKOFF_MAX', '1800'))
+DNS_SERVER = os.environ.get('DYNDNS_DNS_SERVER', '1.1.1.1')  # host[:port], empty = skip propagation check
+PROPAGATION_TIMEOUT = int(os.environ.get('DYNDNS_PROPAGATION_TIMEOUT', '600'))
+STATE_DIR = os.environ.get('STATE_DIR', '/state')
+
+RUNNING = True
+
+def log(msg):
+    print(f"[DynDNS] {msg}", flush=True)
+
+def stop(signum, frame):
+    global RUNNING
+    RUNNING = False
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+# ============================================
+# Providers
+# ============================================
+
+class UpdateError(Exception):
+    """Provider rejected or failed the update. fatal=True: retrying won't help."""
+
+    def __init__(self, msg, fatal=False):
+        super().__init__(msg)
+        self.fatal = fatal
+
+class Provider:
+    """
+    A dynamic DNS service. Subclasses set `name` and `hostname` and
+    implement update(ip), raising UpdateError on failure.
+    """
+
+    name = ''
+    hostname = ''
+
+    def update(self, ip):
+        raise NotImplementedError
+
+    def _get(self, url, headers=None):
+        req = urllib.request.Request(url, headers={'User-Agent': 'LaunchLab-DynDNS/1.0', **(headers or {})})
+        try:
+            with urllib.request.urlopen(req, timeout=15) as response:
+                return response.read().decode('utf-8', 'replace').strip()
+        except urllib.error.HTTPError as e:
+            raise UpdateError(f"HTTP {e.code} {e.reason}", fatal=e.code in (401, 403))
+        except (urllib.error.URLError, OSError) as e:
+            raise UpdateError(str(getattr(e, 'reason', e)))
+
+class DuckDNS(Provider):
+    name = 'duckdns'
+
+    def __init__(self):
+        self.domain = os.environ.get('DUCKDNS_DOMAIN', '')
+        self.token = os.environ.get('DUCKDNS_TOKEN', '')
+        self.url = os.environ.get('DUCKDNS_URL', 'https://www.duckdns.org').rstrip('/')
+        if not self.domain or not self.token:
+            raise ValueError('DUCKDNS_DOMAIN and DUCKDNS_TOKEN must be set')
+        # Accept "myhomelab" or "myhomelab.duckdns.org"
+        self.domain = self.domain.split('.duckdns.org')[0]
+        self.hostname = f"{self.domain}.duckdns.org"
+
+    def update(self, ip):
+        query = urllib.parse.urlencode({'domains': self.domain, 'token': self.token, 'ip': ip, 'verbose': 'true'})
+        body = self._get(f"{self.url}/update?{query}")
+        # verbose: "OK\n<ipv4>\n<ipv6>\nUPDATED|NOCHANGE", plain "KO" on bad token/domain
+        if body.splitlines()[:1] != ['OK']:
+            raise UpdateError(f"DuckDNS answered {body[:40]!r} (check DUCKDNS_DOMAIN/DUCKDNS_TOKEN)", fatal=True)
+
+class Dyndns2(Provider):
+    """The dyndns2 protocol (/nic/update) spoken by most other providers"""
+
+    name = 'dyndns2'
+
+    def __init__(self):
+        self.url = os.environ.get('DYNDNS2_URL', '').rstrip('/')
+        self.hostname = os.environ.get('DYNDNS2_HOSTNAME', '')
+        user = os.environ.get('DYNDNS2_USER', '')
+        password = os.environ.get('DYNDNS2_PASSWORD', '')
+        if not self.url or not self.hostname:
+            raise ValueError('DYNDNS2_URL and DYNDNS2_HOSTNAME must be set')
+        self.auth = 'Basic ' + base64.b64encode(f"{user}:{password}".encode()).decode()
+
+    def update(self, ip):
+        query = urllib.parse.urlencode({'hostname': self.hostname, 'myip': ip})
+        body = self._get(f"{self.url}/nic/update?{query}", {'Authorization': self.auth})
+        code = body.split(' ', 1)[0]
+        if code in ('good', 'nochg'):
+            return
+        # 911/dnserr are the provider's own trouble; everything else is our config
+        raise UpdateError(f"{self.name} answered {body[:40]!r}", fatal=code not in ('911', 'dnserr'))
+
+PROVIDERS = {cls.name: cls for cls in (DuckDNS, Dyndns2)}
+
+# ============================================
+# Public IP
+# ============================================
+
+IPV4 = re.compile(r'(?<![\d.])(\d{1,3}(?:\.\d{1,3}){3})(?![\d.])')
+
+def public_ip():
+    """First public IPv4 found by the first source that answers, or None"""
+    for source in IP_SOURCES:
+        try:
+            req = urllib.request.Request(source, headers={'User-Agent': 'LaunchLab-DynDNS/1.0'})
+            with urllib.request.urlopen(req, timeout=5) as response:
+                body = response.read(65536).decode('utf-8', 'replace')
+        except (urllib.error.URLError, OSError) as e:
+            log(f"⚠ IP source {source} failed: {getattr(e, 'reason', e)}")
+            continue
+        # Router status pages list LAN addresses too - take the first public one
+        for candidate in IPV4.findall(body):
+            try:
+                ip = ipaddress.IPv4Address(candidate)
+            except ValueError:
+                continue
+            if ip.is_global:
+                return str(ip)
+        log(f"⚠ IP source {source} returned no public IPv4")
+    return None
+
+# ============================================
+# Propagation check
+# ============================================
+
+def dns_query(name, server, timeout=3):
+    """A records for name from one DNS server (plain UDP, no recursion tricks)"""
+    host, _, port = server.partition(':')
+    query_id = random.randint(0, 0xffff)
+    packet = struct.pack('>HHHHHH', query_id, 0x0100, 1, 0, 0, 0)
+    packet += b''.join(bytes([len(label)]) + label.encode() for label in name.rstrip('.').split('.'))
+    packet += b'\x00' + struct.pack('>HH', 1, 1)  # type A, class IN
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        sock.sendto(packet, (host, int(port or 53)))
+        data = sock.recv(4096)
+
+    rid, flags, qdcount, ancount = struct.unpack('>HHHH', data[:8])
+    if rid != query_id or flags & 0x000f:
+        return []
+    offset = 12
+    for _ in range(qdcount):
+        while data[offset]:
+            offset += data[offset] + 1
+        offset += 5
+    addresses = []
+    for _ in range(ancount):
+        # Name: a compression pointer (2 bytes) or a label sequence
+        if data[offset] & 0xc0 == 0xc0:
+            offset += 2
+        else:
+            while data[offset]:
+                offset += data[offset] + 1
+            offset += 1
+        rtype, _, _, rdlength = struct.unpack('>HHIH', data[offset:offset + 10])
+        offset += 10
+        if rtype == 1 and rdlength == 4:
+            addresses.append(socket.inet_ntoa(data[offset:offset + 4]))
+        offset += rdlength
+    return addresses
+
+def wait_for_propagation(hostname, ip, detected, published, state):
+    """Poll DNS until hostname resolves to ip; log detect→publish→resolve times"""
+    deadline = time.monotonic() + PROPAGATION_TIMEOUT
+    while RUNNING and time.monotonic() < deadline:
+        try:
+            if ip in dns_query(hostname, DNS_SERVER):
+                resolved = time.monotonic()
+                log(f"✓ {hostname} → {ip} on {DNS_SERVER}: published {published - detected:.1f}s "
+                    f"after detection, resolvable {resolved - detected:.1f}s after detection")
+                state.record_propagation(ip, published - detected, resolved - detected)
+                return
+        except (OSError, struct.error, IndexError) as e:
+            log(f"⚠ DNS query to {DNS_SERVER} failed: {e}")
+        time.sleep(2)
+    if RUNNING:
+        log(f"⚠ {hostname} did not resolve to {ip} on {DNS_SERVER} within {PROPAGATION_TIMEOUT}s")
+        state.record_propagation(ip, published - detected, None)
+
+# ============================================
+# State
+# ============================================
+
+class State:
+    """Last published IP and counters in STATE_DIR/state.json, events in updates.jsonl
+
+    The propagation thread records into the same dict the main loop saves,
+    so self.data is only changed or serialized while holding self.lock.
+    """
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, 'state.json')
+        self.events = os.path.join(directory, 'updates.jsonl')
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self.path) as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+        self.data.setdefault('checks', 0)
+        self.data.setdefault('updates', 0)
+        self.data.setdefault('failures', 0)
+
+    @property
+    def ip(self):
+        return self.data.get('ip')
+
+    @property
+    def published_at(self):
+        return self.data.get('published_at_epoch', 0)
+
+    def save(self):
+        with self.lock:
+            self._write()
+
+    def _write(self):
+        """Caller holds self.lock"""
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def event(self, **fields):
+        with self.lock, open(self.events, 'a') as f:
+            f.write(json.dumps({'time': now_iso(), **fields}) + '\n')
+
+    def checked(self):
+        with self.lock:
+            self.data['checks'] += 1
+            self.data['last_check'] = now_iso()
+
+    def failed(self):
+        with self.lock:
+            self.data['failures'] += 1
+
+    def published(self, ip, provider):
+        with self.lock:
+            self.data.update(ip=ip, provider=provider, published_at=now_iso(), published_at_epoch=time.time())
+            self.data['updates'] += 1
+            self._write()
+
+    def record_propagation(self, ip, publish_s, resolve_s):
+        with self.lock:
+            self.data['last_propagation'] = {
+                'ip': ip,
+                'publish_seconds': round(publish_s, 2),
+                'resolve_seconds': round(resolve_s, 2) if resolve_s is not None else None,
+                'dns_server': DNS_SERVER,
+            }
+            self._write()
+        self.event(event='propagated', ip=ip, publish_seconds=round(publish_s, 2),
+                   resolve_seconds=round(resolve_s, 2) if resolve_s is not None else None)
+
+# ============================================
+# Main loop
+# ============================================
+
+def sleep(seconds):
+    deadline = time.monotonic() + seconds
+    while RUNNING and time.monotonic() < deadline:
+        time.sleep(min(1, deadline - time.monotonic()))
+
+def run(provider, state, once=False, force=False):
+    backoff = BACKOFF_MIN
+    retry_at = 0
+    detected = None  # monotonic time the current unpublished IP was first seen
+    last_seen = None
+
+    while RUNNING:
+        ip = public_ip()
+        state.checked()
+
+        if ip is None:
+            log("⚠ Could not determine public IP, keeping current record")
+        else:
+            if ip != last_seen:
+                previous = last_seen or state.ip
+                if previous != ip:
+                    log(f"ℹ Public IP changed: {previous} → {ip}" if previous else f"ℹ Public IP is {ip}")
+                last_seen = ip
+                detected = time.monotonic()
+                retry_at = 0
+                backoff = BACKOFF_MIN
+
+            stale = REFRESH_HOURS and time.time() - state.published_at > REFRESH_HOURS * 3600
+            if (ip != state.ip or stale or force) and time.monotonic() >= retry_at:
+                try:
+                    provider.update(ip)
+                except UpdateError as e:
+                    state.failed()
+                    state.event(event='failed', ip=ip, error=str(e))
+                    if once:
+                        log(f"✗ Update failed: {e}")
+                        state.save()
+                        return 1
+                    # Config errors won't fix themselves - retry slowly, but retry
+                    wait = BACKOFF_MAX if e.fatal else backoff
+                    wait = wait * random.uniform(0.8, 1.2)
+                    log(f"✗ Update failed: {e} - retrying in {wait:.0f}s")
+                    retry_at = time.monotonic() + wait
+                    backoff = min(backoff * 2, BACKOFF_MAX)
+                else:
+                    published = time.monotonic()
+                    changed = ip != state.ip
+                    state.published(ip, provider.name)
+                    state.event(event='updated' if changed else 'forced' if force else 'refreshed',
+                                ip=ip, provider=provider.name)
+                    backoff = BACKOFF_MIN
+                    if changed:
+                        log(f"✓ {provider.hostname} → {ip} ({provider.name})")
+                        if DNS_SERVER:
+                            threading.Thread(
+                                target=wait_for_propagation,
+                                args=(provider.hostname, ip, detected or published, published, state),
+                                daemon=True
+                            ).start()
+                    elif force:
+                        log(f"✓ Re-published {provider.hostname} → {ip} (forced)")
+                    else:
+                        log(f"✓ Refreshed {provider.hostname} → {ip} (no change for {REFRESH_HOURS:g}h)")
+                    force = False
+
+        state.save()
+        if once:
+            return 0 if ip else 1
+
+        # Wake early for a pending retry
+        wait = CHECK_INTERVAL
+        if retry_at:
+            wait = max(1, min(wait, retry_at - time.monotonic()))
+        sleep(wait)
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Change-detecting dynamic DNS updater')
+    parser.add_argument('--once', action='store_true', help='Check and update once, then exit')
+    parser.add_argument('--force', action='store_true', help='Publish even if the IP matches the cached one')
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    if PROVIDER not in PROVIDERS:
+        log(f"✗ Unknown DYNDNS_PROVIDER '{PROVIDER}' (available: {', '.join(PROVIDERS)})")
+        return 1
+    try:
+        provider = PROVIDERS[PROVIDER]()
+    except ValueError as e:
+        log(f"✗ {e}")
+        return 1
+
+    state = State(STATE_DIR)
+    log(f"Starting: {provider.hostname} via {provider.name}, checking every {CHECK_INTERVAL}s"
+        + (f", last published {state.ip}" if state.ip else ''))
+    code = run(provider, state, once=args.once, force=args.force)
+    if args.once:
+        # Let a propagation check started by this run finish
+        for thread in threading.enumerate():
+            if thread is not threading.current_thread() and thread.daemon:
+                thread.join()
+    else:
+        log("✓ Stopped")
+    return code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -94,6 +94,19 @@ check_container "pihole"
 check_container "wg-easy"
 check_container "duckdns"
 
+# Remote ML node (only with docker-compose.ml-remote.yml)
+if docker ps --format '{{.Names}}' | grep -q "^immich-ml-proxy$"; then
+    check_container "immich-ml-proxy"
+    ML_REMOTE=$(docker exec immich-ml-proxy printenv IMMICH_ML_REMOTE 2>/dev/null || true)
+    if docker exec immich-ml-proxy wget -q -T 5 -O /dev/null "http://$ML_REMOTE/ping" >/dev/null 2>&1; then
+        echo -e "  ${GREEN}✓${NC} Remote ML node ${BLUE}($ML_REMOTE)${NC}"
+        ((PASS_COUNT++))
+    else
+        echo -e "  ${YELLOW}⚠${NC} Remote ML node ${YELLOW}($ML_REMOTE unreachable, using local fallback)${NC}"
+        ((WARN_COUNT++))
+    fi
+fi
+
 echo ""
 
 # ==============================================
@@ -186,8 +199,31 @@ else
     ((WARN_COUNT++))
 fi
 
+# Resolver latency (informational, not counted)
+if command -v python3 >/dev/null 2>&1; then
+    DNS_LATENCY=$(python3 "$SCRIPT_DIR/dns-benchmark.py" --server 127.0.0.1 --duration 2 --qps 25 --timeout 1 --json 2>/dev/null \
+        | python3 -c 'import json,sys; s=json.load(sys.stdin)["127.0.0.1"]["all"]; print("p50 %.1fms / p99 %.1fms" % (s["p50_ms"], s["p99_ms"]))' 2>/dev/null || true)
+    if [ -n "$DNS_LATENCY" ]; then
+        echo -e "  ${BLUE}ℹ${NC} DNS latency: $DNS_LATENCY ${BLUE}(scripts/dns-benchmark.py for details)${NC}"
+    fi
+fi
+
 echo ""
 
+# ==============================================
+# Phase 5: Resource Usage (informational)
+# ==============================================
+
+if [ -f "$SCRIPT_DIR/../data/stats/containers.ring" ] && command -v python3 >/dev/null 2>&1; then
+    echo -e "${BOLD}Phase 5: Resource Usage (last hour)${NC}"
+    echo ""
+    python3 "$SCRIPT_DIR/container-stats.py" report --since 1h --top 3 --json 2>/dev/null \
+        | python3 -c 'import json,sys
+for r in json.load(sys.stdin): print("  %-22s cpu avg %5.1f%%  max %5.1f%%  mem max %6.0fMB" % (r["container"], r["cpu_avg"], r["cpu_max"], r["mem_max"] / 2**20))' 2>/dev/null || true
+    echo -e "  ${BLUE}ℹ${NC} ${BLUE}Full history: python3 scripts/container-stats.py report --since 24h${NC}"
+    echo ""
+fi
+
 # ==============================================
 # Summary
 # ==============================================
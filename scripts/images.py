@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+LaunchLab Image Manager
+Pre-pulls stack images in parallel and builds/loads offline image bundles
+
+Commands:
+  list     Show every image referenced by the compose files
+  pull     Pull all missing images concurrently with progress
+  export   Save all images into one bundle (shared layers stored once)
+  import   Load a bundle on a new machine (no network needed)
+  mirror   Push local images into a registry (seed a LAN/test mirror)
+
+Usage:
+  python3 scripts/images.py pull
+  python3 scripts/images.py export launchlab-images.tar.gz
+  python3 scripts/images.py import launchlab-images.tar.gz
+
+  # Pull through a local registry instead of Docker Hub / GHCR
+  python3 scripts/images.py pull --registry localhost:5000
+"""
+
+import argparse
+import gzip
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+DEFAULT_FILES = ['docker-compose.yml', 'docker-compose.init.yml']
+PULL_CONCURRENCY = int(os.environ.get('PULL_CONCURRENCY', '4'))
+PROGRESS_INTERVAL = 10  # seconds between "still pulling" lines
+
+def log(msg):
+    print(f"[Images] {msg}", flush=True)
+
+def docker(*args):
+    """Run a docker CLI command, returns CompletedProcess"""
+    return subprocess.run(['docker', *args], capture_output=True, text=True)
+
+# ==============================================
+# Image discovery
+# ==============================================
+
+def resolve_vars(value):
+    """Expand ${VAR:-default} / ${VAR} using the environment"""
+    def replace(match):
+        name, default = match.group(1), match.group(3) or ''
+        return os.environ.get(name) or default
+    return re.sub(r'\$\{(\w+)(:?-([^}]*))?\}', replace, value)
+
+def find_images(compose_files):
+    """
+    Collect image references from compose files, in first-seen order
+
+    Reads `image:` lines directly so images behind inactive profiles
+    (wireguard/tailscale) are included too.
+    """
+    images = []
+    for path in compose_files:
+        if not os.path.exists(path):
+            log(f"⚠ Compose file not found: {path}")
+            continue
+        with open(path) as f:
+            for line in f:
+                match = re.match(r'^\s*image:\s*["\']?([^"\'\s#]+)', line)
+                if match:
+                    image = resolve_vars(match.group(1))
+                    if image not in images:
+                        images.append(image)
+    return images
+
+def image_present(image):
+    return docker('image', 'inspect', image).returncode == 0
+
+def image_size(image):
+    result = docker('image', 'inspect', '--format', '{{.Size}}', image)
+    return int(result.stdout.strip()) if result.returncode == 0 else 0
+
+def format_size(num_bytes):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f}TB"
+
+# ==============================================
+# Registry mirror
+# ==============================================
+
+def split_reference(image):
+    """Split an image reference into (registry, repository:tag)"""
+    first, _, rest = image.partition('/')
+    if rest and ('.' in first or ':' in first or first == 'localhost'):
+        return first, rest
+    if not rest:
+        return 'docker.io', f"library/{image}"
+    return 'docker.io', image
+
+def mirror_reference(image, registry):
+    """Map an upstream reference onto a mirror registry"""
+    _, path = split_reference(image)
+    return f"{registry}/{path}"
+
+# ==============================================
+# Commands
+# ==============================================
+
+def pull_one(image, registry):
+    """Pull one image (via mirror if set), returns (ok, seconds, message)"""
+    start = time.time()
+    source = mirror_reference(image, registry) if registry else image
+    result = docker('pull', '--quiet', source)
+    if result.returncode != 0:
+        return False, time.time() - start, result.stderr.strip().splitlines()[-1:] or ['pull failed']
+    if registry:
+        tagged = docker('tag', source, image)
+        if tagged.returncode != 0:
+            return False, time.time() - start, [tagged.stderr.strip()]
+    return True, time.time() - start, []
+
+def cmd_pull(images, args):
+    """Pull missing images concurrently"""
+    todo = images if args.force else [i for i in images if not image_present(i)]
+    skipped = len(images) - len(todo)
+    if skipped:
+        log(f"ℹ {skipped}/{len(images)} images already present")
+    if not todo:
+        log("✓ All images present")
+        return 0
+
+    log(f"Pulling {len(todo)} images ({args.jobs} at a time)"
+        + (f" from {args.registry}" if args.registry else "") + "...")
+    started = time.time()
+    failed = []
+    done = 0
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(pull_one, image, args.registry): image for image in todo}
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in finished:
+                image = futures[future]
+                ok, seconds, message = future.result()
+                done += 1
+                if ok:
+                    log(f"[{done}/{len(todo)}] ✓ {image} ({seconds:.0f}s)")
+                else:
+                    failed.append(image)
+                    log(f"[{done}/{len(todo)}] ✗ {image}: {' '.join(message)}")
+            if pending and not finished:
+                log(f"… {len(todo) - done} still pulling ({time.time() - started:.0f}s elapsed)")
+
+    log(f"Pulled {len(todo) - len(failed)}/{len(todo)} images in {time.time() - started:.0f}s")
+    if failed:
+        log("✗ Failed: " + ', '.join(failed))
+        return 1
+    return 0
+
+def cmd_export(images, args):
+    """Save all images into one (optionally gzipped) tar bundle"""
+    missing = [i for i in images if not image_present(i)]
+    if missing:
+        log(f"✗ {len(missing)} images not present locally, run 'pull' first:")
+        for image in missing:
+            log(f"    {image}")
+        return 1
+
+    total = sum(image_size(i) for i in images)
+    log(f"Exporting {len(images)} images ({format_size(total)} unpacked) to {args.bundle}...")
+    started = time.time()
+    tmp_path = args.bundle + '.partial'
+
+    # docker save with several images writes each shared layer only once
+    proc = subprocess.Popen(['docker', 'save', *images], stdout=subprocess.PIPE)
+    if args.bundle.endswith('.gz'):
+        # Level 9 (the gzip default) is 2-3x slower than 6 for ~1% smaller bundles
+        out = gzip.open(tmp_path, 'wb', compresslevel=6)
+    else:
+        out = open(tmp_path, 'wb')
+    with out:
+        shutil.copyfileobj(proc.stdout, out, length=1024 * 1024)
+    if proc.wait() != 0:
+        os.unlink(tmp_path)
+        log("✗ docker save failed")
+        return 1
+    os.replace(tmp_path, args.bundle)
+
+    size = os.path.getsize(args.bundle)
+    log(f"✓ Bundle written: {args.bundle} ({format_size(size)}, {time.time() - started:.0f}s)")
+    log(f"  Sum of image sizes: {format_size(total)} - shared layers stored once")
+    return 0
+
+def cmd_import(images, args):
+    """Load a bundle and check every expected image is now present"""
+    if not os.path.exists(args.bundle):
+        log(f"✗ Bundle not found: {args.bundle}")
+        return 1
+
+    log(f"Loading {args.bundle}...")
+    started = time.time()
+    result = docker('load', '--input', args.bundle)
+    if result.returncode != 0:
+        log(f"✗ docker load failed: {result.stderr.strip()}")
+        return 1
+
+    loaded = [line.split(':', 1)[1].strip() for line in result.stdout.splitlines()
+              if line.startswith('Loaded image:')]
+    log(f"✓ Loaded {len(loaded)} images in {time.time() - started:.0f}s")
+
+    missing = [i for i in images if not image_present(i)]
+    if missing:
+        log(f"⚠ {len(missing)} images still missing (not in bundle):")
+        for image in missing:
+            log(f"    {image}")
+        return 1
+    log("✓ All compose images present")
+    return 0
+
+def cmd_mirror(images, args):
+    """Tag and push local images into a registry"""
+    if not args.registry:
+        log("✗ --registry is required for mirror")
+        return 1
+
+    failed = []
+    for image in images:
+        target = mirror_reference(image, args.registry)
+        if docker('tag', image, target).returncode != 0 or docker('push', '--quiet', target).returncode != 0:
+            failed.append(image)
+            log(f"✗ {image}")
+        else:
+            log(f"✓ {image} → {target}")
+    return 1 if failed else 0
+
+def cmd_list(images, args):
+    for image in images:
+        status = '✓' if image_present(image) else ' '
+        print(f"  [{status}] {image}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='LaunchLab image pre-pull and offline bundles')
+    parser.add_argument('command', choices=['list', 'pull', 'export', 'import', 'mirror'])
+    parser.add_argument('bundle', nargs='?', default='launchlab-images.tar.gz',
+                        help='Bundle path for export/import (.tar or .tar.gz)')
+    parser.add_argument('-f', '--file', action='append',
+                        help='Compose file to read (default: docker-compose.yml + docker-compose.init.yml)')
+    parser.add_argument('-j', '--jobs', type=int, default=PULL_CONCURRENCY, help='Concurrent pulls')
+    parser.add_argument('--registry', help='Pull from / push to this registry (e.g. localhost:5000)')
+    parser.add_argument('--force', action='store_true', help='Pull even if the image is present')
+    args = parser.parse_args()
+
+    if not shutil.which('docker'):
+        log("✗ docker not found")
+        return 1
+
+    files = args.file or [os.path.join(PROJECT_ROOT, f) for f in DEFAULT_FILES]
+    images = find_images(files)
+    if not images:
+        log("✗ No images found")
+        return 1
+
+    commands = {
+        'list': cmd_list,
+        'pull': cmd_pull,
+        'export': cmd_export,
+        'import': cmd_import,
+        'mirror': cmd_mirror,
+    }
+    return commands[args.command](images, args)
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        log("✗ Interrupted by user")
+        sys.exit(1)
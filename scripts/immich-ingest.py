@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Immich Bulk Photo Ingest
+Uploads an existing photo/video archive into Immich, resumably and without duplicates
+
+Steps:
+1. Walk the source tree and hash new/changed files (SHA-1) on a process pool
+2. Ask Immich which checksums it already has (/api/assets/bulk-upload-check),
+   one request per batch of files
+3. Upload only missing assets over persistent connections with bounded
+   concurrency
+4. Record every step in an on-disk journal, so an interrupted run resumes
+   where it stopped without re-hashing or re-uploading
+
+Usage:
+  IMMICH_API_KEY=... python3 scripts/immich-ingest.py /mnt/family-photos
+  python3 scripts/immich-ingest.py /mnt/family-photos --jobs 8 --dry-run
+
+Authentication: IMMICH_API_KEY, or ADMIN_EMAIL + ADMIN_PASSWORD (same
+defaults as init-immich.py).
+"""
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+# Configuration
+IMMICH_URL = os.environ.get('IMMICH_URL', 'http://localhost:2283')
+IMMICH_API_KEY = os.environ.get('IMMICH_API_KEY', '')
+ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@homelab.local')
+ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'changeme')
+DEVICE_ID = 'launchlab-ingest'
+
+# File types Immich accepts
+EXTENSIONS = {
+    # Images
+    '.jpg', '.jpeg', '.png', '.heic', '.heif', '.webp', '.gif', '.tif', '.tiff',
+    '.avif', '.bmp', '.jxl', '.dng', '.cr2', '.cr3', '.nef', '.arw', '.orf',
+    '.raf', '.rw2', '.srw', '.pef', '.raw', '.insp',
+    # Videos
+    '.mp4', '.mov', '.m4v', '.3gp', '.avi', '.mkv', '.webm', '.mts', '.m2ts',
+    '.mpg', '.mpeg', '.wmv', '.flv', '.insv',
+}
+
+CHECK_BATCH = 5000  # checksums per bulk-upload-check call
+PROGRESS_INTERVAL = 10  # seconds
+MAX_RETRIES = 3
+
+def log(msg):
+    print(f"[Immich Ingest] {msg}", flush=True)
+
+# ==============================================
+# Journal
+# ==============================================
+
+class Journal:
+    """
+    Append-only JSON-lines progress journal
+
+    Record types:
+      {"t": "hash", "path", "size", "mtime", "sha1"}
+      {"t": "done", "path", "sha1", "status", "asset_id"}
+      {"t": "failed", "path", "error"}   (informational, retried next run)
+
+    The latest record for a path wins. A file whose size or mtime changed
+    since it was hashed is hashed again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hashes = {}  # path -> (size, mtime, sha1)
+        self.done = {}  # path -> status
+        self.lock = threading.Lock()
+        self._load()
+        self.file = open(path, 'a')
+        self.pending = 0
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn last line after a crash
+                if record.get('t') == 'hash':
+                    self.hashes[record['path']] = (record['size'], record['mtime'], record['sha1'])
+                elif record.get('t') == 'done':
+                    self.done[record['path']] = record['status']
+
+    def cached_hash(self, path, size, mtime):
+        entry = self.hashes.get(path)
+        if entry and entry[0] == size and entry[1] == mtime:
+            return entry[2]
+        return None
+
+    def record(self, **record):
+        with self.lock:
+            self.file.write(json.dumps(record) + '\n')
+            self.pending += 1
+            if self.pending >= 100:
+                self.flush()
+
+    def flush(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.file.close()
+
+# ==============================================
+# Scanning and hashing
+# ==============================================
+
+def scan(root):
+    """Yield (path, size, mtime) for every supported file under root"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for name in filenames:
+            if name.startswith('.') or os.path.splitext(name)[1].lower() not in EXTENSIONS:
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            yield path, st.st_size, int(st.st_mtime)
+
+def sha1_file(path):
+    """(path, SHA-1 hex digest, None), or (path, None, error) if unreadable (runs in a worker process)"""
+    digest = hashlib.sha1()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except OSError as e:
+        return path, None, str(e)
+    return path, digest.hexdigest(), None
+
+# ==============================================
+# Immich API
+# ==============================================
+
+class ImmichClient:
+    """Immich API client with one persistent HTTP connection per thread"""
+
+    def __init__(self, base_url):
+        parsed = urllib.parse.urlparse(base_url)
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.prefix = parsed.path.rstrip('/')
+        self.headers = {}
+        self.local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            conn = cls(self.host, self.port, timeout=300)
+            self.local.conn = conn
+        return conn
+
+    def _reset(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn:
+            conn.close()
+        self.local.conn = None
+
+    def request(self, method, endpoint, body=None, headers=None):
+        """Send a request, retrying on connection errors and 5xx, returns (status, data)"""
+        all_headers = dict(self.headers)
+        all_headers.update(headers or {})
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+            all_headers['Content-Type'] = 'application/json'
+
+        for attempt in range(MAX_RETRIES):
+            try:
+                conn = self._connection()
+                conn.request(method, self.prefix + endpoint, body=body() if callable(body) else body,
+                             headers=all_headers)
+                response = conn.getresponse()
+                data = response.read()
+                if response.status >= 500 and attempt < MAX_RETRIES - 1:
+                    time.sleep(2 ** attempt)
+                    continue
+                try:
+                    return response.status, json.loads(data) if data else None
+                except ValueError:
+                    return response.status, data.decode('utf-8', 'replace')
+            except (OSError, http.client.HTTPException):
+                self._reset()
+                if attempt == MAX_RETRIES - 1:
+                    raise
+                time.sleep(2 ** attempt)
+
+    def ping(self):
+        try:
+            status, data = self.request('GET', '/api/server-info/ping')
+            return status == 200 and data.get('res') == 'pong'
+        except Exception:
+            return False
+
+    def authenticate(self):
+        """Use API key if set, otherwise log in with admin credentials"""
+        if IMMICH_API_KEY:
+            self.headers['x-api-key'] = IMMICH_API_KEY
+            return True
+        status, data = self.request('POST', '/api/auth/login',
+                                    {'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD})
+        if status in (200, 201) and data and data.get('accessToken'):
+            self.headers['Authorization'] = f"Bearer {data['accessToken']}"
+            return True
+        return False
+
+    def bulk_check(self, items):
+        """
+        Ask Immich which checksums it already has
+
+        Args:
+            items: list of (id, sha1_hex)
+
+        Returns:
+            Set of ids Immich would accept (i.e. not duplicates)
+        """
+        status, data = self.request('POST', '/api/assets/bulk-upload-check',
+                                    {'assets': [{'id': i, 'checksum': c} for i, c in items]})
+        if status != 200:
+            raise RuntimeError(f"bulk-upload-check failed: HTTP {status}")
+        return {r['id'] for r in data.get('results', []) if r.get('action') == 'accept'}
+
+    def upload(self, path, size, mtime, sha1):
+        """Stream one file as multipart/form-data, returns (status, asset_id)"""
+        boundary = uuid.uuid4().hex
+        name = os.path.basename(path)
+        timestamp = datetime.fromtimestamp(mtime, timezone.utc).isoformat()
+        fields = {
+            'deviceAssetId': f"{name}-{size}".replace(' ', ''),
+            'deviceId': DEVICE_ID,
+            'fileCreatedAt': timestamp,
+            'fileModifiedAt': timestamp,
+            'isFavorite': 'false',
+        }
+
+        preamble = b''
+        for key, value in fields.items():
+            preamble += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{key}\"\r\n\r\n"
+                         f"{value}\r\n").encode('utf-8')
+        preamble += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"assetData\"; "
+                     f"filename=\"{name}\"\r\nContent-Type: application/octet-stream\r\n\r\n").encode('utf-8')
+        epilogue = f"\r\n--{boundary}--\r\n".encode('utf-8')
+
+        def body():
+            # Fresh generator per attempt, so retries re-read the file
+            yield preamble
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    yield chunk
+            yield epilogue
+
+        headers = {
+            'Content-Type': f"multipart/form-data; boundary={boundary}",
+            'Content-Length': str(len(preamble) + size + len(epilogue)),
+            'x-immich-checksum': sha1,
+        }
+        status, data = self.request('POST', '/api/assets', body, headers)
+        if status not in (200, 201):
+            raise RuntimeError(f"HTTP {status}: {data}")
+        return data.get('status', 'created'), data.get('id')
+
+# ==============================================
+# Main
+# ==============================================
+
+class Progress:
+    """Thread-safe throughput counters"""
+
+    def __init__(self, total_files, total_bytes):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.files = 0
+        self.bytes = 0
+        self.failed = 0
+        self.started = time.time()
+        self.last_report = self.started
+        self.lock = threading.Lock()
+
+    def add(self, size, ok=True):
+        with self.lock:
+            if ok:
+                self.files += 1
+                self.bytes += size
+            else:
+                self.failed += 1
+            if time.time() - self.last_report >= PROGRESS_INTERVAL:
+                self.last_report = time.time()
+                log(self.line())
+
+    def line(self):
+        elapsed = max(time.time() - self.started, 0.001)
+        return (f"{self.files}/{self.total_files} files, "
+                f"{self.bytes / 1e6:.0f}/{self.total_bytes / 1e6:.0f} MB, "
+                f"{self.files / elapsed:.1f} files/s, {self.bytes / 1e6 / elapsed:.1f} MB/s"
+                + (f", {self.failed} failed" if self.failed else ""))
+
+def hash_files(files, journal, jobs):
+    """
+    Return {path: sha1}, hashing only files not already in the journal
+
+    Unreadable files (deleted, permissions, I/O errors) are logged,
+    journaled as failed and left out of the result.
+    """
+    hashes, todo = {}, []
+    for path, size, mtime in files:
+        cached = journal.cached_hash(path, size, mtime)
+        if cached:
+            hashes[path] = cached
+        else:
+            todo.append((path, size, mtime))
+
+    if todo:
+        log(f"Hashing {len(todo)} files on {jobs} processes ({len(hashes)} cached)...")
+        meta = {path: (size, mtime) for path, size, mtime in todo}
+        progress = Progress(len(todo), sum(size for _, size, _ in todo))
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for path, sha1, error in pool.map(sha1_file, [p for p, _, _ in todo], chunksize=16):
+                size, mtime = meta[path]
+                if error:
+                    log(f"✗ {path}: {error}")
+                    journal.record(t='failed', path=path, error=error)
+                    progress.add(size, ok=False)
+                    continue
+                hashes[path] = sha1
+                journal.record(t='hash', path=path, size=size, mtime=mtime, sha1=sha1)
+                progress.add(size)
+        journal.flush()
+        log(f"✓ Hashed: {progress.line()}")
+    return hashes
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk ingest a photo archive into Immich')
+    parser.add_argument('source', help='Directory tree to ingest')
+    parser.add_argument('--url', default=IMMICH_URL, help=f'Immich URL (default: {IMMICH_URL})')
+    parser.add_argument('--journal', help='Progress journal (default: <source>/.launchlab-ingest.jsonl)')
+    parser.add_argument('--jobs', type=int, default=4, help='Concurrent uploads')
+    parser.add_argument('--hash-jobs', type=int, default=os.cpu_count() or 2, help='Hashing processes')
+    parser.add_argument('--dry-run', action='store_true', help='Hash and check only, upload nothing')
+    args = parser.parse_args()
+
+    source = os.path.abspath(args.source)
+    if not os.path.isdir(source):
+        log(f"✗ Not a directory: {source}")
+        sys.exit(1)
+
+    journal_path = args.journal or os.path.join(source, '.launchlab-ingest.jsonl')
+    journal = Journal(journal_path)
+    log(f"Journal: {journal_path} ({len(journal.done)} files already ingested)")
+
+    client = ImmichClient(args.url)
+    if not client.ping():
+        log(f"✗ Immich not reachable at {args.url}")
+        sys.exit(1)
+    if not client.authenticate():
+        log("✗ Authentication failed (set IMMICH_API_KEY or ADMIN_EMAIL/ADMIN_PASSWORD)")
+        sys.exit(1)
+    log("✓ Authenticated")
+
+    # 1. Scan
+    files = [f for f in scan(source) if f[0] not in journal.done]
+    log(f"Found {len(files)} files to process")
+    if not files:
+        log("✓ Nothing to do")
+        journal.close()
+        return
+
+    # 2. Hash
+    hashes = hash_files(files, journal, args.hash_jobs)
+    hash_failed = len(files) - len(hashes)
+    files = [f for f in files if f[0] in hashes]
+
+    # 3. Bulk duplicate check (also collapses duplicates inside the archive)
+    first_path = {}
+    for path, _, _ in files:
+        first_path.setdefault(hashes[path], path)
+    unique = [(path, sha1) for sha1, path in first_path.items()]
+    log(f"Checking {len(unique)} unique checksums against Immich...")
+
+    accepted = set()
+    for i in range(0, len(unique), CHECK_BATCH):
+        accepted |= client.bulk_check(unique[i:i + CHECK_BATCH])
+
+    meta = {path: (size, mtime) for path, size, mtime in files}
+    for path, _, _ in files:
+        sha1 = hashes[path]
+        if first_path[sha1] not in accepted or first_path[sha1] != path:
+            journal.record(t='done', path=path, sha1=sha1, status='duplicate', asset_id=None)
+    journal.flush()
+
+    to_upload = [(path, *meta[path], hashes[path]) for path in accepted]
+    log(f"✓ {len(files) - len(to_upload)} duplicates skipped (in Immich or repeated in archive), "
+        f"{len(to_upload)} to upload")
+
+    if args.dry_run or not to_upload:
+        journal.close()
+        if hash_failed:
+            log(f"ℹ {hash_failed} unreadable files skipped, re-run the same command to retry them")
+            sys.exit(1)
+        return
+
+    # 4. Upload
+    progress = Progress(len(to_upload), sum(item[1] for item in to_upload))
+    log(f"Uploading {len(to_upload)} files with {args.jobs} connections...")
+
+    def upload(item):
+        path, size, mtime, sha1 = item
+        status, asset_id = client.upload(path, size, mtime, sha1)
+        journal.record(t='done', path=path, sha1=sha1, status=status, asset_id=asset_id)
+        return size
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(upload, item): item for item in to_upload}
+        for future in as_completed(futures):
+            path, size = futures[future][0], futures[future][1]
+            try:
+                future.result()
+                progress.add(size)
+            except Exception as e:
+                progress.add(size, ok=False)
+                journal.record(t='failed', path=path, error=str(e))
+                log(f"✗ {path}: {e}")
+
+    journal.close()
+    log(f"✓ Upload complete: {progress.line()}"
+        + (f", {hash_failed} unreadable skipped" if hash_failed else ""))
+    if progress.failed or hash_failed:
+        log("ℹ Re-run the same command to retry failed files")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        log("✗ Interrupted - progress is saved, re-run to resume")
+        sys.exit(1)
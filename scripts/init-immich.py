@@ -2,13 +2,22 @@
 """
 Immich Admin User Initialization Script
 Creates default admin user via API: admin@homelab.local / changeme
+
+Also pre-seeds the ML model cache from a local bundle (no downloads) and
+warms the models up once immich-ml answers, so the first search or upload
+after a restart doesn't wait for model load.
 """
 
 import os
 import time
 import json
+import shutil
+import struct
+import tarfile
+import zlib
 import urllib.request
 import urllib.error
+import uuid
 import sys
 
 # Configuration
@@ -17,6 +26,16 @@ ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@homelab.local')
 ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'changeme')
 ADMIN_NAME = 'Admin'
 
+ML_URL = os.environ.get('IMMICH_ML_URL', 'http://immich-ml:3003')
+ML_CACHE = os.environ.get('ML_CACHE_DIR', '/cache')
+ML_BUNDLE = os.environ.get('ML_BUNDLE_DIR', '/bundle')
+ML_WARMUP = os.environ.get('ML_WARMUP', 'true').lower() == 'true'
+ML_WARMUP_ROUNDS = int(os.environ.get('ML_WARMUP_ROUNDS', '3'))
+ML_WAIT = int(os.environ.get('ML_WAIT', '300'))
+# Used when the server config can't be read (e.g. admin password changed)
+CLIP_MODEL = os.environ.get('ML_CLIP_MODEL', 'ViT-B-32__openai')
+FACE_MODEL = os.environ.get('ML_FACE_MODEL', 'buffalo_l')
+
 def log(msg):
     print(f"[Immich Init] {msg}", flush=True)
 
@@ -39,6 +58,22 @@ def wait_for_immich(max_wait=120):
     log("✗ Immich API timeout after 120s")
     return False
 
+def wait_for_ml(max_wait=ML_WAIT):
+    """Wait for immich-ml to answer /ping"""
+    log(f"Waiting for machine learning at {ML_URL}...")
+    for i in range(max_wait):
+        try:
+            with urllib.request.urlopen(f"{ML_URL}/ping", timeout=5) as response:
+                if response.status == 200 and b'pong' in response.read():
+                    log(f"✓ Machine learning ready (waited {i+1}s)")
+                    return True
+        except Exception:
+            pass
+        time.sleep(1)
+
+    log(f"⚠ Machine learning not ready after {max_wait}s")
+    return False
+
 def check_admin_exists():
     """Check if any admin user already exists"""
     try:
@@ -89,21 +124,265 @@ def create_admin():
         log(f"✗ Failed to create admin: {str(e)}")
         return False
 
+# ============================================
+# ML model pre-seed
+# ============================================
+
+def model_dirs(root):
+    """Yield <task>/<model> directories (e.g. clip/ViT-B-32__openai) under root"""
+    if not os.path.isdir(root):
+        return
+    for task in sorted(os.listdir(root)):
+        task_dir = os.path.join(root, task)
+        if task.startswith('.') or not os.path.isdir(task_dir):
+            continue
+        for model in sorted(os.listdir(task_dir)):
+            if os.path.isdir(os.path.join(task_dir, model)):
+                yield os.path.join(task, model)
+
+def model_parts(root, model):
+    """Entries of a model directory (textual/, visual/, config.json, ...)"""
+    return [os.path.join(model, name) for name in sorted(os.listdir(os.path.join(root, model)))]
+
+def safe_members(tar, dest):
+    """Tar members that stay inside dest (no absolute paths, .., or links out)"""
+    dest = os.path.realpath(dest)
+    for member in tar.getmembers():
+        target = os.path.realpath(os.path.join(dest, member.name))
+        if not (target == dest or target.startswith(dest + os.sep)):
+            log(f"⚠ Skipping unsafe path in bundle: {member.name}")
+            continue
+        if member.issym() or member.islnk() or member.isdev():
+            continue
+        yield member
+
+def model_part(name):
+    """'./clip/M/visual/model.onnx' -> 'clip/M/visual' (<task>/<model>/<part>), None above that"""
+    parts = os.path.normpath(name).split(os.sep)
+    return os.path.join(*parts[:3]) if len(parts) >= 3 else None
+
+def missing(part):
+    return not os.path.exists(os.path.join(ML_CACHE, part))
+
+def load_bundle_index():
+    """{tarball name: [size, mtime_ns, parts]} of tarballs already read"""
+    try:
+        with open(os.path.join(ML_CACHE, '.bundle-index.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_bundle_index(index):
+    try:
+        with open(os.path.join(ML_CACHE, '.bundle-index.json'), 'w') as f:
+            json.dump(index, f)
+    except OSError as e:
+        log(f"⚠ Could not save bundle index: {e}")
+
+def seed_models():
+    """
+    Copy models from the bundle into the cache volume.
+
+    The bundle (data/immich/model-bundle) holds either tarballs or plain
+    directories laid out like the cache: <task>/<model>/... . Only parts
+    missing from the cache are unpacked or copied, and a tarball whose
+    parts are all cached isn't opened again, so re-runs are cheap. Parts
+    are unpacked into a staging directory on the cache volume and renamed
+    into place, so immich-ml never loads a half-written model.
+    """
+    if not os.path.isdir(ML_BUNDLE) or not os.listdir(ML_BUNDLE):
+        log("ℹ No model bundle, models will be downloaded on first use")
+        return
+
+    staging = os.path.join(ML_CACHE, '.seed')
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    start = time.monotonic()
+    seeded = []
+
+    index = load_bundle_index()
+    try:
+        for name in sorted(os.listdir(ML_BUNDLE)):
+            path = os.path.join(ML_BUNDLE, name)
+            if name.endswith(('.tar', '.tar.gz', '.tgz')):
+                st = os.stat(path)
+                known = index.get(name)
+                if known and known[:2] == [st.st_size, st.st_mtime_ns] and not any(map(missing, known[2])):
+                    continue
+                try:
+                    with tarfile.open(path) as tar:
+                        members = list(safe_members(tar, staging))
+                        parts = sorted({p for p in map(model_part, (m.name for m in members)) if p})
+                        wanted = [m for m in members if model_part(m.name) and missing(model_part(m.name))]
+                        if wanted:
+                            tar.extractall(staging, members=wanted)
+                    index[name] = [st.st_size, st.st_mtime_ns, parts]
+                except (tarfile.TarError, OSError) as e:
+                    log(f"✗ Failed to unpack {name}: {e}")
+            elif os.path.isdir(path) and not name.startswith('.'):
+                # A task directory (clip/, facial-recognition/): copy missing parts only
+                for model in model_dirs(ML_BUNDLE):
+                    if not model.startswith(name + os.sep):
+                        continue
+                    for part in model_parts(ML_BUNDLE, model):
+                        if not missing(part):
+                            continue
+                        source, target = os.path.join(ML_BUNDLE, part), os.path.join(staging, part)
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                        if os.path.isdir(source):
+                            shutil.copytree(source, target)
+                        else:
+                            shutil.copy2(source, target)
+
+        # Per part rather than per model: a search before the first upload
+        # leaves clip/<model>/textual in the cache without visual/
+        for model in model_dirs(staging):
+            copied = False
+            for part in model_parts(staging, model):
+                dest = os.path.join(ML_CACHE, part)
+                if os.path.exists(dest):
+                    continue
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                os.rename(os.path.join(staging, part), dest)
+                copied = True
+            if copied:
+                seeded.append(model)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    save_bundle_index(index)
+
+    present = list(model_dirs(ML_CACHE))
+    if seeded:
+        log(f"✓ Seeded {len(seeded)} model(s) in {time.monotonic() - start:.1f}s: {', '.join(seeded)}")
+    else:
+        log(f"ℹ Model cache already has {len(present)} model(s), nothing to seed")
+
+# ============================================
+# ML warm-up
+# ============================================
+
+def get_model_names():
+    """CLIP and face model names from the server config, env defaults otherwise"""
+    clip, face = CLIP_MODEL, FACE_MODEL
+    try:
+        req = urllib.request.Request(
+            f"{IMMICH_URL}/api/auth/login",
+            data=json.dumps({"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD}).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(req, timeout=10) as response:
+            token = json.loads(response.read().decode('utf-8'))['accessToken']
+
+        req = urllib.request.Request(
+            f"{IMMICH_URL}/api/system-config",
+            headers={'Authorization': f'Bearer {token}'}
+        )
+        with urllib.request.urlopen(req, timeout=10) as response:
+            ml = json.loads(response.read().decode('utf-8')).get('machineLearning', {})
+        clip = ml.get('clip', {}).get('modelName') or clip
+        face = ml.get('facialRecognition', {}).get('modelName') or face
+    except Exception as e:
+        log(f"ℹ Using default model names ({e})")
+    return clip, face
+
+def test_image(size=64):
+    """Small grey PNG built by hand (the image has no Pillow)"""
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xffffffff)
+
+    rows = b''.join(b'\x00' + bytes([128, 128, 128]) * size for _ in range(size))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows))
+            + chunk(b'IEND', b''))
+
+def predict(entries, text=None, image=None):
+    """POST /predict (multipart, as immich-server sends it), return seconds taken"""
+    boundary = uuid.uuid4().hex
+    parts = [(b'entries', None, json.dumps(entries).encode('utf-8'))]
+    if text is not None:
+        parts.append((b'text', None, text.encode('utf-8')))
+    if image is not None:
+        parts.append((b'image', b'warmup.png', image))
+
+    body = b''
+    for name, filename, data in parts:
+        body += b'--' + boundary.encode() + b'\r\n'
+        body += b'Content-Disposition: form-data; name="' + name + b'"'
+        if filename:
+            body += b'; filename="' + filename + b'"\r\nContent-Type: image/png'
+        body += b'\r\n\r\n' + data + b'\r\n'
+    body += b'--' + boundary.encode() + b'--\r\n'
+
+    req = urllib.request.Request(
+        f"{ML_URL}/predict",
+        data=body,
+        headers={'Content-Type': f'multipart/form-data; boundary={boundary}'},
+        method='POST'
+    )
+    start = time.monotonic()
+    with urllib.request.urlopen(req, timeout=ML_WAIT) as response:
+        response.read()
+    return time.monotonic() - start
+
+def warm_up():
+    """Load each model with one request, then time a few warm requests"""
+    clip, face = get_model_names()
+    image = test_image()
+    jobs = [
+        (f"CLIP text ({clip})",
+         {"clip": {"textual": {"modelName": clip}}}, {'text': 'a photo of a dog'}),
+        (f"CLIP image ({clip})",
+         {"clip": {"visual": {"modelName": clip}}}, {'image': image}),
+        (f"Faces ({face})",
+         {"facial-recognition": {"detection": {"modelName": face, "options": {"minScore": 0.7}},
+                                 "recognition": {"modelName": face}}}, {'image': image}),
+    ]
+
+    ok = True
+    for label, entries, inputs in jobs:
+        try:
+            cold = predict(entries, **inputs)
+            warm = sorted(predict(entries, **inputs) for _ in range(max(ML_WARMUP_ROUNDS, 1)))
+            median = warm[len(warm) // 2]
+            log(f"✓ {label}: cold {cold * 1000:.0f}ms, warm {median * 1000:.0f}ms")
+        except urllib.error.HTTPError as e:
+            log(f"⚠ {label}: HTTP {e.code} {e.read().decode('utf-8', 'replace')[:200]}")
+            ok = False
+        except Exception as e:
+            log(f"⚠ {label}: {e}")
+            ok = False
+    return ok
+
 def main():
     log("Starting Immich admin initialization...")
 
+    # Seed the model cache before anything asks immich-ml for a model
+    try:
+        seed_models()
+    except OSError as e:
+        log(f"⚠ Model pre-seed failed: {e}")
+
     # Wait for Immich to be ready
     if not wait_for_immich():
         log("✗ Immich API not ready, exiting")
         sys.exit(1)
 
     # Create admin user
-    if create_admin():
-        log("✓ Initialization complete")
-        sys.exit(0)
-    else:
+    if not create_admin():
         log("✗ Initialization failed")
         sys.exit(1)
 
+    # Warm-up problems are reported but don't fail the init - Immich works
+    # without it, the first request is just slower
+    if ML_WARMUP and wait_for_ml():
+        if warm_up():
+            log("✓ Models loaded")
+
+    log("✓ Initialization complete")
+    sys.exit(0)
+
 if __name__ == "__main__":
     main()
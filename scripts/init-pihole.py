@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Pi-hole DNS Initialization Script
+Bulk-loads local DNS records and resolver cache settings into dnsmasq
+
+This script:
+1. Collects every local hostname from the service registry
+   (config/pihole/custom.list + nginx server_name entries)
+2. Writes them as host-records in a single dnsmasq config file
+3. Enables optimistic (stale-while-refresh) caching
+4. Configures conditional forwarding to the LAN router (optional)
+
+Runs before Pi-hole starts. The file is only rewritten when its
+content changes, so re-running is safe.
+"""
+
+import os
+import re
+import sys
+import tempfile
+
+# Configuration from environment
+DNSMASQ_DIR = os.environ.get('DNSMASQ_DIR', '/etc/dnsmasq.d')
+CUSTOM_LIST = os.environ.get('CUSTOM_LIST', '/config/custom.list')
+NGINX_CONF = os.environ.get('NGINX_CONF', '/config/nginx.conf')
+NGINX_IP = os.environ.get('NGINX_IP', '172.20.0.2')
+HOMELAB_DOMAIN = os.environ.get('HOMELAB_DOMAIN', 'homelab.local')
+HOMELAB_IP = os.environ.get('HOMELAB_IP', '172.20.0.1')  # Docker gateway
+LOCAL_TTL = int(os.environ.get('LOCAL_TTL', '300'))
+CACHE_SIZE = int(os.environ.get('CACHE_SIZE', '10000'))
+OPTIMISTIC_CACHE = os.environ.get('OPTIMISTIC_CACHE', 'true').lower() == 'true'
+MIN_CACHE_TTL = int(os.environ.get('MIN_CACHE_TTL', '0'))
+
+# Conditional forwarding (leave REV_SERVER_TARGET empty to disable)
+REV_SERVER_CIDR = os.environ.get('REV_SERVER_CIDR', '')
+REV_SERVER_TARGET = os.environ.get('REV_SERVER_TARGET', '')
+REV_SERVER_DOMAIN = os.environ.get('REV_SERVER_DOMAIN', '')
+
+# Output file (loaded after 01-pihole.conf and 02-homelab.conf)
+OUTPUT_FILE = '05-launchlab-local.conf'
+
+def log(msg):
+    print(f"[Pi-hole Init] {msg}", flush=True)
+
+def read_custom_list(path):
+    """Read 'IP hostname' records from a hosts-style file"""
+    records = []
+    if not os.path.exists(path):
+        log(f"⚠ Registry file not found: {path}")
+        return records
+
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            ip, names = parts[0], parts[1:]
+            for name in names:
+                records.append((name.lower(), ip))
+    return records
+
+def read_nginx_hostnames(path):
+    """Read every server_name served by the reverse proxy"""
+    if not os.path.exists(path):
+        log(f"⚠ Nginx config not found: {path}")
+        return []
+
+    with open(path) as f:
+        content = f.read()
+
+    hostnames = []
+    for match in re.finditer(r'^\s*server_name\s+([^;]+);', content, re.MULTILINE):
+        for name in match.group(1).split():
+            if name != '_' and name.lower() not in hostnames:
+                hostnames.append(name.lower())
+    return hostnames
+
+def build_records():
+    """
+    Merge all registry sources into one ordered hostname -> IP map
+
+    custom.list wins on conflicts; nginx hostnames missing from it are
+    pointed at the reverse proxy so a new server block is never left
+    unresolvable.
+    """
+    records = {HOMELAB_DOMAIN: HOMELAB_IP}
+
+    for name, ip in read_custom_list(CUSTOM_LIST):
+        records.setdefault(name, ip)
+
+    for name in read_nginx_hostnames(NGINX_CONF):
+        if name not in records:
+            log(f"⚠ {name} served by nginx but missing from custom.list, using {NGINX_IP}")
+            records[name] = NGINX_IP
+
+    return records
+
+def render_config(records):
+    """Render the dnsmasq config file content"""
+    lines = [
+        "# Generated by scripts/init-pihole.py - do not edit",
+        "# Edit config/pihole/custom.list and re-run pihole-init instead",
+        "",
+        "# Local records (answered from cache, never forwarded)",
+    ]
+    for name, ip in records.items():
+        lines.append(f"host-record={name},{ip},{LOCAL_TTL}")
+
+    lines.append("")
+    lines.append("# Resolver cache")
+    if OPTIMISTIC_CACHE:
+        # Serve expired entries immediately and refresh them in the background
+        lines.append("use-stale-cache")
+    if MIN_CACHE_TTL > 0:
+        lines.append(f"min-cache-ttl={MIN_CACHE_TTL}")
+
+    if REV_SERVER_CIDR and REV_SERVER_TARGET:
+        lines.append("")
+        lines.append("# Conditional forwarding (reverse lookups and LAN names)")
+        lines.append(f"rev-server={REV_SERVER_CIDR},{REV_SERVER_TARGET}")
+        if REV_SERVER_DOMAIN:
+            lines.append(f"server=/{REV_SERVER_DOMAIN}/{REV_SERVER_TARGET}")
+
+    return "\n".join(lines) + "\n"
+
+def write_if_changed(path, content):
+    """Atomically replace path with content, returns False if unchanged"""
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read() == content:
+                return False
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.init-pihole-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    return True
+
+def main():
+    log("Starting Pi-hole DNS initialization...")
+
+    if not os.path.isdir(DNSMASQ_DIR):
+        log(f"✗ dnsmasq directory not found: {DNSMASQ_DIR}")
+        sys.exit(1)
+
+    records = build_records()
+    log(f"✓ Collected {len(records)} local records")
+
+    content = render_config(records)
+    output_path = os.path.join(DNSMASQ_DIR, OUTPUT_FILE)
+
+    if write_if_changed(output_path, content):
+        log(f"✓ Wrote {output_path}")
+        log("ℹ If Pi-hole is already running: docker exec pihole pihole restartdns")
+    else:
+        log("ℹ Local DNS config unchanged, skipping")
+
+    log("")
+    log("Resolver settings:")
+    log(f"  Cache size: {CACHE_SIZE} (via Pi-hole CUSTOM_CACHE_SIZE)")
+    log(f"  Local record TTL: {LOCAL_TTL}s")
+    log(f"  Optimistic caching: {'enabled' if OPTIMISTIC_CACHE else 'disabled'}")
+    if REV_SERVER_CIDR and REV_SERVER_TARGET:
+        log(f"  Conditional forwarding: {REV_SERVER_CIDR} → {REV_SERVER_TARGET}")
+    else:
+        log("  Conditional forwarding: disabled (set PIHOLE_REV_SERVER_TARGET)")
+
+    log("✓ Initialization complete")
+    sys.exit(0)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        log(f"✗ Initialization failed: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Jellyfin Library Watcher
+Turns filesystem changes into targeted Jellyfin refreshes instead of full library scans
+
+1. Reads the libraries and their folders from the Jellyfin API
+2. Watches every library folder recursively with inotify
+3. Debounces bursts (a season copy, an unpacked download) and coalesces
+   the changed paths to the smallest set of directories
+4. Reports those directories via /Library/Media/Updated, so Jellyfin
+   only re-reads the affected folders (LibraryMonitorDelay is lowered to
+   WATCHER_MONITOR_DELAY so reports are acted on within seconds)
+5. Falls back to refreshing one library if inotify overflows, or if a
+   burst touches too many folders to be worth reporting one by one
+6. Stretches Jellyfin's scheduled "Scan Media Library" task to
+   WATCHER_SCAN_INTERVAL_HOURS while running (a safety net for changes
+   made while the watcher was down) and restores it on exit
+
+Library folders must be mounted at the same path as in the jellyfin
+container. Counters are written to STATS_FILE.
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import signal
+import struct
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+# Configuration
+JELLYFIN_URL = os.environ.get('JELLYFIN_URL', 'http://jellyfin:8096')
+ADMIN_USER = os.environ.get('ADMIN_USER', 'admin')
+ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'changeme')
+DEBOUNCE = float(os.environ.get('WATCHER_DEBOUNCE', '10'))  # quiet seconds before refreshing
+MAX_DELAY = float(os.environ.get('WATCHER_MAX_DELAY', '60'))  # refresh at most this long after first change
+MAX_PATHS = int(os.environ.get('WATCHER_MAX_PATHS', '50'))  # above this, refresh the whole library
+LIBRARY_RELOAD = int(os.environ.get('WATCHER_LIBRARY_RELOAD', '600'))  # seconds between library re-reads
+MONITOR_DELAY = int(os.environ.get('WATCHER_MONITOR_DELAY', '5'))  # Jellyfin's own delay before acting on a report
+SCAN_INTERVAL_HOURS = float(os.environ.get('WATCHER_SCAN_INTERVAL_HOURS', '168'))  # 0 = leave the scan task alone
+LOGIN_RETRY = 300  # seconds between attempts after a rejected login
+STATS_FILE = os.environ.get('STATS_FILE', '/state/stats.json')
+# Jellyfin's own scan triggers, kept until restored so a crash doesn't lose them
+TRIGGERS_FILE = os.path.join(os.path.dirname(STATS_FILE), 'scan-triggers.json')
+
+TICKS_PER_HOUR = 36_000_000_000  # .NET ticks are 100ns
+
+# inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+# Not IN_MODIFY: a file being copied fires it for every write; IN_CLOSE_WRITE marks the end
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct('iIII')
+
+# Sidecar/temp files that never change what Jellyfin shows
+IGNORED_SUFFIXES = ('.part', '.tmp', '.!qb', '.crdownload', '.partial')
+
+RUNNING = True
+
+def log(msg):
+    print(f"[Jellyfin Watcher] {msg}", flush=True)
+
+def sleep(seconds):
+    """Sleep in short steps so SIGTERM stops the container promptly"""
+    deadline = time.time() + seconds
+    while RUNNING and time.time() < deadline:
+        time.sleep(min(1, deadline - time.time()))
+
+# ==============================================
+# Jellyfin API
+# ==============================================
+
+AUTH_HEADER = 'MediaBrowser Client="LaunchLab Watcher", Device="launchlab", DeviceId="launchlab-watcher", Version="1.0"'
+TOKEN = None
+
+def api_request(endpoint, data=None, method='GET'):
+    """Make authenticated API request to Jellyfin"""
+    url = f"{JELLYFIN_URL}{endpoint}"
+    auth = AUTH_HEADER + (f', Token="{TOKEN}"' if TOKEN else '')
+    headers = {'Content-Type': 'application/json', 'Authorization': auth}
+    body = json.dumps(data).encode('utf-8') if data is not None else None
+    if body is not None and method == 'GET':
+        method = 'POST'
+    req = urllib.request.Request(url, data=body, headers=headers, method=method)
+
+    with urllib.request.urlopen(req, timeout=30) as response:
+        content = response.read()
+        if response.status == 204 or not content:
+            return None
+        return json.loads(content.decode('utf-8'))
+
+def authenticate():
+    """
+    Log in as the admin user, retrying until it works or we are stopped
+
+    Never gives up: exiting would only make the unless-stopped container
+    restart-loop. A rejected login is retried every LOGIN_RETRY seconds.
+    """
+    global TOKEN
+    log("Waiting for Jellyfin...")
+    rejected = False
+    while RUNNING:
+        try:
+            result = api_request('/Users/AuthenticateByName',
+                                 {'Username': ADMIN_USER, 'Pw': ADMIN_PASSWORD})
+            TOKEN = result['AccessToken']
+            log("✓ Authenticated")
+            return True
+        except urllib.error.HTTPError as e:
+            if e.code == 401:
+                if not rejected:
+                    log(f"✗ Login rejected, check ADMIN_USER/ADMIN_PASSWORD (retrying every {LOGIN_RETRY}s)")
+                    rejected = True
+                sleep(LOGIN_RETRY)
+                continue
+        except (OSError, ValueError, KeyError):
+            pass
+        sleep(5)
+    return False
+
+def get_libraries():
+    """Return {location path: (library name, library item id)}"""
+    locations = {}
+    for folder in api_request('/Library/VirtualFolders') or []:
+        for location in folder.get('Locations', []):
+            locations[location.rstrip('/')] = (folder['Name'], folder['ItemId'])
+    return locations
+
+def tune_monitor_delay():
+    """
+    Lower Jellyfin's LibraryMonitorDelay
+
+    Reported paths wait this long (default 60s) before Jellyfin acts on
+    them. The watcher already debounces, so a short delay is enough.
+    """
+    config = api_request('/System/Configuration')
+    if config.get('LibraryMonitorDelay') == MONITOR_DELAY:
+        return
+    log(f"Setting LibraryMonitorDelay {config.get('LibraryMonitorDelay')}s → {MONITOR_DELAY}s")
+    config['LibraryMonitorDelay'] = MONITOR_DELAY
+    api_request('/System/Configuration', config)
+
+def scan_task():
+    """The scheduled 'Scan Media Library' task, or None"""
+    for task in api_request('/ScheduledTasks') or []:
+        if task.get('Key') == 'RefreshLibrary':
+            return task
+    return None
+
+def set_triggers(task, triggers):
+    api_request(f"/ScheduledTasks/{task['Id']}/Triggers", triggers)
+
+def stretch_scan_task():
+    """
+    Run the full library scan every SCAN_INTERVAL_HOURS instead of Jellyfin's
+    default (every 12h) while changes are reported as they happen
+
+    Returns (task, original triggers) to restore on exit, or None if untouched.
+    """
+    task = scan_task()
+    if not task or not task.get('Triggers'):
+        return None  # No task, or scans already disabled by the admin
+    try:
+        # Left behind by a run that didn't get to restore them
+        with open(TRIGGERS_FILE) as f:
+            original = json.load(f)
+    except (OSError, ValueError):
+        original = task['Triggers']
+        if os.path.isdir(os.path.dirname(TRIGGERS_FILE)):
+            with open(TRIGGERS_FILE, 'w') as f:
+                json.dump(original, f)
+    set_triggers(task, [{'Type': 'IntervalTrigger',
+                         'IntervalTicks': int(SCAN_INTERVAL_HOURS * TICKS_PER_HOUR)}])
+    log(f"Scheduled library scan: every {SCAN_INTERVAL_HOURS:g}h while watching "
+        f"(was {len(original)} trigger(s), restored on exit)")
+    return task, original
+
+def restore_scan_task(saved):
+    task, original = saved
+    try:
+        set_triggers(task, original)
+        log("✓ Restored the scheduled library scan")
+    except (OSError, ValueError) as e:
+        log(f"⚠ Could not restore the scheduled library scan (kept in {TRIGGERS_FILE}): {e}")
+        return
+    try:
+        os.unlink(TRIGGERS_FILE)
+    except OSError:
+        pass
+
+def report_changes(paths):
+    """Tell Jellyfin which paths changed; it refreshes the nearest existing folder item"""
+    api_request('/Library/Media/Updated', {
+        'Updates': [{'Path': path, 'UpdateType': 'Modified'} for path in sorted(paths)]
+    })
+
+def refresh_library(item_id):
+    """Recursive refresh of one library (used when changes can't be narrowed down)"""
+    api_request(f"/Items/{item_id}/Refresh?Recursive=true&MetadataRefreshMode=Default"
+                f"&ImageRefreshMode=Default", method='POST')
+
+# ==============================================
+# inotify
+# ==============================================
+
+class Inotify:
+    """Recursive inotify watcher built on libc via ctypes (no extra packages)"""
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.paths = {}  # wd -> directory
+        self.wds = {}  # directory -> wd
+        self.limit_warned = False
+
+    def add_tree(self, root):
+        """Watch root and every directory below it, returns number of watches added"""
+        added = 0
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            if self.add(dirpath):
+                added += 1
+        return added
+
+    def add(self, path):
+        if path in self.wds:
+            return False
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            if errno == 28 and not self.limit_warned:  # ENOSPC
+                log("⚠ inotify watch limit reached, raise fs.inotify.max_user_watches on the host")
+                self.limit_warned = True
+            return False
+        self.paths[wd] = path
+        self.wds[path] = wd
+        return True
+
+    def remove_tree(self, root):
+        for path in [p for p in self.wds if p == root or p.startswith(root + '/')]:
+            wd = self.wds.pop(path)
+            self.paths.pop(wd, None)
+            self.libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout):
+        """Return list of (directory, name, mask); [] on timeout"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return []
+
+        events, offset = [], 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+            offset += length
+            if mask & IN_IGNORED:
+                path = self.paths.pop(wd, None)
+                if path:
+                    self.wds.pop(path, None)
+                continue
+            events.append((self.paths.get(wd), name, mask))
+        return events
+
+# ==============================================
+# Change batching
+# ==============================================
+
+def coalesce(paths):
+    """Drop paths whose ancestor is already in the set"""
+    result = []
+    for path in sorted(paths):
+        if not result or not (path == result[-1] or path.startswith(result[-1] + '/')):
+            result.append(path)
+    return result
+
+def library_for(path, libraries):
+    """Return the library location containing path, or None"""
+    best = None
+    for location in libraries:
+        if path == location or path.startswith(location + '/'):
+            if best is None or len(location) > len(best):
+                best = location
+    return best
+
+class Batch:
+    """Changes collected since the last refresh"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.paths = set()
+        self.overflow = False
+        self.first = None
+        self.last = None
+        self.events = 0
+
+    def add(self, path):
+        now = time.time()
+        self.paths.add(path)
+        self.first = self.first or now
+        self.last = now
+        self.events += 1
+
+    def due(self):
+        if not self.first:
+            return False
+        now = time.time()
+        return now - self.last >= DEBOUNCE or now - self.first >= MAX_DELAY
+
+# ==============================================
+# Main loop
+# ==============================================
+
+def write_stats(stats):
+    """Atomically write stats JSON"""
+    directory = os.path.dirname(STATS_FILE)
+    if not directory or not os.path.isdir(directory):
+        return
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.stats-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(stats, f, indent=2)
+    os.replace(tmp_path, STATS_FILE)
+
+def handle_event(inotify, batch, directory, name, mask):
+    """Record one inotify event, adding watches for new directories"""
+    if mask & IN_Q_OVERFLOW:
+        batch.overflow = True
+        batch.add(None)
+        return
+    if directory is None or name.startswith('.') or name.endswith(IGNORED_SUFFIXES):
+        return
+
+    path = os.path.join(directory, name) if name else directory
+    if mask & IN_ISDIR:
+        if mask & (IN_CREATE | IN_MOVED_TO):
+            inotify.add_tree(path)
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            inotify.remove_tree(path)
+    if mask & IN_DELETE_SELF:
+        return  # Parent directory reports the removal
+
+    # Report the containing folder: for a new episode that is the season
+    # folder, which is the item Jellyfin needs to re-validate
+    batch.add(directory if not mask & IN_ISDIR else path)
+
+def flush(batch, libraries, stats):
+    """Turn a batch into API calls"""
+    by_library = {}
+    for path in batch.paths:
+        if path is None:
+            continue
+        location = library_for(path, libraries)
+        if location:
+            by_library.setdefault(location, set()).add(path)
+
+    targets = set(by_library) if batch.overflow else set()
+    paths = set()
+    for location, changed in by_library.items():
+        changed = coalesce(changed)
+        if len(changed) > MAX_PATHS:
+            targets.add(location)
+        elif location not in targets:
+            paths.update(changed)
+
+    if batch.overflow:
+        # Events were lost, so any library could be affected
+        targets = set(libraries)
+        log("⚠ inotify queue overflowed, refreshing all libraries")
+
+    try:
+        if paths:
+            report_changes(paths)
+            stats['targeted_refreshes'] += len(paths)
+            log(f"Refreshed {len(paths)} folders ({batch.events} events coalesced): "
+                + ', '.join(sorted(paths)[:3]) + (' …' if len(paths) > 3 else ''))
+        for location in sorted(targets):
+            name, item_id = libraries[location]
+            refresh_library(item_id)
+            stats['library_refreshes'] += 1
+            log(f"Refreshed library '{name}' ({location})")
+    except (OSError, ValueError) as e:
+        stats['errors'] += 1
+        log(f"⚠ Refresh failed: {e}")
+
+    stats['events'] += batch.events
+    stats['batches'] += 1
+    batch.clear()
+
+def watch_libraries(inotify, libraries):
+    """Watch every library location present in this container"""
+    watched = 0
+    for location in libraries:
+        if location in inotify.wds:
+            continue
+        if not os.path.isdir(location):
+            log(f"⚠ {location} is not mounted in the watcher, skipping")
+            continue
+        added = inotify.add_tree(location)
+        watched += 1
+        log(f"✓ Watching {location} ({added} directories)")
+    return watched
+
+def handle_signal(signum, frame):
+    global RUNNING
+    RUNNING = False
+
+def main():
+    log("Starting Jellyfin library watcher...")
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    if not authenticate():
+        return
+
+    try:
+        tune_monitor_delay()
+    except (OSError, ValueError) as e:
+        log(f"⚠ Could not set LibraryMonitorDelay: {e}")
+
+    saved_scan = None
+    if SCAN_INTERVAL_HOURS > 0:
+        try:
+            saved_scan = stretch_scan_task()
+        except (OSError, ValueError, KeyError) as e:
+            log(f"⚠ Could not change the scheduled library scan: {e}")
+
+    inotify = Inotify()
+    libraries = {}
+    loaded = 0
+    batch = Batch()
+    stats = {
+        'events': 0,
+        'batches': 0,
+        'targeted_refreshes': 0,
+        'library_refreshes': 0,
+        'errors': 0,
+    }
+    last_stats = None
+
+    while RUNNING:
+        if time.time() - loaded >= LIBRARY_RELOAD:
+            try:
+                libraries = get_libraries()
+                watch_libraries(inotify, libraries)
+                if libraries and not inotify.wds and not loaded:
+                    log("⚠ No library folder is mounted here, nothing is watched - put libraries "
+                        "under MEDIA_DIR (/media) or mount them into jellyfin-watcher too")
+            except (OSError, ValueError) as e:
+                log(f"⚠ Could not read libraries: {e}")
+            loaded = time.time()
+
+        for directory, name, mask in inotify.read(timeout=1):
+            handle_event(inotify, batch, directory, name, mask)
+
+        if batch.due():
+            flush(batch, libraries, stats)
+
+        if stats != last_stats:
+            write_stats(dict(stats, updated=time.strftime('%Y-%m-%dT%H:%M:%S'),
+                             watched_directories=len(inotify.wds),
+                             scan_interval_hours=SCAN_INTERVAL_HOURS if saved_scan else None))
+            last_stats = dict(stats)
+
+    if saved_scan:
+        restore_scan_task(saved_scan)
+    log("✓ Stopped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+Off-Peak Job Scheduler
+Keeps heavy Jellyfin and Immich background jobs away from playback
+
+Managed jobs:
+- Jellyfin scheduled tasks: chapter images, trickplay, library scan
+- Immich job queues: smart search, face detection/recognition, video transcoding
+
+Every CHECK_INTERVAL seconds:
+1. Reads load signals: active Jellyfin playback sessions and host CPU
+2. Heavy jobs are allowed inside SCHEDULER_WINDOW, when nothing is
+   playing and CPU is below SCHEDULER_CPU_HIGH (once paused for CPU,
+   they stay paused for SCHEDULER_MIN_HOLD seconds and then resume only
+   below SCHEDULER_CPU_LOW). If Jellyfin sessions can't be read, only
+   Jellyfin tasks wait; Immich is gated on window and CPU alone
+3. When not allowed: pauses Immich queues and cancels running Jellyfin
+   tasks, remembering them as owed (both tasks skip finished items, so
+   a later run continues where this one stopped)
+4. When allowed: resumes/starts jobs in priority order, never running
+   more than SCHEDULER_MAX_JOBS across both apps at once
+
+Every decision is logged with the signals behind it, and appended to
+DECISIONS_FILE so it can be lined up with playback problems. Queues
+paused by the scheduler are resumed when it stops.
+"""
+
+import json
+import os
+import signal
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+# Configuration
+JELLYFIN_URL = os.environ.get('JELLYFIN_URL', 'http://jellyfin:8096')
+IMMICH_URL = os.environ.get('IMMICH_URL', 'http://immich-server:3001')
+ADMIN_USER = os.environ.get('ADMIN_USER', 'admin')
+ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@homelab.local')
+ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'changeme')
+
+WINDOW = os.environ.get('SCHEDULER_WINDOW', '01:00-07:00')  # local time, may wrap midnight
+MAX_JOBS = int(os.environ.get('SCHEDULER_MAX_JOBS', '1'))  # heavy jobs running stack-wide
+CPU_HIGH = float(os.environ.get('SCHEDULER_CPU_HIGH', '85'))  # percent, pause above
+CPU_LOW = float(os.environ.get('SCHEDULER_CPU_LOW', '60'))  # percent, resume below
+MIN_HOLD = int(os.environ.get('SCHEDULER_MIN_HOLD', '300'))  # seconds a CPU pause lasts at least
+CHECK_INTERVAL = int(os.environ.get('SCHEDULER_INTERVAL', '30'))
+DRY_RUN = os.environ.get('SCHEDULER_DRY_RUN', 'false').lower() == 'true'
+STATE_DIR = os.environ.get('STATE_DIR', '/state')
+
+# Managed jobs in priority order (first gets a free slot first)
+JOBS = [
+    ('jellyfin', 'RefreshLibrary'),
+    ('immich', 'facialRecognition'),
+    ('immich', 'faceDetection'),
+    ('immich', 'smartSearch'),
+    ('jellyfin', 'RefreshChapterImages'),
+    ('jellyfin', 'RefreshTrickplayImages'),
+    ('immich', 'videoConversion'),
+]
+if os.environ.get('SCHEDULER_JOBS'):
+    JOBS = [tuple(item.strip().split(':', 1)) for item in os.environ['SCHEDULER_JOBS'].split(',')]
+
+DECISIONS_FILE = os.path.join(STATE_DIR, 'decisions.jsonl')
+STATS_FILE = os.path.join(STATE_DIR, 'stats.json')
+PAUSED_FILE = os.path.join(STATE_DIR, 'paused.json')  # Immich queues we paused, survives a crash
+SESSION_WARN_AFTER = 10  # failed session lookups in a row before a loud warning
+
+RUNNING = True
+
+def log(msg):
+    print(f"[Job Scheduler] {msg}", flush=True)
+
+# ==============================================
+# API clients
+# ==============================================
+
+def http_json(url, data=None, method='GET', headers=None):
+    """JSON request helper, returns parsed body or None"""
+    body = json.dumps(data).encode('utf-8') if data is not None else None
+    all_headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+    all_headers.update(headers or {})
+    req = urllib.request.Request(url, data=body, headers=all_headers, method=method)
+    with urllib.request.urlopen(req, timeout=15) as response:
+        content = response.read()
+        return json.loads(content.decode('utf-8')) if content else None
+
+class Jellyfin:
+    AUTH = 'MediaBrowser Client="LaunchLab Scheduler", Device="launchlab", DeviceId="launchlab-scheduler", Version="1.0"'
+
+    def __init__(self):
+        self.token = None
+
+    def request(self, endpoint, data=None, method='GET'):
+        if not self.token:
+            result = http_json(f"{JELLYFIN_URL}/Users/AuthenticateByName",
+                               {'Username': ADMIN_USER, 'Pw': ADMIN_PASSWORD}, 'POST',
+                               {'Authorization': self.AUTH})
+            self.token = result['AccessToken']
+        try:
+            return http_json(f"{JELLYFIN_URL}{endpoint}", data, method,
+                             {'Authorization': f'{self.AUTH}, Token="{self.token}"'})
+        except urllib.error.HTTPError as e:
+            if e.code == 401:
+                self.token = None  # Log in again next time
+            raise
+
+    def active_streams(self):
+        sessions = self.request('/Sessions?activeWithinSeconds=120') or []
+        return sum(1 for s in sessions
+                   if s.get('NowPlayingItem') and not s.get('PlayState', {}).get('IsPaused'))
+
+    def tasks(self):
+        """Return {key: task} for scheduled tasks"""
+        return {t['Key']: t for t in self.request('/ScheduledTasks') or []}
+
+    def start(self, task):
+        self.request(f"/ScheduledTasks/Running/{task['Id']}", method='POST')
+
+    def stop(self, task):
+        self.request(f"/ScheduledTasks/Running/{task['Id']}", method='DELETE')
+
+class Immich:
+    def __init__(self):
+        self.token = None
+
+    def request(self, endpoint, data=None, method='GET'):
+        if not self.token:
+            result = http_json(f"{IMMICH_URL}/api/auth/login",
+                               {'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD}, 'POST')
+            self.token = result['accessToken']
+        try:
+            return http_json(f"{IMMICH_URL}{endpoint}", data, method,
+                             {'Authorization': f"Bearer {self.token}"})
+        except urllib.error.HTTPError as e:
+            if e.code == 401:
+                self.token = None
+            raise
+
+    def queues(self):
+        """Return {name: {'jobCounts': ..., 'queueStatus': ...}}"""
+        return self.request('/api/jobs') or {}
+
+    def command(self, name, command):
+        self.request(f"/api/jobs/{name}", {'command': command, 'force': False}, 'PUT')
+
+# ==============================================
+# Load signals
+# ==============================================
+
+def parse_window(spec):
+    """'01:00-07:00' -> (60, 420) minutes since midnight"""
+    def minutes(value):
+        hours, _, mins = value.strip().partition(':')
+        return int(hours) * 60 + int(mins or 0)
+    start, _, end = spec.partition('-')
+    return minutes(start), minutes(end)
+
+def in_window(window, now=None):
+    start, end = window
+    t = time.localtime(now)
+    current = t.tm_hour * 60 + t.tm_min
+    if start <= end:
+        return start <= current < end
+    return current >= start or current < end  # Wraps midnight
+
+class CpuMeter:
+    """Host CPU busy percent between calls, from /proc/stat (not namespaced)"""
+
+    def __init__(self):
+        self.last = self._read()
+
+    def _read(self):
+        with open('/proc/stat') as f:
+            values = [int(v) for v in f.readline().split()[1:]]
+        idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+        return sum(values), idle
+
+    def percent(self):
+        total, idle = self._read()
+        last_total, last_idle = self.last
+        self.last = (total, idle)
+        elapsed = total - last_total
+        return round(100.0 * (1 - (idle - last_idle) / elapsed), 1) if elapsed else 0.0
+
+# ==============================================
+# Scheduling
+# ==============================================
+
+def job_states(jellyfin, immich):
+    """
+    Return {(app, name): {'running', 'paused', 'pending', 'handle'}}
+
+    Jobs whose app is unreachable are left out, so they are neither
+    counted nor touched this round.
+    """
+    states = {}
+    wanted_jellyfin = {name for app, name in JOBS if app == 'jellyfin'}
+    wanted_immich = {name for app, name in JOBS if app == 'immich'}
+
+    if wanted_jellyfin:
+        try:
+            tasks = jellyfin.tasks()
+            for name in wanted_jellyfin:
+                task = tasks.get(name)
+                if task:
+                    states[('jellyfin', name)] = {
+                        'running': task.get('State') in ('Running', 'Cancelling'),
+                        'paused': False,
+                        'pending': False,
+                        'handle': task,
+                    }
+        except (OSError, ValueError, KeyError) as e:
+            log(f"⚠ Jellyfin tasks unavailable: {e}")
+
+    if wanted_immich:
+        try:
+            queues = immich.queues()
+            for name in wanted_immich:
+                queue = queues.get(name)
+                if queue:
+                    counts = queue.get('jobCounts', {})
+                    paused = queue.get('queueStatus', {}).get('isPaused', False)
+                    pending = counts.get('waiting', 0) + counts.get('delayed', 0) + counts.get('paused', 0) > 0
+                    states[('immich', name)] = {
+                        # An unpaused queue with work waiting holds a slot even between jobs
+                        'running': not paused and (counts.get('active', 0) > 0 or pending),
+                        'paused': paused,
+                        'pending': pending,
+                        'handle': name,
+                    }
+        except (OSError, ValueError, KeyError) as e:
+            log(f"⚠ Immich jobs unavailable: {e}")
+
+    return states
+
+class Scheduler:
+    def __init__(self, jellyfin, immich):
+        self.jellyfin = jellyfin
+        self.immich = immich
+        self.window = parse_window(WINDOW)
+        self.cpu = CpuMeter()
+        self.cpu_blocked = False
+        self.cpu_hold = MIN_HOLD
+        self.cpu_hold_until = 0
+        self.cpu_resumed_at = float('-inf')
+        self.owed = set()  # Jellyfin tasks cancelled by us, to re-run when allowed
+        self.paused_by_us = self.load_paused()  # Immich queues to resume on shutdown
+        self.session_failures = 0
+        self.counters = {'paused': 0, 'resumed': 0, 'cancelled': 0, 'started': 0, 'checks': 0}
+        self.last_reasons = {}  # Log the first state whatever it is
+
+    def load_paused(self):
+        """Queues paused by a previous run that was killed before release()"""
+        try:
+            with open(PAUSED_FILE) as f:
+                paused = set(json.load(f))
+        except (OSError, ValueError, TypeError):
+            return set()
+        if paused:
+            log(f"ℹ Taking over queue(s) paused by a previous run: {', '.join(sorted(paused))}")
+        return paused
+
+    def save_paused(self):
+        if not os.path.isdir(STATE_DIR):
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=STATE_DIR, prefix='.paused-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(sorted(self.paused_by_us), f)
+        os.replace(tmp_path, PAUSED_FILE)
+
+    def signals(self):
+        cpu = self.cpu.percent()
+        now = time.monotonic()
+        if self.cpu_blocked and cpu < CPU_LOW and now >= self.cpu_hold_until:
+            self.cpu_blocked = False
+            self.cpu_resumed_at = now
+        elif not self.cpu_blocked and cpu >= CPU_HIGH:
+            self.cpu_blocked = True
+            # The load is often our own jobs: pausing them always brings CPU
+            # under CPU_LOW, so without a hold they would flap every tick.
+            # A block soon after the last resume holds twice as long.
+            if now - self.cpu_resumed_at < self.cpu_hold * 2:
+                self.cpu_hold = min(self.cpu_hold * 2, MIN_HOLD * 8)
+            else:
+                self.cpu_hold = MIN_HOLD
+            self.cpu_hold_until = now + self.cpu_hold
+
+        try:
+            streams = self.jellyfin.active_streams()
+            if self.session_failures >= SESSION_WARN_AFTER:
+                log("✓ Jellyfin sessions readable again")
+            self.session_failures = 0
+        except (OSError, ValueError, KeyError) as e:
+            streams = None
+            self.session_failures += 1
+            if self.session_failures == 1:
+                log(f"⚠ Cannot read Jellyfin sessions ({e}), holding Jellyfin tasks")
+            elif self.session_failures == SESSION_WARN_AFTER:
+                log(f"✗ Jellyfin sessions unreadable for {SESSION_WARN_AFTER} checks ({e}). "
+                    "Immich jobs run WITHOUT playback protection until this is fixed - "
+                    "is Jellyfin up, jellyfin-init run, ADMIN_PASSWORD current?")
+        return {'window': in_window(self.window), 'streams': streams, 'cpu': cpu}
+
+    def blocked_reason(self, signals, app):
+        """Why heavy jobs of app may not run now, or None if they may"""
+        if not signals['window']:
+            return f"outside window {WINDOW}"
+        if signals['streams'] is None:
+            # Jellyfin down, never initialised or password changed: its
+            # tasks can wait, but Immich must not stall on it forever
+            if app == 'jellyfin':
+                return "sessions unknown"
+        elif signals['streams'] > 0:
+            return f"{signals['streams']} active stream(s)"
+        if self.cpu_blocked:
+            return f"cpu ≥{CPU_HIGH:.0f}% (holding {self.cpu_hold}s, then waiting for <{CPU_LOW:.0f}%)"
+        return None
+
+    def decide(self, action, app, name, reason, signals):
+        """Log and record one decision"""
+        log(f"{'[dry run] ' if DRY_RUN else ''}{action} {app}:{name} - {reason} "
+            f"(streams={signals['streams']}, cpu={signals['cpu']}%)")
+        record = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'action': action,
+            'job': f"{app}:{name}",
+            'reason': reason,
+            'dry_run': DRY_RUN,
+            **signals,
+        }
+        if os.path.isdir(STATE_DIR):
+            with open(DECISIONS_FILE, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+
+    def act(self, action, app, name, state):
+        if DRY_RUN:
+            return
+        if app == 'immich':
+            self.immich.command(name, 'pause' if action == 'pause' else 'resume')
+            if action == 'pause':
+                self.paused_by_us.add(name)
+            else:
+                self.paused_by_us.discard(name)
+            self.save_paused()
+        elif action == 'cancel':
+            self.jellyfin.stop(state['handle'])
+        else:
+            self.jellyfin.start(state['handle'])
+
+    def tick(self):
+        self.counters['checks'] += 1
+        signals = self.signals()
+        reasons = {app: self.blocked_reason(signals, app) for app in ('jellyfin', 'immich')}
+        for app, reason in reasons.items():
+            if reason != self.last_reasons.get(app, ''):
+                log(f"Heavy {app} jobs {'blocked: ' + reason if reason else 'allowed'}")
+        self.last_reasons = reasons
+
+        states = job_states(self.jellyfin, self.immich)
+        running = sum(1 for s in states.values() if s['running'])
+
+        # Queues resumed by hand are no longer ours to resume on shutdown
+        resumed = {name for name in self.paused_by_us
+                   if ('immich', name) in states and not states[('immich', name)]['paused']}
+        if resumed and not DRY_RUN:
+            self.paused_by_us -= resumed
+            self.save_paused()
+
+        for app, name in JOBS:
+            state = states.get((app, name))
+            if not state:
+                continue
+            reason = reasons.get(app)
+            try:
+                if reason:
+                    # Stop everything heavy
+                    if app == 'immich' and not state['paused']:
+                        self.decide('pause', app, name, reason, signals)
+                        self.act('pause', app, name, state)
+                        self.counters['paused'] += 1
+                    elif app == 'jellyfin' and state['running']:
+                        self.decide('cancel', app, name, reason, signals)
+                        self.act('cancel', app, name, state)
+                        self.owed.add(name)
+                        self.counters['cancelled'] += 1
+                    continue
+
+                # Allowed: keep at most MAX_JOBS running, in priority order
+                if state['running']:
+                    continue
+                if app == 'immich' and state['paused']:
+                    if state['pending'] and running < MAX_JOBS:
+                        self.decide('resume', app, name, f"slot {running + 1}/{MAX_JOBS}", signals)
+                        self.act('resume', app, name, state)
+                        self.counters['resumed'] += 1
+                        running += 1
+                elif app == 'jellyfin' and name in self.owed and running < MAX_JOBS:
+                    self.decide('start', app, name, f"owed, slot {running + 1}/{MAX_JOBS}", signals)
+                    self.act('start', app, name, state)
+                    self.owed.discard(name)
+                    self.counters['started'] += 1
+                    running += 1
+            except (OSError, ValueError) as e:
+                log(f"⚠ {app}:{name}: {e}")
+
+        # A job an app started on its own while over the cap is paused
+        if running > MAX_JOBS:
+            for app, name in reversed(JOBS):
+                state = states.get((app, name))
+                if running <= MAX_JOBS:
+                    break
+                if reasons.get(app) or not state or not state['running']:
+                    continue
+                try:
+                    if app == 'immich':
+                        self.decide('pause', app, name, f"over cap {running}/{MAX_JOBS}", signals)
+                        self.act('pause', app, name, state)
+                        self.counters['paused'] += 1
+                    else:
+                        self.decide('cancel', app, name, f"over cap {running}/{MAX_JOBS}", signals)
+                        self.act('cancel', app, name, state)
+                        self.owed.add(name)
+                        self.counters['cancelled'] += 1
+                    running -= 1
+                except (OSError, ValueError) as e:
+                    log(f"⚠ {app}:{name}: {e}")
+
+        self.write_stats(signals, reasons, states)
+
+    def release(self):
+        """Resume queues this scheduler paused, so stopping it never leaves Immich stuck"""
+        for name in sorted(self.paused_by_us):
+            try:
+                self.immich.command(name, 'resume')
+                log(f"Resumed immich:{name} on shutdown")
+            except (OSError, ValueError, KeyError) as e:
+                log(f"⚠ Could not resume immich:{name}: {e}")
+            else:
+                self.paused_by_us.discard(name)
+        # Anything left is retried by the next run
+        self.save_paused()
+
+    def write_stats(self, signals, reasons, states):
+        """Atomically write current state"""
+        if not os.path.isdir(STATE_DIR):
+            return
+        stats = {
+            'updated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'allowed': {app: reason is None for app, reason in reasons.items()},
+            'blocked_reason': reasons,
+            'signals': signals,
+            'jobs': {f"{app}:{name}": {k: v for k, v in state.items() if k != 'handle'}
+                     for (app, name), state in states.items()},
+            'owed': sorted(self.owed),
+            'counters': self.counters,
+            'dry_run': DRY_RUN,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=STATE_DIR, prefix='.stats-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(stats, f, indent=2)
+        os.replace(tmp_path, STATS_FILE)
+
+def handle_signal(signum, frame):
+    global RUNNING
+    RUNNING = False
+
+def main():
+    log("Starting off-peak job scheduler...")
+    log(f"  Window {WINDOW}, max {MAX_JOBS} heavy job(s), CPU pause ≥{CPU_HIGH:.0f}% "
+        f"for {MIN_HOLD}s+, resume <{CPU_LOW:.0f}%")
+    log(f"  Jobs: {', '.join(f'{app}:{name}' for app, name in JOBS)}")
+    if DRY_RUN:
+        log("ℹ Dry run: decisions are logged but not applied")
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    scheduler = Scheduler(Jellyfin(), Immich())
+    while RUNNING:
+        try:
+            scheduler.tick()
+        except Exception as e:
+            log(f"⚠ Check failed: {e}")
+
+        deadline = time.time() + CHECK_INTERVAL
+        while RUNNING and time.time() < deadline:
+            time.sleep(1)
+
+    scheduler.release()
+    log("✓ Stopped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Matrix Retention Job
+Bounds Synapse media_store and database growth through the admin API
+
+Each run:
+1. Remote media: purges cached copies of other servers' media not
+   accessed for RETENTION_REMOTE_MEDIA_DAYS, in age slices of
+   RETENTION_BATCH_DAYS (oldest first), so each purge call is small
+2. Room history: purges events older than the configured age in each
+   listed room, one slice at a time, waiting for each purge to finish
+   (state events are always kept; set RETENTION_DELETE_LOCAL=false to
+   keep events sent by local users too)
+3. Local media (opt-in): deletes uploads that were never downloaded or
+   thumbnailed in RETENTION_LOCAL_MEDIA_DAYS, keeping avatars. This
+   includes attachments still shown in rooms that nobody has opened
+   yet, so it is off by default
+4. Reports bytes and rows reclaimed to RUNS_FILE
+
+Ships with RETENTION_DRY_RUN=true: runs only report what they would
+delete until the report in RUNS_FILE has been checked and the switch
+flipped.
+
+Every API call that deletes is followed by RETENTION_BATCH_PAUSE seconds
+of sleep, so Synapse keeps serving clients during a run.
+
+Usage:
+  python3 /retention.py            # Run now, then every RETENTION_INTERVAL hours
+  python3 /retention.py --once --dry-run
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+import urllib.parse
+import urllib.request
+
+# Configuration
+MATRIX_URL = os.environ.get('MATRIX_URL', 'http://matrix-synapse:8008')
+ADMIN_USER = os.environ.get('ADMIN_USER', 'admin')
+ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'changeme')
+ADMIN_TOKEN = os.environ.get('MATRIX_ADMIN_TOKEN', '')
+
+REMOTE_MEDIA_DAYS = int(os.environ.get('RETENTION_REMOTE_MEDIA_DAYS', '30'))  # 0 disables
+LOCAL_MEDIA_DAYS = int(os.environ.get('RETENTION_LOCAL_MEDIA_DAYS', '0'))  # 0 disables
+# Comma-separated "room=days", room as !id:server or #alias:server
+ROOM_HISTORY = os.environ.get('RETENTION_ROOMS', '')
+# Most rooms on a homelab are local-only, so purging only remote events would free nothing
+DELETE_LOCAL = os.environ.get('RETENTION_DELETE_LOCAL', 'true').lower() == 'true'
+
+BATCH_DAYS = int(os.environ.get('RETENTION_BATCH_DAYS', '7'))  # age slice per purge call
+BATCH_PAUSE = float(os.environ.get('RETENTION_BATCH_PAUSE', '2'))  # seconds between deleting calls
+LOOKBACK_DAYS = int(os.environ.get('RETENTION_LOOKBACK_DAYS', '365'))  # oldest slice if age unknown
+INTERVAL = float(os.environ.get('RETENTION_INTERVAL', '24'))  # hours between runs
+DRY_RUN = os.environ.get('RETENTION_DRY_RUN', 'true').lower() == 'true'
+
+MEDIA_STORE = os.environ.get('MEDIA_STORE', '/media_store')  # read-only, for byte counts
+STATE_DIR = os.environ.get('STATE_DIR', '/state')
+RUNS_FILE = os.path.join(STATE_DIR, 'runs.jsonl')
+
+DAY_MS = 86400 * 1000
+COUNT_LIMIT = 100000  # stop counting events per room beyond this
+
+RUNNING = True
+
+def log(msg):
+    print(f"[Matrix Retention] {msg}", flush=True)
+
+def format_size(num_bytes):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f}TB"
+
+def now_ms():
+    return int(time.time() * 1000)
+
+def pause():
+    """Rate limit between deleting calls"""
+    deadline = time.time() + BATCH_PAUSE
+    while RUNNING and time.time() < deadline:
+        time.sleep(0.2)
+
+# ==============================================
+# Synapse API
+# ==============================================
+
+TOKEN = ADMIN_TOKEN
+
+def api_request(endpoint, data=None, method='GET'):
+    """Make authenticated API request to Synapse"""
+    url = f"{MATRIX_URL}{endpoint}"
+    headers = {'Content-Type': 'application/json'}
+    if TOKEN:
+        headers['Authorization'] = f"Bearer {TOKEN}"
+    body = json.dumps(data).encode('utf-8') if data is not None else None
+    if body is not None and method == 'GET':
+        method = 'POST'
+    req = urllib.request.Request(url, data=body, headers=headers, method=method)
+    with urllib.request.urlopen(req, timeout=120) as response:
+        content = response.read()
+        return json.loads(content.decode('utf-8')) if content else {}
+
+def login():
+    """Get an admin access token from ADMIN_USER/ADMIN_PASSWORD unless one is set"""
+    global TOKEN
+    if TOKEN:
+        return
+    result = api_request('/_matrix/client/v3/login', {
+        'type': 'm.login.password',
+        'identifier': {'type': 'm.id.user', 'user': ADMIN_USER},
+        'password': ADMIN_PASSWORD,
+        'initial_device_display_name': 'LaunchLab retention',
+    })
+    TOKEN = result['access_token']
+
+def quote(value):
+    return urllib.parse.quote(value, safe='')
+
+# ==============================================
+# Byte accounting
+# ==============================================
+
+def tree_size(*parts):
+    """Total bytes under MEDIA_STORE/<parts>, None if not mounted"""
+    root = os.path.join(MEDIA_STORE, *parts)
+    if not os.path.isdir(MEDIA_STORE):
+        return None
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                continue
+    return total
+
+def remote_media_bytes():
+    sizes = [tree_size('remote_content'), tree_size('remote_thumbnail')]
+    return None if None in sizes else sum(sizes)
+
+def oldest_remote_ms():
+    """Oldest cached remote file (by mtime), None if unknown"""
+    root = os.path.join(MEDIA_STORE, 'remote_content')
+    oldest = None
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                mtime = os.lstat(os.path.join(dirpath, name)).st_mtime
+            except OSError:
+                continue
+            oldest = mtime if oldest is None else min(oldest, mtime)
+    return int(oldest * 1000) if oldest else None
+
+def room_db_sizes():
+    """{room_id: estimated bytes} from Synapse's database statistics"""
+    try:
+        result = api_request('/_synapse/admin/v1/statistics/database/rooms')
+    except (OSError, ValueError):
+        return {}
+    return {r['room_id']: r['estimated_size'] for r in result.get('rooms', [])}
+
+# ==============================================
+# Purges
+# ==============================================
+
+def age_slices(oldest_ms, cutoff_ms):
+    """Yield increasing before_ts values from oldest_ms to cutoff_ms, BATCH_DAYS apart"""
+    step = max(BATCH_DAYS, 1) * DAY_MS
+    ts = max(oldest_ms, cutoff_ms - LOOKBACK_DAYS * DAY_MS) + step
+    while ts < cutoff_ms:
+        yield ts
+        ts += step
+    yield cutoff_ms
+
+def purge_remote_media(dry_run):
+    """Purge remote media cache older than REMOTE_MEDIA_DAYS"""
+    result = {'rows': 0, 'bytes': 0, 'batches': 0}
+    if not REMOTE_MEDIA_DAYS:
+        return result
+    cutoff = now_ms() - REMOTE_MEDIA_DAYS * DAY_MS
+    before = remote_media_bytes()
+
+    if dry_run:
+        # No count API for remote media: estimate from file mtimes
+        if before is None:
+            log("  remote media: dry run needs MEDIA_STORE mounted to estimate")
+            return result
+        for folder in ('remote_content', 'remote_thumbnail'):
+            for dirpath, _, filenames in os.walk(os.path.join(MEDIA_STORE, folder)):
+                for name in filenames:
+                    try:
+                        st = os.lstat(os.path.join(dirpath, name))
+                    except OSError:
+                        continue
+                    if st.st_mtime * 1000 < cutoff:
+                        result['rows'] += 1
+                        result['bytes'] += st.st_size
+        log(f"  remote media: would purge ~{result['rows']} files, ~{format_size(result['bytes'])} "
+            "(estimate by file age, Synapse uses last access)")
+        return result
+
+    oldest = oldest_remote_ms() or (cutoff - LOOKBACK_DAYS * DAY_MS)
+    for before_ts in age_slices(oldest, cutoff):
+        if not RUNNING:
+            break
+        deleted = api_request(f"/_synapse/admin/v1/purge_media_cache?before_ts={before_ts}", {}).get('deleted', 0)
+        result['rows'] += deleted
+        result['batches'] += 1
+        pause()
+
+    after = remote_media_bytes()
+    if before is not None and after is not None:
+        result['bytes'] = max(before - after, 0)
+    log(f"  remote media: purged {result['rows']} items, {format_size(result['bytes'])} "
+        f"in {result['batches']} batches")
+    return result
+
+def parse_rooms(spec):
+    """Parse 'room=days,...' into [(room, days)]"""
+    rooms = []
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        room, _, days = item.rpartition('=')
+        rooms.append((room.strip(), int(days)))
+    return rooms
+
+def resolve_room(room):
+    if room.startswith('#'):
+        return api_request(f"/_matrix/client/v3/directory/room/{quote(room)}")['room_id']
+    return room
+
+def count_events_before(room_id, cutoff, server_name):
+    """Count purgeable events older than cutoff, returns (count, oldest ts)"""
+    count, oldest, token = 0, None, None
+    while count < COUNT_LIMIT:
+        query = "dir=f&limit=1000" + (f"&from={quote(token)}" if token else '')
+        page = api_request(f"/_synapse/admin/v1/rooms/{quote(room_id)}/messages?{query}")
+        events = page.get('chunk', [])
+        for event in events:
+            ts = event.get('origin_server_ts', 0)
+            if ts >= cutoff:
+                return count, oldest
+            oldest = oldest or ts
+            if 'state_key' in event:
+                continue  # Purge keeps state
+            if not DELETE_LOCAL and event.get('sender', '').endswith(f":{server_name}"):
+                continue
+            count += 1
+        token = page.get('end')
+        if not events or not token:
+            break
+    return count, oldest
+
+def wait_for_purge(purge_id):
+    """Poll purge status, returns final status"""
+    while RUNNING:
+        status = api_request(f"/_synapse/admin/v1/purge_history_status/{purge_id}").get('status')
+        if status != 'active':
+            return status
+        time.sleep(2)
+    return 'interrupted'
+
+def purge_room_history(dry_run, server_name):
+    """Purge old history in each configured room"""
+    result = {'rows': 0, 'bytes': 0, 'batches': 0, 'rooms': {}}
+    rooms = parse_rooms(ROOM_HISTORY)
+    if not rooms:
+        return result
+    sizes_before = room_db_sizes()
+
+    for room, days in rooms:
+        if not RUNNING:
+            break
+        try:
+            room_id = resolve_room(room)
+            cutoff = now_ms() - days * DAY_MS
+            events, oldest = count_events_before(room_id, cutoff, server_name)
+            room_result = {'events': events, 'batches': 0}
+            result['rooms'][room] = room_result
+            result['rows'] += events
+
+            if dry_run or not events:
+                log(f"  {room}: {'would purge' if dry_run else 'nothing to purge,'} {events} events older than {days}d")
+                continue
+
+            for purge_ts in age_slices(oldest, cutoff):
+                if not RUNNING:
+                    break
+                purge = api_request(f"/_synapse/admin/v1/purge_history/{quote(room_id)}", {
+                    'delete_local_events': DELETE_LOCAL,
+                    'purge_up_to_ts': purge_ts,
+                })
+                status = wait_for_purge(purge['purge_id'])
+                room_result['batches'] += 1
+                result['batches'] += 1
+                if status != 'complete':
+                    log(f"  ⚠ {room}: purge {status}")
+                    break
+                pause()
+            log(f"  {room}: purged {events} events older than {days}d in {room_result['batches']} batches")
+        except (OSError, ValueError, KeyError) as e:
+            log(f"  ⚠ {room}: {e}")
+
+    if not dry_run:
+        sizes_after = room_db_sizes()
+        for room, room_result in result['rooms'].items():
+            try:
+                room_id = resolve_room(room)
+            except (OSError, ValueError, KeyError):
+                continue
+            reclaimed = max(sizes_before.get(room_id, 0) - sizes_after.get(room_id, 0), 0)
+            room_result['db_bytes'] = reclaimed
+            result['bytes'] += reclaimed
+    return result
+
+def iter_local_users():
+    token = '0'
+    while token is not None:
+        page = api_request(f"/_synapse/admin/v2/users?from={token}&limit=100&guests=false&deactivated=true")
+        for user in page.get('users', []):
+            yield user['name']
+        token = page.get('next_token')
+
+def iter_user_media(user_id):
+    start = 0
+    while True:
+        page = api_request(f"/_synapse/admin/v1/users/{quote(user_id)}/media"
+                           f"?from={start}&limit=100&order_by=created_ts&dir=f")
+        media = page.get('media', [])
+        yield from media
+        if 'next_token' not in page or not media:
+            break
+        start = page['next_token']
+
+def purge_local_media(dry_run, server_name):
+    """Delete local uploads never accessed in LOCAL_MEDIA_DAYS"""
+    result = {'rows': 0, 'bytes': 0, 'batches': 0}
+    if not LOCAL_MEDIA_DAYS:
+        return result
+    cutoff = now_ms() - LOCAL_MEDIA_DAYS * DAY_MS
+
+    # Avatars in use stay, whatever their access time
+    keep = set()
+    candidates = []
+    for user_id in iter_local_users():
+        try:
+            profile = api_request(f"/_matrix/client/v3/profile/{quote(user_id)}")
+            if profile.get('avatar_url'):
+                keep.add(profile['avatar_url'])
+        except (OSError, ValueError):
+            pass
+        for media in iter_user_media(user_id):
+            if media.get('created_ts', cutoff) >= cutoff or media.get('quarantined_by'):
+                continue
+            if media.get('last_access_ts') is None or media['last_access_ts'] == media.get('created_ts'):
+                candidates.append(media)
+
+    for media in candidates:
+        if not RUNNING:
+            break
+        media_id = media['media_id']
+        if f"mxc://{server_name}/{media_id}" in keep:
+            continue
+        result['rows'] += 1
+        result['bytes'] += media.get('media_length') or 0
+        if dry_run:
+            continue
+        api_request(f"/_synapse/admin/v1/media/{quote(server_name)}/{quote(media_id)}", method='DELETE')
+        result['batches'] += 1
+        pause()
+
+    action = 'would delete' if dry_run else 'deleted'
+    log(f"  local media: {action} {result['rows']} never-accessed uploads, {format_size(result['bytes'])}")
+    return result
+
+# ==============================================
+# Main
+# ==============================================
+
+def run(dry_run):
+    """One retention pass, returns report dict"""
+    started = time.time()
+    login()
+    server_name = api_request('/_matrix/client/v3/account/whoami')['user_id'].split(':', 1)[1]
+    log(f"{'Dry run' if dry_run else 'Retention run'} on {server_name}...")
+
+    report = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'dry_run': dry_run,
+        'settings': {
+            'remote_media_days': REMOTE_MEDIA_DAYS,
+            'local_media_days': LOCAL_MEDIA_DAYS,
+            'rooms': ROOM_HISTORY,
+        },
+    }
+    for name, step in [('remote_media', lambda: purge_remote_media(dry_run)),
+                       ('room_history', lambda: purge_room_history(dry_run, server_name)),
+                       ('local_media', lambda: purge_local_media(dry_run, server_name))]:
+        try:
+            report[name] = step()
+        except (OSError, ValueError, KeyError) as e:
+            log(f"  ⚠ {name.replace('_', ' ')} failed: {e}")
+            report[name] = {'error': str(e)}
+
+    report['seconds'] = round(time.time() - started, 1)
+    parts = [report[k] for k in ('remote_media', 'room_history', 'local_media') if 'error' not in report[k]]
+    total_rows = sum(p['rows'] for p in parts)
+    total_bytes = sum(p['bytes'] for p in parts)
+    report['total'] = {'rows': total_rows, 'bytes': total_bytes}
+    action = 'Would reclaim' if dry_run else 'Reclaimed'
+    log(f"✓ {action} {total_rows} rows/files, {format_size(total_bytes)} in {report['seconds']}s")
+
+    if os.path.isdir(STATE_DIR):
+        with open(RUNS_FILE, 'a') as f:
+            f.write(json.dumps(report) + '\n')
+    return report
+
+def handle_signal(signum, frame):
+    global RUNNING
+    RUNNING = False
+
+def main():
+    parser = argparse.ArgumentParser(description='Synapse media and history retention')
+    parser.add_argument('--once', action='store_true', help='Run one pass and exit')
+    parser.add_argument('--dry-run', action='store_true', default=DRY_RUN, help='Report only, delete nothing')
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    log("Starting Matrix retention...")
+    log(f"  Remote media: {REMOTE_MEDIA_DAYS or 'off'}d, local unused media: {LOCAL_MEDIA_DAYS or 'off'}d, "
+        f"rooms: {ROOM_HISTORY or 'none'}")
+
+    while RUNNING:
+        try:
+            run(args.dry_run)
+        except (OSError, ValueError, KeyError) as e:
+            log(f"✗ Run failed: {e}")
+            if args.once:
+                sys.exit(1)
+        if args.once:
+            break
+        deadline = time.time() + INTERVAL * 3600
+        while RUNNING and time.time() < deadline:
+            time.sleep(1)
+
+    log("✓ Stopped")
+
+if __name__ == "__main__":
+    main()
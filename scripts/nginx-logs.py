@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+LaunchLab Nginx Log Analyzer
+Streams nginx access logs and reports per-vhost and per-route throughput,
+p50/p99 latency (total, upstream, upstream connect), status mix and cache
+hits, and flags the slowest routes.
+
+Memory stays constant however long the log is: latencies go into
+log-bucketed quantile sketches (about 1% relative error), and routes are
+normalised (/api/assets/<uuid>/thumbnail → /api/assets/:id/thumbnail) and
+capped at --max-routes.
+
+Usage:
+  # Everything Docker still keeps for the nginx container (access.log → stdout)
+  docker compose logs --no-log-prefix nginx | python3 scripts/nginx-logs.py
+
+  # Docker's rotated json-file logs directly, oldest first
+  sudo python3 scripts/nginx-logs.py $(docker inspect -f '{{.LogPath}}' nginx)*
+
+  # Plain or gzipped access.log files, tail one across rotation
+  python3 scripts/nginx-logs.py access.log.2.gz access.log.1 access.log
+  python3 scripts/nginx-logs.py --follow /var/log/nginx/access.log --every 60
+
+  # Live view, a new report (and window) every minute
+  docker compose logs -f --no-log-prefix --since 1m nginx | python3 scripts/nginx-logs.py --every 60
+
+Expects the `main` log_format from config/nginx/nginx.conf. Older lines
+without the timing fields still count towards throughput and status mix.
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import re
+import select
+import sys
+import time
+from datetime import datetime
+
+MAX_BUCKETS = 2048  # per sketch; ~1% error covers 1ms..1 day in ~1000
+MAX_VHOSTS = 100
+
+def log(msg):
+    print(f"[Nginx Logs] {msg}", file=sys.stderr, flush=True)
+
+def format_size(num_bytes):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f}TB"
+
+def format_seconds(value):
+    if value is None:
+        return '-'
+    if value < 1:
+        return f"{value * 1000:.0f}ms"
+    return f"{value:.2f}s"
+
+# ============================================
+# Quantile sketch
+# ============================================
+
+class Sketch:
+    """
+    DDSketch-style quantile sketch: values land in buckets whose bounds grow
+    by a factor gamma, so any quantile is within ALPHA relative error and the
+    bucket count depends on the value range, not the number of values.
+    """
+
+    ALPHA = 0.01
+    GAMMA = (1 + ALPHA) / (1 - ALPHA)
+    LOG_GAMMA = math.log(GAMMA)
+    MIN_VALUE = 0.0005  # below nginx's 1ms resolution
+
+    __slots__ = ('buckets', 'zero', 'count')
+
+    def __init__(self):
+        self.buckets = {}
+        self.zero = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value < self.MIN_VALUE:
+            self.zero += 1
+            return
+        index = math.ceil(math.log(value) / self.LOG_GAMMA)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        if len(self.buckets) > MAX_BUCKETS:
+            # Fold the two lowest buckets: only the fastest requests lose precision
+            low, nxt = sorted(self.buckets)[:2]
+            self.buckets[nxt] += self.buckets.pop(low)
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.GAMMA ** index / (self.GAMMA + 1)
+        return 2 * self.GAMMA ** max(self.buckets) / (self.GAMMA + 1)
+
+# ============================================
+# Parsing
+# ============================================
+
+LINE = re.compile(
+    r'(?P<addr>\S+) - (?P<user>\S+) \[(?P<time>[^\]]+)\] "(?P<request>(?:[^"\\]|\\.)*)" '
+    r'(?P<status>\d{3}) (?P<bytes>\d+|-) "(?:[^"\\]|\\.)*" "(?:[^"\\]|\\.)*" "[^"]*"(?P<extra>.*)$'
+)
+FIELD = re.compile(r'(\w+)=("[^"]*"|\S+)')
+
+ID_SEGMENT = re.compile(
+    r'^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+    r'|[0-9a-fA-F]{16,}|(?=.*\d)[A-Za-z0-9_-]{24,})$'
+)
+STATIC = {'js', 'css', 'map', 'png', 'jpg', 'jpeg', 'gif', 'svg', 'ico', 'webp',
+          'woff', 'woff2', 'ttf', 'json', 'html', 'txt', 'wasm'}
+
+CACHE_HITS = {'HIT', 'STALE', 'UPDATING', 'REVALIDATED'}
+
+def normalise_route(request, depth):
+    """'GET /api/assets/<uuid>/thumbnail?size=preview HTTP/1.1' → 'GET /api/assets/:id/thumbnail'"""
+    parts = request.split(' ')
+    if len(parts) != 3 or not parts[1].startswith('/'):
+        return '(invalid)'
+    method, path = parts[0], parts[1].split('?', 1)[0]
+    segments = [s for s in path.split('/') if s]
+    route = []
+    for i, segment in enumerate(segments[:depth]):
+        if ID_SEGMENT.match(segment):
+            route.append(':id')
+        elif i == len(segments) - 1 and '.' in segment and segment.rsplit('.', 1)[1].lower() in STATIC:
+            route.append('*.' + segment.rsplit('.', 1)[1].lower())
+        else:
+            route.append(segment)
+    if len(segments) > depth:
+        route.append('*')
+    return f"{method} /{'/'.join(route)}"
+
+def upstream_seconds(value):
+    """'0.012', '0.010, 0.300' (retries) or '0.1 : 0.2' (internal redirect) → sum, None for '-'"""
+    total, found = 0.0, False
+    for part in re.split(r'[,:]', value.strip('"')):
+        part = part.strip()
+        if part and part != '-':
+            try:
+                total += float(part)
+                found = True
+            except ValueError:
+                pass
+    return total if found else None
+
+class TimeParser:
+    """strptime is slow; nginx writes many lines per second with the same stamp"""
+
+    def __init__(self):
+        self.last = None
+        self.value = None
+
+    def __call__(self, stamp):
+        if stamp != self.last:
+            self.last = stamp
+            self.value = datetime.strptime(stamp, '%d/%b/%Y:%H:%M:%S %z').timestamp()
+        return self.value
+
+# ============================================
+# Aggregation
+# ============================================
+
+class Stats:
+    __slots__ = ('requests', 'bytes', 'status', 'total', 'upstream', 'connect', 'cache', 'hits')
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.status = [0, 0, 0, 0, 0]  # 1xx..5xx
+        self.total = Sketch()
+        self.upstream = Sketch()
+        self.connect = Sketch()
+        self.cache = 0
+        self.hits = 0
+
+    def add(self, status, sent, request_time, upstream_time, connect_time, cache):
+        self.requests += 1
+        self.bytes += sent
+        if 1 <= status // 100 <= 5:
+            self.status[status // 100 - 1] += 1
+        if request_time is not None:
+            self.total.add(request_time)
+        if upstream_time is not None:
+            self.upstream.add(upstream_time)
+        if connect_time is not None:
+            self.connect.add(connect_time)
+        if cache and cache != '-':
+            self.cache += 1
+            if cache in CACHE_HITS:
+                self.hits += 1
+
+    def summary(self, span):
+        def q(sketch, quantile):
+            value = sketch.quantile(quantile)
+            return round(value, 4) if value is not None else None
+
+        mix = {f"{i + 1}xx": round(100 * n / self.requests, 1) for i, n in enumerate(self.status) if n}
+        return {
+            'requests': self.requests,
+            'req_per_s': round(self.requests / span, 3),
+            'bytes': self.bytes,
+            'bytes_per_s': round(self.bytes / span),
+            'p50': q(self.total, 0.5),
+            'p99': q(self.total, 0.99),
+            'upstream_p50': q(self.upstream, 0.5),
+            'upstream_p99': q(self.upstream, 0.99),
+            'connect_p99': q(self.connect, 0.99),
+            'status_pct': mix,
+            'errors_5xx': self.status[4],
+            'cache_hit_pct': round(100 * self.hits / self.cache, 1) if self.cache else None,
+        }
+
+class Analyzer:
+    def __init__(self, max_routes, depth):
+        self.max_routes = max_routes
+        self.depth = depth
+        self.parse_time = TimeParser()
+        self.reset()
+
+    def reset(self):
+        self.vhosts = {}
+        self.routes = {}
+        self.first = None
+        self.last = None
+        self.lines = 0
+        self.skipped = 0
+
+    def feed(self, line):
+        self.lines += 1
+        if line.startswith('{'):
+            # Docker json-file log line
+            try:
+                line = json.loads(line).get('log', '')
+            except ValueError:
+                pass
+        match = LINE.match(line.rstrip('\n'))
+        if not match:
+            self.skipped += 1
+            return
+
+        try:
+            ts = self.parse_time(match.group('time'))
+        except ValueError:
+            self.skipped += 1
+            return
+        self.first = ts if self.first is None else min(self.first, ts)
+        self.last = ts if self.last is None else max(self.last, ts)
+
+        fields = dict(FIELD.findall(match.group('extra')))
+        host = fields.get('host', '-').split(':', 1)[0].lower()
+        if host not in self.vhosts and len(self.vhosts) >= MAX_VHOSTS:
+            host = '(other)'
+        route = normalise_route(match.group('request'), self.depth)
+        key = (host, route)
+        if key not in self.routes and len(self.routes) >= self.max_routes:
+            key = (host, '(other)')
+
+        try:
+            request_time = float(fields['rt']) if 'rt' in fields else None
+        except ValueError:
+            request_time = None
+        values = (
+            int(match.group('status')),
+            int(match.group('bytes')) if match.group('bytes') != '-' else 0,
+            request_time,
+            upstream_seconds(fields.get('urt', '-')),
+            upstream_seconds(fields.get('uct', '-')),
+            fields.get('cs'),
+        )
+        vhost = self.vhosts.get(host)
+        if vhost is None:
+            vhost = self.vhosts[host] = Stats()
+        vhost.add(*values)
+        stats = self.routes.get(key)
+        if stats is None:
+            stats = self.routes[key] = Stats()
+        stats.add(*values)
+
+    def report(self, args):
+        requests = sum(v.requests for v in self.vhosts.values())
+        if not requests:
+            log(f"No requests in {self.lines} lines ({self.skipped} not in the access log format)")
+            return
+        span = max(self.last - self.first, 1)
+
+        vhosts = sorted(((h, v.summary(span)) for h, v in self.vhosts.items()),
+                        key=lambda r: r[1]['requests'], reverse=True)
+        slowest = sorted(
+            ((h, r, s.summary(span)) for (h, r), s in self.routes.items()
+             if s.requests >= args.min_requests and s.total.count),
+            key=lambda r: r[2]['p99'], reverse=True)[:args.top]
+
+        if args.json:
+            print(json.dumps({
+                'from': datetime.fromtimestamp(self.first).isoformat(),
+                'to': datetime.fromtimestamp(self.last).isoformat(),
+                'requests': requests,
+                'skipped_lines': self.skipped,
+                'vhosts': {h: s for h, s in vhosts},
+                'slowest_routes': [dict(s, vhost=h, route=r) for h, r, s in slowest],
+            }, indent=2), flush=True)
+            return
+
+        start = datetime.fromtimestamp(self.first).strftime('%Y-%m-%d %H:%M:%S')
+        end = datetime.fromtimestamp(self.last).strftime('%Y-%m-%d %H:%M:%S')
+        print(f"{requests:,} requests, {start} → {end} ({span / 3600:.1f}h)"
+              + (f", {self.skipped} other lines skipped" if self.skipped else ''))
+        print()
+        print(f"{'VHOST':<22} {'REQS':>8} {'REQ/S':>7} {'SENT/S':>9} {'P50':>7} {'P99':>7} "
+              f"{'UP P99':>7} {'CONN P99':>8} {'2xx':>5} {'3xx':>5} {'4xx':>5} {'5xx':>5} {'HIT':>5}")
+        for host, s in vhosts:
+            mix = s['status_pct']
+            hit = f"{s['cache_hit_pct']:.0f}%" if s['cache_hit_pct'] is not None else '-'
+            print(f"{host[:22]:<22} {s['requests']:>8} {s['req_per_s']:>7.2f} "
+                  f"{format_size(s['bytes_per_s']):>9} {format_seconds(s['p50']):>7} "
+                  f"{format_seconds(s['p99']):>7} {format_seconds(s['upstream_p99']):>7} "
+                  f"{format_seconds(s['connect_p99']):>8} "
+                  + ' '.join(f"{mix.get(c, 0):>4.0f}%" for c in ('2xx', '3xx', '4xx', '5xx'))
+                  + f" {hit:>5}")
+
+        if not slowest:
+            return
+        print()
+        print(f"Slowest routes by p99 (at least {args.min_requests} requests, ⚠ = p99 over "
+              f"{format_seconds(args.slow)})")
+        print(f"  {'VHOST':<18} {'ROUTE':<40} {'REQS':>7} {'P50':>7} {'P99':>7} {'UP P99':>7} "
+              f"{'5xx':>5}  TIME SPENT IN")
+        for host, route, s in slowest:
+            flag = '⚠' if s['p99'] >= args.slow else ' '
+            # Upstream close to total: the app is slow. Otherwise nginx is
+            # waiting on the client (large downloads, slow VPN peers).
+            if s['upstream_p99'] is None:
+                where = 'nginx (no upstream)'
+            elif s['upstream_p99'] >= 0.8 * s['p99']:
+                where = 'upstream'
+            else:
+                where = 'client/nginx'
+            print(f"{flag} {host[:18]:<18} {route[:40]:<40} {s['requests']:>7} "
+                  f"{format_seconds(s['p50']):>7} {format_seconds(s['p99']):>7} "
+                  f"{format_seconds(s['upstream_p99']):>7} {s['errors_5xx']:>5}  {where}")
+        sys.stdout.flush()
+
+# ============================================
+# Input
+# ============================================
+
+def read_file(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', errors='replace') as f:
+        yield from f
+
+def read_stdin():
+    """Lines from stdin, plus None once a second while idle (for --every)"""
+    # Read the raw fd: lines sitting in sys.stdin's buffer would not make
+    # it readable to select() and would stall until more input arrived
+    fd = sys.stdin.fileno()
+    pending = b''
+    while True:
+        ready, _, _ = select.select([fd], [], [], 1)
+        if not ready:
+            yield None
+            continue
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            if pending:
+                yield pending.decode('utf-8', 'replace')
+            return
+        *lines, pending = (pending + chunk).split(b'\n')
+        for line in lines:
+            yield line.decode('utf-8', 'replace') + '\n'
+
+def follow(path):
+    """tail -F: keep reading across rotation (new inode) and truncation"""
+    f, inode = None, None
+    while True:
+        if f is None:
+            try:
+                f = open(path, 'r', encoding='utf-8', errors='replace')
+                inode = os.fstat(f.fileno()).st_ino
+            except OSError:
+                yield None
+                time.sleep(1)
+                continue
+        line = f.readline()
+        if line:
+            yield line
+            continue
+        try:
+            st = os.stat(path)
+            rotated = st.st_ino != inode or st.st_size < f.tell()
+        except OSError:
+            rotated = False
+        if rotated:
+            # Drain what was written before the rename, then reopen
+            yield from f
+            f.close()
+            f = None
+            continue
+        yield None
+        time.sleep(1)
+
+def main():
+    parser = argparse.ArgumentParser(description='Streaming nginx access log analyzer')
+    parser.add_argument('files', nargs='*',
+                        help='Access logs (plain, .gz or Docker json-file), oldest first after sorting by mtime; '
+                             'stdin if none')
+    parser.add_argument('--follow', metavar='FILE', help='Tail FILE across rotation (implies --every 60)')
+    parser.add_argument('--every', type=int, default=0,
+                        help='Print a report every N seconds and start a new window')
+    parser.add_argument('--top', type=int, default=15, help='Slowest routes to show')
+    parser.add_argument('--min-requests', type=int, default=20, help='Ignore routes with fewer requests')
+    parser.add_argument('--slow', type=float, default=1.0, help='Flag routes with p99 above this (seconds)')
+    parser.add_argument('--max-routes', type=int, default=1000, help='Distinct routes kept (rest → "(other)")')
+    parser.add_argument('--depth', type=int, default=4, help='Path segments kept per route')
+    parser.add_argument('--json', action='store_true', help='Machine-readable output')
+    args = parser.parse_args()
+
+    analyzer = Analyzer(args.max_routes, args.depth)
+    every = args.every or (60 if args.follow else 0)
+
+    if args.follow:
+        source = follow(args.follow)
+    elif args.files:
+        paths = sorted(args.files, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+
+        def chain():
+            for path in paths:
+                try:
+                    yield from read_file(path)
+                except OSError as e:
+                    log(f"⚠ {path}: {e}")
+        source = chain()
+    else:
+        source = read_stdin() if every else sys.stdin
+
+    next_report = time.monotonic() + every if every else None
+    try:
+        for line in source:
+            if line is not None:
+                analyzer.feed(line)
+            if next_report and time.monotonic() >= next_report:
+                next_report = time.monotonic() + every
+                analyzer.report(args)
+                print()
+                analyzer.reset()
+    except KeyboardInterrupt:
+        pass
+    analyzer.report(args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,594 @@
+#!/usr/bin/env python3
+"""
+Paperless-ngx Bulk Document Ingest
+Streams a document tree into Paperless via its API, resumably and without duplicates
+
+Steps:
+1. Walk the source tree and hash new/changed files (MD5, the checksum
+   Paperless stores) on a process pool
+2. Skip files whose checksum already exists in Paperless
+3. Upload the rest with bounded parallelism, applying tags, correspondent
+   and document type from a mapping file
+4. Pause uploads while the OCR queue in paperless-redis is deep, so
+   workers aren't flooded and the UI stays responsive
+5. Record progress in an on-disk journal, so an interrupted run resumes
+
+Usage:
+  python3 scripts/paperless-ingest.py /mnt/scans --mapping mapping.json
+  python3 scripts/paperless-ingest.py /mnt/scans --dry-run
+
+Mapping file (JSON, rules matched against the path relative to source;
+tags accumulate, the last matching correspondent/document_type wins):
+  {
+    "rules": [
+      {"match": "taxes/**", "tags": ["Taxes"], "correspondent": "IRS"},
+      {"match": "**/bank/*.pdf", "tags": ["Bank"], "document_type": "Statement"}
+    ]
+  }
+
+Authentication: PAPERLESS_TOKEN, or PAPERLESS_ADMIN_USER +
+PAPERLESS_ADMIN_PASSWORD from .env.
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+# Configuration
+PAPERLESS_URL = os.environ.get('PAPERLESS_URL', 'http://localhost:8000')
+PAPERLESS_TOKEN = os.environ.get('PAPERLESS_TOKEN', '')
+ADMIN_USER = os.environ.get('PAPERLESS_ADMIN_USER', 'admin')
+ADMIN_PASSWORD = os.environ.get('PAPERLESS_ADMIN_PASSWORD', 'changeme')
+
+# paperless-redis (Celery broker); reachable from the host on Linux
+REDIS_HOST = os.environ.get('PAPERLESS_REDIS_HOST', '172.20.0.51')
+REDIS_PORT = int(os.environ.get('PAPERLESS_REDIS_PORT', '6379'))
+CELERY_QUEUE = 'celery'
+
+# File types Paperless consumes
+EXTENSIONS = {
+    '.pdf', '.png', '.jpg', '.jpeg', '.tif', '.tiff', '.gif', '.webp',
+    '.txt', '.csv', '.md', '.eml',
+    '.doc', '.docx', '.odt', '.rtf', '.xls', '.xlsx', '.ods', '.ppt', '.pptx', '.odp',
+}
+
+PROGRESS_INTERVAL = 10  # seconds
+MAX_RETRIES = 3
+
+def log(msg):
+    print(f"[Paperless Ingest] {msg}", flush=True)
+
+# ==============================================
+# Journal
+# ==============================================
+
+class Journal:
+    """
+    Append-only JSON-lines progress journal
+
+    Record types:
+      {"t": "hash", "path", "size", "mtime", "md5"}
+      {"t": "done", "path", "md5", "status", "task_id"}
+      {"t": "failed", "path", "error"}   (informational, retried next run)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hashes = {}  # path -> (size, mtime, md5)
+        self.done = {}  # path -> status
+        self.lock = threading.Lock()
+        self._load()
+        self.file = open(path, 'a')
+        self.pending = 0
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn last line after a crash
+                if record.get('t') == 'hash':
+                    self.hashes[record['path']] = (record['size'], record['mtime'], record['md5'])
+                elif record.get('t') == 'done':
+                    self.done[record['path']] = record['status']
+
+    def cached_hash(self, path, size, mtime):
+        entry = self.hashes.get(path)
+        if entry and entry[0] == size and entry[1] == mtime:
+            return entry[2]
+        return None
+
+    def record(self, **record):
+        with self.lock:
+            self.file.write(json.dumps(record) + '\n')
+            self.pending += 1
+            if self.pending >= 50:
+                self.flush()
+
+    def flush(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.file.close()
+
+# ==============================================
+# Scanning and hashing
+# ==============================================
+
+def scan(root):
+    """Yield (path, size, mtime) for every supported file under root"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for name in filenames:
+            if name.startswith('.') or os.path.splitext(name)[1].lower() not in EXTENSIONS:
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            yield path, st.st_size, int(st.st_mtime)
+
+def md5_file(path):
+    """(path, MD5 hex digest, None), or (path, None, error) if unreadable (runs in a worker process)"""
+    digest = hashlib.md5()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except OSError as e:
+        return path, None, str(e)
+    return path, digest.hexdigest(), None
+
+def hash_files(files, journal, jobs):
+    """
+    Return {path: md5}, hashing only files not already in the journal
+
+    Unreadable files are logged, journaled as failed and left out.
+    """
+    hashes, todo = {}, []
+    for path, size, mtime in files:
+        cached = journal.cached_hash(path, size, mtime)
+        if cached:
+            hashes[path] = cached
+        else:
+            todo.append((path, size, mtime))
+
+    if todo:
+        log(f"Hashing {len(todo)} files on {jobs} processes ({len(hashes)} cached)...")
+        meta = {path: (size, mtime) for path, size, mtime in todo}
+        failed = 0
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for path, md5, error in pool.map(md5_file, [p for p, _, _ in todo], chunksize=16):
+                size, mtime = meta[path]
+                if error:
+                    log(f"✗ {path}: {error}")
+                    journal.record(t='failed', path=path, error=error)
+                    failed += 1
+                    continue
+                hashes[path] = md5
+                journal.record(t='hash', path=path, size=size, mtime=mtime, md5=md5)
+        journal.flush()
+        log(f"✓ Hashed {len(todo) - failed} files" + (f", {failed} unreadable" if failed else ""))
+    return hashes
+
+# ==============================================
+# Mapping
+# ==============================================
+
+def load_mapping(path):
+    """Load mapping rules, returns list of rule dicts"""
+    if not path:
+        return []
+    with open(path) as f:
+        rules = json.load(f).get('rules', [])
+    for rule in rules:
+        if 'match' not in rule:
+            raise ValueError(f"Mapping rule without 'match': {rule}")
+    return rules
+
+def apply_mapping(rules, relative_path):
+    """Return {'tags': [...], 'correspondent': name, 'document_type': name}"""
+    result = {'tags': [], 'correspondent': None, 'document_type': None}
+    for rule in rules:
+        pattern = rule['match']
+        # '**/' also matches zero directories
+        if fnmatch.fnmatch(relative_path, pattern) or \
+                (pattern.startswith('**/') and fnmatch.fnmatch(relative_path, pattern[3:])):
+            for tag in rule.get('tags', []):
+                if tag not in result['tags']:
+                    result['tags'].append(tag)
+            result['correspondent'] = rule.get('correspondent', result['correspondent'])
+            result['document_type'] = rule.get('document_type', result['document_type'])
+    return result
+
+# ==============================================
+# Queue-depth throttle
+# ==============================================
+
+class QueueThrottle:
+    """
+    Gate uploads on the Celery queue length in paperless-redis
+
+    Uploads pause once the queue reaches `high` and resume when it drains
+    to `low`. The queue length is polled at most every `poll` seconds and
+    shared by all upload threads. If Redis can't be reached, uploads go
+    on unthrottled and Redis is retried with exponential backoff (up to
+    max_backoff seconds), so a blip doesn't turn the throttle off for good.
+    """
+
+    def __init__(self, host, port, high, low, poll=2.0, max_backoff=60.0):
+        self.host = host
+        self.port = port
+        self.high = high
+        self.low = low
+        self.poll = poll
+        self.paused = False
+        self.enabled = high > 0
+        self.depth = 0
+        self.checked = 0.0
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.retry_at = 0.0
+        self.waited = 0.0
+        self.lock = threading.Lock()
+
+    def queue_length(self):
+        """LLEN via a minimal RESP exchange (no redis client dependency)"""
+        command = f"*2\r\n$4\r\nLLEN\r\n${len(CELERY_QUEUE)}\r\n{CELERY_QUEUE}\r\n".encode()
+        with socket.create_connection((self.host, self.port), timeout=3) as sock:
+            sock.sendall(command)
+            reply = sock.recv(64).decode()
+        if not reply.startswith(':'):
+            raise RuntimeError(f"Unexpected Redis reply: {reply.strip()}")
+        return int(reply[1:].strip())
+
+    def _refresh(self):
+        now = time.time()
+        if now - self.checked < self.poll or now < self.retry_at:
+            return
+        self.checked = now
+        try:
+            self.depth = self.queue_length()
+        except (OSError, RuntimeError, ValueError) as e:
+            if not self.failures:
+                log(f"⚠ Cannot read queue depth from {self.host}:{self.port} ({e}), "
+                    "uploading unthrottled and retrying")
+            self.failures += 1
+            self.retry_at = now + min(self.poll * 2 ** self.failures, self.max_backoff)
+            self.paused = False
+            return
+        if self.failures:
+            log(f"✓ Queue depth readable again after {self.failures} failed reads, throttle active")
+            self.failures = 0
+
+        if not self.paused and self.depth >= self.high:
+            self.paused = True
+            log(f"ℹ OCR queue at {self.depth}, pausing uploads until it drains to {self.low}")
+        elif self.paused and self.depth <= self.low:
+            self.paused = False
+            log(f"ℹ OCR queue at {self.depth}, resuming uploads")
+
+    def wait(self):
+        """Block until uploading is allowed"""
+        started = time.time()
+        while self.enabled:
+            with self.lock:
+                self._refresh()
+                if not self.paused:
+                    break
+            time.sleep(self.poll)
+        with self.lock:
+            self.waited += time.time() - started
+
+# ==============================================
+# Paperless API
+# ==============================================
+
+class PaperlessClient:
+    """Paperless API client with one persistent HTTP connection per thread"""
+
+    def __init__(self, base_url):
+        parsed = urllib.parse.urlparse(base_url)
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.prefix = parsed.path.rstrip('/')
+        self.headers = {'Accept': 'application/json'}
+        self.local = threading.local()
+        self.id_cache = {}
+        self.id_lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            conn = cls(self.host, self.port, timeout=300)
+            self.local.conn = conn
+        return conn
+
+    def _reset(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn:
+            conn.close()
+        self.local.conn = None
+
+    def request(self, method, endpoint, body=None, headers=None):
+        """Send a request, retrying on connection errors and 5xx, returns (status, data)"""
+        all_headers = dict(self.headers)
+        all_headers.update(headers or {})
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+            all_headers['Content-Type'] = 'application/json'
+
+        for attempt in range(MAX_RETRIES):
+            try:
+                conn = self._connection()
+                conn.request(method, self.prefix + endpoint, body=body() if callable(body) else body,
+                             headers=all_headers)
+                response = conn.getresponse()
+                data = response.read()
+                if response.status >= 500 and attempt < MAX_RETRIES - 1:
+                    time.sleep(2 ** attempt)
+                    continue
+                try:
+                    return response.status, json.loads(data) if data else None
+                except ValueError:
+                    return response.status, data.decode('utf-8', 'replace')
+            except (OSError, http.client.HTTPException):
+                self._reset()
+                if attempt == MAX_RETRIES - 1:
+                    raise
+                time.sleep(2 ** attempt)
+
+    def authenticate(self):
+        """Use PAPERLESS_TOKEN if set, otherwise exchange admin credentials for a token"""
+        token = PAPERLESS_TOKEN
+        if not token:
+            status, data = self.request('POST', '/api/token/',
+                                        {'username': ADMIN_USER, 'password': ADMIN_PASSWORD})
+            if status != 200 or not isinstance(data, dict):
+                return False
+            token = data.get('token')
+        self.headers['Authorization'] = f"Token {token}"
+        status, _ = self.request('GET', '/api/documents/?page_size=1')
+        return status == 200
+
+    def checksum_exists(self, md5):
+        status, data = self.request('GET', f"/api/documents/?checksum__iexact={md5}&page_size=1&fields=id")
+        if status != 200:
+            raise RuntimeError(f"Checksum lookup failed: HTTP {status}")
+        return data.get('count', 0) > 0
+
+    def checksum_filter_works(self):
+        """
+        Guard against a server that ignores the checksum filter
+
+        An ignored filter would return every document and make every file
+        look like a duplicate, so probe with a checksum that can't exist.
+        """
+        return not self.checksum_exists('0' * 32)
+
+    def resolve_id(self, kind, name):
+        """Return the id of a tag/correspondent/document type, creating it if missing"""
+        key = (kind, name.lower())
+        with self.id_lock:
+            if key in self.id_cache:
+                return self.id_cache[key]
+
+            quoted = urllib.parse.quote(name)
+            status, data = self.request('GET', f"/api/{kind}/?name__iexact={quoted}")
+            if status == 200 and data.get('results'):
+                object_id = data['results'][0]['id']
+            else:
+                status, data = self.request('POST', f"/api/{kind}/", {'name': name})
+                if status not in (200, 201):
+                    raise RuntimeError(f"Cannot create {kind} '{name}': HTTP {status} {data}")
+                object_id = data['id']
+                log(f"✓ Created {kind[:-1].replace('_', ' ')}: {name}")
+            self.id_cache[key] = object_id
+            return object_id
+
+    def upload(self, path, size, metadata):
+        """Stream one document to post_document, returns the consume task id"""
+        boundary = uuid.uuid4().hex
+        name = os.path.basename(path)
+
+        fields = [('title', os.path.splitext(name)[0])]
+        for tag in metadata['tags']:
+            fields.append(('tags', str(self.resolve_id('tags', tag))))
+        if metadata['correspondent']:
+            fields.append(('correspondent', str(self.resolve_id('correspondents', metadata['correspondent']))))
+        if metadata['document_type']:
+            fields.append(('document_type', str(self.resolve_id('document_types', metadata['document_type']))))
+
+        preamble = b''
+        for key, value in fields:
+            preamble += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{key}\"\r\n\r\n"
+                         f"{value}\r\n").encode('utf-8')
+        preamble += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"document\"; "
+                     f"filename=\"{name}\"\r\nContent-Type: application/octet-stream\r\n\r\n").encode('utf-8')
+        epilogue = f"\r\n--{boundary}--\r\n".encode('utf-8')
+
+        def body():
+            # Fresh generator per attempt, so retries re-read the file
+            yield preamble
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    yield chunk
+            yield epilogue
+
+        headers = {
+            'Content-Type': f"multipart/form-data; boundary={boundary}",
+            'Content-Length': str(len(preamble) + size + len(epilogue)),
+        }
+        status, data = self.request('POST', '/api/documents/post_document/', body, headers)
+        if status != 200:
+            raise RuntimeError(f"HTTP {status}: {data}")
+        return data
+
+# ==============================================
+# Main
+# ==============================================
+
+class Progress:
+    """Thread-safe throughput counters"""
+
+    def __init__(self, total_files, total_bytes):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.files = 0
+        self.bytes = 0
+        self.skipped = 0
+        self.failed = 0
+        self.started = time.time()
+        self.last_report = self.started
+        self.lock = threading.Lock()
+
+    def add(self, size, status):
+        with self.lock:
+            if status == 'queued':
+                self.files += 1
+                self.bytes += size
+            elif status == 'duplicate':
+                self.skipped += 1
+            else:
+                self.failed += 1
+            if time.time() - self.last_report >= PROGRESS_INTERVAL:
+                self.last_report = time.time()
+                log(self.line())
+
+    def line(self):
+        elapsed = max(time.time() - self.started, 0.001)
+        return (f"{self.files + self.skipped + self.failed}/{self.total_files} files "
+                f"({self.files} uploaded, {self.skipped} duplicates, {self.failed} failed), "
+                f"{self.files / elapsed:.1f} docs/s, {self.bytes / 1e6 / elapsed:.1f} MB/s")
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk ingest documents into Paperless-ngx')
+    parser.add_argument('source', help='Directory tree to ingest')
+    parser.add_argument('--url', default=PAPERLESS_URL, help=f'Paperless URL (default: {PAPERLESS_URL})')
+    parser.add_argument('--mapping', help='JSON file mapping paths to tags/correspondent/document type')
+    parser.add_argument('--journal', help='Progress journal (default: <source>/.launchlab-paperless.jsonl)')
+    parser.add_argument('--jobs', type=int, default=2, help='Concurrent uploads')
+    parser.add_argument('--hash-jobs', type=int, default=os.cpu_count() or 2, help='Hashing processes')
+    parser.add_argument('--max-queue', type=int, default=8,
+                        help='Pause uploads at this OCR queue depth (0 disables throttling)')
+    parser.add_argument('--resume-queue', type=int, default=2, help='Resume uploads at this queue depth')
+    parser.add_argument('--redis', default=f"{REDIS_HOST}:{REDIS_PORT}", help='paperless-redis host:port')
+    parser.add_argument('--dry-run', action='store_true', help='Hash, map and check only, upload nothing')
+    args = parser.parse_args()
+
+    source = os.path.abspath(args.source)
+    if not os.path.isdir(source):
+        log(f"✗ Not a directory: {source}")
+        sys.exit(1)
+
+    try:
+        rules = load_mapping(args.mapping)
+    except (OSError, ValueError) as e:
+        log(f"✗ Invalid mapping file: {e}")
+        sys.exit(1)
+
+    journal_path = args.journal or os.path.join(source, '.launchlab-paperless.jsonl')
+    journal = Journal(journal_path)
+    log(f"Journal: {journal_path} ({len(journal.done)} files already ingested)")
+
+    client = PaperlessClient(args.url)
+    try:
+        if not client.authenticate():
+            log("✗ Authentication failed (set PAPERLESS_TOKEN or PAPERLESS_ADMIN_USER/PASSWORD)")
+            sys.exit(1)
+    except OSError as e:
+        log(f"✗ Paperless not reachable at {args.url}: {e}")
+        sys.exit(1)
+    log("✓ Authenticated")
+
+    precheck = client.checksum_filter_works()
+    if not precheck:
+        log("⚠ Server ignores checksum filter, relying on Paperless duplicate detection")
+
+    # 1. Scan + hash
+    files = [f for f in scan(source) if f[0] not in journal.done]
+    log(f"Found {len(files)} files to process ({len(rules)} mapping rules)")
+    if not files:
+        log("✓ Nothing to do")
+        journal.close()
+        return
+    hashes = hash_files(files, journal, args.hash_jobs)
+    hash_failed = len(files) - len(hashes)
+    files = [f for f in files if f[0] in hashes]
+
+    # 2. Collapse duplicates inside the source tree
+    seen, work = set(), []
+    for path, size, mtime in files:
+        md5 = hashes[path]
+        if md5 in seen:
+            journal.record(t='done', path=path, md5=md5, status='duplicate', task_id=None)
+            continue
+        seen.add(md5)
+        work.append((path, size, md5))
+
+    redis_host, _, redis_port = args.redis.partition(':')
+    throttle = QueueThrottle(redis_host, int(redis_port or 6379), args.max_queue, args.resume_queue)
+    progress = Progress(len(work), sum(size for _, size, _ in work))
+    action = 'Checking' if args.dry_run else 'Uploading'
+    log(f"{action} {len(work)} unique documents with {args.jobs} connections...")
+
+    def ingest(item):
+        path, size, md5 = item
+        if precheck and client.checksum_exists(md5):
+            journal.record(t='done', path=path, md5=md5, status='duplicate', task_id=None)
+            return 'duplicate'
+        metadata = apply_mapping(rules, os.path.relpath(path, source))
+        if args.dry_run:
+            log(f"  would upload {os.path.relpath(path, source)} {metadata}")
+            return 'queued'
+        throttle.wait()
+        task_id = client.upload(path, size, metadata)
+        journal.record(t='done', path=path, md5=md5, status='queued', task_id=task_id)
+        return 'queued'
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(ingest, item): item for item in work}
+        for future in as_completed(futures):
+            path, size, _ = futures[future]
+            try:
+                progress.add(size, future.result())
+            except Exception as e:
+                progress.add(size, 'failed')
+                journal.record(t='failed', path=path, error=str(e))
+                log(f"✗ {path}: {e}")
+
+    journal.close()
+    log(f"✓ Done: {progress.line()}" + (f", {hash_failed} unreadable skipped" if hash_failed else ""))
+    if throttle.waited >= 1:
+        log(f"  Paused {throttle.waited:.0f}s (summed over upload threads) for the OCR queue")
+    log("ℹ Documents are OCR'd in the background - watch progress in Paperless → File Tasks")
+    if progress.failed or hash_failed:
+        log("ℹ Re-run the same command to retry failed files")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        log("✗ Interrupted - progress is saved, re-run to resume")
+        sys.exit(1)
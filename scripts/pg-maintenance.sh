@@ -0,0 +1,321 @@
+#!/bin/sh
+# ==============================================
+# POSTGRES MAINTENANCE SCRIPT
+# ==============================================
+# Runs inside a postgres:16-alpine container next to the shared
+# PostgreSQL instance (immich, matrix, paperless):
+# - Enables pg_stat_statements and writes a ranked slow-query report
+#   per database every PG_MAINT_REPORT_INTERVAL seconds
+# - Tracks table bloat (dead tuples) and vacuum lag (dead tuples vs.
+#   the autovacuum trigger point, transaction ID age) per database
+# - Inside PG_MAINT_WINDOW: VACUUM (ANALYZE) tables that autovacuum is
+#   behind on, ANALYZE tables with stale statistics, and REINDEX
+#   CONCURRENTLY bloated btree indexes (measured with pgstatindex)
+#
+# Tables that degrade first (Synapse state groups, Immich assets) are
+# handled before everything else. Nothing takes an exclusive lock:
+# plain VACUUM, ANALYZE and REINDEX CONCURRENTLY all allow reads and
+# writes while they run.
+# ==============================================
+
+set -u
+
+# Colors
+GREEN='\033[0;32m'
+BLUE='\033[0;34m'
+YELLOW='\033[1;33m'
+RED='\033[0;31m'
+NC='\033[0m'
+
+log_info() { echo -e "${BLUE}[PG-MAINT]${NC} $1"; }
+log_success() { echo -e "${GREEN}[PG-MAINT]${NC} $1"; }
+log_warning() { echo -e "${YELLOW}[PG-MAINT]${NC} $1"; }
+log_error() { echo -e "${RED}[PG-MAINT]${NC} $1"; }
+
+# Configuration
+export PGHOST="${PGHOST:-postgres}"
+export PGUSER="${POSTGRES_USER}"
+export PGPASSWORD="${POSTGRES_PASSWORD}"
+
+DATABASES="${PG_MAINT_DATABASES:-immich,matrix,paperless}"
+WINDOW="${PG_MAINT_WINDOW:-03:00-05:00}"              # local time, may wrap midnight
+REPORT_INTERVAL="${PG_MAINT_REPORT_INTERVAL:-3600}"   # seconds between reports
+DEAD_PCT="${PG_MAINT_DEAD_PCT:-10}"                   # vacuum above this dead tuple %
+INDEX_BLOAT_PCT="${PG_MAINT_INDEX_BLOAT_PCT:-30}"     # reindex above this estimated bloat %
+MIN_INDEX_MB="${PG_MAINT_MIN_INDEX_MB:-10}"           # ignore smaller indexes
+ANALYZE_PCT="${PG_MAINT_ANALYZE_PCT:-10}"             # analyze when this % of rows changed
+TOP_QUERIES="${PG_MAINT_TOP_QUERIES:-20}"
+DRY_RUN="${PG_MAINT_DRY_RUN:-false}"
+REPORT_DIR="${REPORT_DIR:-/reports}"
+
+# Handled first within their database
+PRIORITY_TABLES="${PG_MAINT_PRIORITY_TABLES:-state_groups_state,state_groups,state_group_edges,event_json,events,assets,asset_files,exif,smart_search,asset_faces,face_search}"
+
+# Btree leaf pages are built ~90% full (default fillfactor)
+FULL_LEAF_DENSITY=90
+
+RUNNING=true
+trap 'RUNNING=false' TERM INT
+
+# ==============================================
+# Helpers
+# ==============================================
+
+psql_db() {
+    db="$1"
+    shift
+    psql -X -q -v ON_ERROR_STOP=1 -d "$db" "$@"
+}
+
+# Minutes since midnight for HH:MM
+to_minutes() {
+    echo "$1" | awk -F: '{ print $1 * 60 + $2 }'
+}
+
+in_window() {
+    start=$(to_minutes "${WINDOW%-*}")
+    end=$(to_minutes "${WINDOW#*-}")
+    now=$(to_minutes "$(date +%H:%M)")
+    if [ "$start" -le "$end" ]; then
+        [ "$now" -ge "$start" ] && [ "$now" -lt "$end" ]
+    else
+        [ "$now" -ge "$start" ] || [ "$now" -lt "$end" ]
+    fi
+}
+
+# SQL array literal of priority tables
+priority_array() {
+    echo "'{${PRIORITY_TABLES}}'::text[]"
+}
+
+record() {
+    echo "$(date '+%Y-%m-%dT%H:%M:%S') $1" >> "$REPORT_DIR/maintenance.log"
+}
+
+# ==============================================
+# Setup
+# ==============================================
+
+setup() {
+    log_info "Waiting for PostgreSQL..."
+    until psql_db postgres -c '\q' 2>/dev/null; do
+        sleep 2
+    done
+    log_success "PostgreSQL is ready"
+
+    if psql_db postgres -tAc "SHOW shared_preload_libraries" | grep -q pg_stat_statements; then
+        psql_db postgres -c "CREATE EXTENSION IF NOT EXISTS pg_stat_statements;" >/dev/null
+        log_success "pg_stat_statements enabled"
+        STATEMENTS=true
+    else
+        log_warning "pg_stat_statements not preloaded - restart postgres to apply its command line"
+        STATEMENTS=false
+    fi
+
+    for db in $(echo "$DATABASES" | tr ',' ' '); do
+        # pgstatindex() measures real index bloat
+        psql_db "$db" -c "CREATE EXTENSION IF NOT EXISTS pgstattuple;" >/dev/null 2>&1 \
+            || log_warning "Could not enable pgstattuple in $db, index bloat not measured"
+    done
+    mkdir -p "$REPORT_DIR"
+}
+
+# ==============================================
+# Reports
+# ==============================================
+
+report_slow_queries() {
+    db="$1"
+    [ "$STATEMENTS" = true ] || return 0
+    {
+        echo "Slow queries: $db ($(date '+%Y-%m-%d %H:%M'))"
+        echo "Ranked by total execution time since stats were last reset"
+        echo ""
+        psql_db postgres -P pager=off -c "
+            SELECT round(s.total_exec_time::numeric / 1000, 1) AS total_s,
+                   s.calls,
+                   round(s.mean_exec_time::numeric, 2) AS mean_ms,
+                   round(s.max_exec_time::numeric, 1) AS max_ms,
+                   s.rows,
+                   round(100.0 * s.shared_blks_hit / nullif(s.shared_blks_hit + s.shared_blks_read, 0), 1) AS cache_hit_pct,
+                   left(regexp_replace(s.query, '\s+', ' ', 'g'), 140) AS query
+            FROM pg_stat_statements s
+            JOIN pg_database d ON d.oid = s.dbid
+            WHERE d.datname = '$db'
+            ORDER BY s.total_exec_time DESC
+            LIMIT $TOP_QUERIES;"
+    } > "$REPORT_DIR/slow-queries-$db.txt" 2>&1
+}
+
+# Tables with bloat and vacuum lag figures, priority tables first
+TABLE_STATS_SQL="
+    SELECT format('%I.%I', s.schemaname, s.relname) AS table_name,
+           pg_size_pretty(pg_total_relation_size(s.relid)) AS size,
+           s.n_live_tup AS live,
+           s.n_dead_tup AS dead,
+           round(100.0 * s.n_dead_tup / greatest(s.n_live_tup + s.n_dead_tup, 1), 1) AS dead_pct,
+           round((s.n_dead_tup / (current_setting('autovacuum_vacuum_threshold')::float
+                 + current_setting('autovacuum_vacuum_scale_factor')::float * greatest(c.reltuples, 0)))::numeric, 2) AS vacuum_lag,
+           age(c.relfrozenxid) AS xid_age,
+           round((extract(epoch FROM now() - greatest(s.last_vacuum, s.last_autovacuum)) / 3600)::numeric, 1) AS hours_since_vacuum,
+           round(100.0 * s.n_mod_since_analyze / greatest(s.n_live_tup, 1), 1) AS changed_pct,
+           s.relname = ANY($(priority_array)) AS priority
+    FROM pg_stat_user_tables s
+    JOIN pg_class c ON c.oid = s.relid"
+
+report_bloat() {
+    db="$1"
+    {
+        echo "Table bloat and vacuum lag: $db ($(date '+%Y-%m-%d %H:%M'))"
+        echo "vacuum_lag = dead tuples / autovacuum trigger point (above 1 = autovacuum is behind)"
+        echo ""
+        psql_db "$db" -P pager=off -c "
+            $TABLE_STATS_SQL
+            WHERE s.n_live_tup + s.n_dead_tup > 0
+            ORDER BY priority DESC, s.n_dead_tup DESC
+            LIMIT 30;"
+        if [ -f "$REPORT_DIR/index-bloat-$db.txt" ]; then
+            echo ""
+            cat "$REPORT_DIR/index-bloat-$db.txt"
+        fi
+        invalid=$(psql_db "$db" -tAc "SELECT string_agg(indexrelid::regclass::text, ', ') FROM pg_index WHERE NOT indisvalid")
+        if [ -n "$invalid" ]; then
+            echo ""
+            echo "Invalid indexes (left by an interrupted REINDEX CONCURRENTLY, safe to drop): $invalid"
+        fi
+    } > "$REPORT_DIR/bloat-$db.txt" 2>&1
+}
+
+# ==============================================
+# Maintenance
+# ==============================================
+
+run_action() {
+    db="$1"
+    sql="$2"
+    if [ "$DRY_RUN" = true ]; then
+        log_info "[dry run] $db: $sql"
+        record "[dry run] $db: $sql"
+        return 0
+    fi
+    started=$(date +%s)
+    if psql_db "$db" -c "$sql" >/dev/null 2>/tmp/pg-maint-error; then
+        seconds=$(( $(date +%s) - started ))
+        log_success "$db: $sql (${seconds}s)"
+        record "$db: $sql (${seconds}s)"
+    else
+        log_warning "$db: $sql failed: $(cat /tmp/pg-maint-error)"
+        record "$db: $sql FAILED: $(cat /tmp/pg-maint-error)"
+    fi
+}
+
+maintain_tables() {
+    db="$1"
+    # VACUUM where autovacuum is behind or dead tuples pile up, ANALYZE where statistics are stale
+    psql_db "$db" -tA -F ' ' -c "
+        SELECT CASE WHEN dead_pct >= $DEAD_PCT OR vacuum_lag >= 1 THEN 'VACUUM (ANALYZE)' ELSE 'ANALYZE' END,
+               table_name
+        FROM ($TABLE_STATS_SQL) t
+        WHERE (dead_pct >= $DEAD_PCT AND dead >= 1000)
+           OR vacuum_lag >= 1
+           OR (changed_pct >= $ANALYZE_PCT AND live >= 1000)
+        ORDER BY priority DESC, dead DESC;" | while read -r command table; do
+        [ -n "$table" ] || continue
+        in_window && [ "$RUNNING" = true ] || break
+        run_action "$db" "$command $table;"
+    done
+}
+
+maintain_indexes() {
+    db="$1"
+    # pgstatindex reads the whole index, so this only runs inside the window
+    psql_db "$db" -tA -F ' ' -c "
+        SELECT format('%I.%I', n.nspname, ic.relname),
+               round(greatest($FULL_LEAF_DENSITY - st.avg_leaf_density, 0) * 100.0 / $FULL_LEAF_DENSITY, 1),
+               pg_size_pretty(pg_relation_size(i.indexrelid))
+        FROM pg_index i
+        JOIN pg_class ic ON ic.oid = i.indexrelid
+        JOIN pg_class t ON t.oid = i.indrelid
+        JOIN pg_namespace n ON n.oid = ic.relnamespace
+        JOIN pg_am a ON a.oid = ic.relam
+        CROSS JOIN LATERAL pgstatindex(i.indexrelid::regclass) st
+        WHERE a.amname = 'btree'
+          AND ic.relkind = 'i'
+          AND i.indisvalid
+          AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+          AND n.nspname NOT LIKE 'pg_toast%'
+          AND pg_relation_size(i.indexrelid) >= $MIN_INDEX_MB * 1024 * 1024
+        ORDER BY t.relname = ANY($(priority_array)) DESC, pg_relation_size(i.indexrelid) DESC;" \
+        > /tmp/pg-maint-indexes 2>/dev/null || return 0
+
+    {
+        echo "Btree index bloat (measured $(date '+%Y-%m-%d %H:%M'), indexes >= ${MIN_INDEX_MB}MB):"
+        awk '{ printf "  %-60s %6s%%  %s %s\n", $1, $2, $3, $4 }' /tmp/pg-maint-indexes
+    } > "$REPORT_DIR/index-bloat-$db.txt"
+
+    while read -r index bloat size unit; do
+        [ -n "$index" ] || continue
+        in_window && [ "$RUNNING" = true ] || break
+        if awk "BEGIN { exit !($bloat >= $INDEX_BLOAT_PCT) }"; then
+            log_info "$db: $index is ${bloat}% bloated ($size $unit)"
+            run_action "$db" "REINDEX INDEX CONCURRENTLY $index;"
+        fi
+    done < /tmp/pg-maint-indexes
+}
+
+maintenance_pass() {
+    log_info "Maintenance window $WINDOW open"
+    record "window open"
+    for db in $(echo "$DATABASES" | tr ',' ' '); do
+        in_window && [ "$RUNNING" = true ] || break
+        log_info "Maintaining $db..."
+        maintain_tables "$db"
+        maintain_indexes "$db"
+        report_bloat "$db"
+    done
+    log_success "Maintenance pass complete"
+    record "pass complete"
+}
+
+# ==============================================
+# Main loop
+# ==============================================
+
+echo ""
+echo "=========================================="
+echo "  LaunchLab Postgres Maintenance"
+echo "=========================================="
+echo ""
+
+log_info "Databases: $DATABASES, window: $WINDOW"
+[ "$DRY_RUN" = true ] && log_info "Dry run: actions are logged, not executed"
+setup
+
+last_report=0
+passed=false
+while [ "$RUNNING" = true ]; do
+    now=$(date +%s)
+    if [ $(( now - last_report )) -ge "$REPORT_INTERVAL" ]; then
+        for db in $(echo "$DATABASES" | tr ',' ' '); do
+            report_slow_queries "$db"
+            report_bloat "$db"
+        done
+        log_info "Reports written to $REPORT_DIR"
+        last_report=$now
+    fi
+
+    # One pass per window
+    if in_window; then
+        if [ "$passed" = false ]; then
+            maintenance_pass
+            passed=true
+        fi
+    else
+        passed=false
+    fi
+
+    sleep 60 &
+    wait $!
+done
+
+log_success "Stopped"
@@ -538,7 +538,8 @@ echo -e "${GREEN}${BOLD}✅ LaunchLab is configured and ready to deploy!${NC}"
 echo ""
 echo -e "${BOLD}Next Steps:${NC}"
 echo ""
-echo "  1. Start services:"
+echo "  1. Start services (optional: pre-pull images in parallel first):"
+echo -e "     ${CYAN}python3 scripts/images.py pull${NC}"
 if [ "$VPN_TYPE" == "wireguard" ]; then
     echo -e "     ${CYAN}docker compose --profile wireguard -f docker-compose.yml -f docker-compose.init.yml up -d${NC}"
 elif [ "$VPN_TYPE" == "tailscale" ]; then
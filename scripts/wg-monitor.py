@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+WireGuard Peer Monitor
+Polls the wg-easy client list over one authenticated session and turns the
+per-peer byte counters into throughput, flags peers whose handshake went
+stale, and probes round-trip latency over the tunnel and to the Docker
+subnet - so "photos are slow" can be pinned on the VPN hop or not.
+
+Runs inside wg-easy's network namespace (network_mode: service:wg-easy):
+the API is on localhost and peer tunnel addresses are reachable over wg0.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import signal
+import socket
+import tempfile
+import subprocess
+import http.client
+import urllib.parse
+from collections import deque
+from datetime import datetime, timezone
+
+# Configuration
+WG_URL = os.environ.get('WG_URL', 'http://127.0.0.1:51821')
+WG_PASSWORD = os.environ.get('WG_PASSWORD', '')
+INTERVAL = int(os.environ.get('WG_MONITOR_INTERVAL', '10'))
+STALE_AFTER = int(os.environ.get('WG_STALE_HANDSHAKE', '180'))
+HISTORY = int(os.environ.get('WG_HISTORY', '360'))
+PROBE_INTERVAL = int(os.environ.get('WG_PROBE_INTERVAL', '60'))
+PROBE_COUNT = int(os.environ.get('WG_PROBE_COUNT', '3'))
+PROBE_TARGETS = [t.strip() for t in os.environ.get(
+    'WG_PROBE_TARGETS', 'immich-server:3001,jellyfin:8096').split(',') if t.strip()]
+REPORT_INTERVAL = int(os.environ.get('WG_REPORT_INTERVAL', '300'))
+STATS_FILE = os.environ.get('STATS_FILE', '/state/stats.json')
+
+RUNNING = True
+
+def log(msg):
+    print(f"[WG Monitor] {msg}", flush=True)
+
+def stop(signum, frame):
+    global RUNNING
+    RUNNING = False
+
+def format_rate(bps):
+    """Bytes per second as a human readable rate"""
+    if bps is None:
+        return '-'
+    for unit in ['B/s', 'KB/s', 'MB/s']:
+        if bps < 1024:
+            return f"{bps:.0f} {unit}" if unit == 'B/s' else f"{bps:.1f} {unit}"
+        bps /= 1024
+    return f"{bps:.1f} GB/s"
+
+def format_ms(ms):
+    return '-' if ms is None else f"{ms:.1f}ms"
+
+def format_age(seconds):
+    if seconds is None:
+        return 'never'
+    if seconds < 120:
+        return f"{seconds:.0f}s ago"
+    if seconds < 7200:
+        return f"{seconds / 60:.0f}m ago"
+    return f"{seconds / 3600:.0f}h ago"
+
+# ============================================
+# wg-easy API
+# ============================================
+
+class WgEasy:
+    """One keep-alive connection and one session cookie for the whole run"""
+
+    def __init__(self, url, password):
+        parsed = urllib.parse.urlparse(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.password = password
+        self.cookie = None
+        self.conn = None
+
+    def _request(self, method, path, body=None):
+        headers = {'Content-Type': 'application/json'}
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=10)
+            try:
+                self.conn.request(method, path, body=data, headers=headers)
+                response = self.conn.getresponse()
+                return response, response.read()
+            except (http.client.HTTPException, OSError):
+                # Server closed the idle connection - reconnect once
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+
+    def login(self):
+        if not self.password:
+            return True
+        response, body = self._request('POST', '/api/session', {'password': self.password})
+        cookie = response.getheader('Set-Cookie')
+        if response.status != 200 or not cookie:
+            log(f"✗ Authentication failed: {response.status} {body[:200].decode('utf-8', 'replace')}")
+            return False
+        self.cookie = cookie.split(';')[0]
+        log("✓ Authenticated with wg-easy")
+        return True
+
+    def clients(self):
+        response, body = self._request('GET', '/api/wireguard/client')
+        if response.status == 401:
+            # Session expired (wg-easy restarted) - log in again on the same connection
+            self.cookie = None
+            if not self.login():
+                raise RuntimeError('re-authentication failed')
+            response, body = self._request('GET', '/api/wireguard/client')
+        if response.status != 200:
+            raise RuntimeError(f"client list: HTTP {response.status}")
+        return json.loads(body.decode('utf-8'))
+
+def wait_for_wg_easy(api, max_wait=120):
+    """Wait for wg-easy to be ready"""
+    log("Waiting for wg-easy to be ready...")
+    for i in range(max_wait):
+        if not RUNNING:
+            return False
+        try:
+            response, _ = api._request('GET', '/')
+            if response.status == 200:
+                log(f"✓ wg-easy ready (waited {i+1}s)")
+                return True
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(1)
+
+    log(f"✗ wg-easy timeout after {max_wait}s")
+    return False
+
+# ============================================
+# Probes
+# ============================================
+
+PING_RTT = re.compile(r'= ([\d.]+)/([\d.]+)/([\d.]+)')
+PING_LOSS = re.compile(r'(\d+)% packet loss')
+
+def ping(address):
+    """ICMP round trip over the tunnel: (avg ms or None, loss %)"""
+    try:
+        out = subprocess.run(
+            ['ping', '-c', str(PROBE_COUNT), '-W', '2', '-q', address],
+            capture_output=True, text=True, timeout=PROBE_COUNT * 3 + 5
+        ).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return None, 100
+    rtt = PING_RTT.search(out)
+    loss = PING_LOSS.search(out)
+    return (round(float(rtt.group(2)), 1) if rtt else None), (int(loss.group(1)) if loss else 100)
+
+def tcp_connect(target):
+    """Median TCP connect time to host:port in ms, None if unreachable"""
+    host, _, port = target.rpartition(':')
+    times = []
+    for _ in range(PROBE_COUNT):
+        start = time.monotonic()
+        try:
+            with socket.create_connection((host, int(port)), timeout=2):
+                times.append((time.monotonic() - start) * 1000)
+        except OSError:
+            pass
+    if not times:
+        return None
+    times.sort()
+    return round(times[len(times) // 2], 2)
+
+# ============================================
+# Peer state
+# ============================================
+
+def handshake_age(client, now):
+    value = client.get('latestHandshakeAt')
+    if not value:
+        return None
+    try:
+        then = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return max(0.0, now - then.timestamp())
+
+class Peer:
+    def __init__(self, client):
+        self.id = client['id']
+        self.name = client.get('name', self.id)
+        self.address = client.get('address')
+        self.rx = self.tx = None
+        self.sampled = None
+        self.down = self.up = None
+        self.age = None
+        self.online = None
+        self.rtt = None
+        self.loss = None
+        self.history = deque(maxlen=HISTORY)
+
+    def update(self, client, now):
+        """New counters from the API. Rates are bytes/s since the last poll."""
+        self.name = client.get('name', self.name)
+        self.address = client.get('address', self.address)
+        rx = client.get('transferRx') or 0
+        tx = client.get('transferTx') or 0
+        if self.sampled is not None and rx >= self.rx and tx >= self.tx:
+            elapsed = max(now - self.sampled, 1e-3)
+            # wg-easy counts from the server's side: tx is what the peer downloads
+            self.down = (tx - self.tx) / elapsed
+            self.up = (rx - self.rx) / elapsed
+        else:
+            # First sample, or counters reset because wg0 was recreated
+            self.down = self.up = None
+        self.rx, self.tx, self.sampled = rx, tx, now
+
+        self.age = handshake_age(client, now)
+        online = client.get('enabled', True) and self.age is not None and self.age <= STALE_AFTER
+        if self.online is not None and online != self.online:
+            if online:
+                log(f"✓ {self.name}: connected")
+            else:
+                log(f"⚠ {self.name}: handshake stale (last {format_age(self.age)})")
+                self.rtt, self.loss = None, None
+        self.online = online
+
+        self.history.append([
+            round(now), round(self.down) if self.down is not None else None,
+            round(self.up) if self.up is not None else None,
+            round(self.age) if self.age is not None else None,
+            self.rtt,
+        ])
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'address': self.address,
+            'online': bool(self.online),
+            'handshake_age': round(self.age) if self.age is not None else None,
+            'down_bps': round(self.down) if self.down is not None else None,
+            'up_bps': round(self.up) if self.up is not None else None,
+            'tunnel_rtt_ms': self.rtt,
+            'tunnel_loss_pct': self.loss,
+            # [time, down B/s, up B/s, handshake age s, tunnel rtt ms]
+            'history': list(self.history),
+        }
+
+def write_stats(peers, docker_rtt):
+    os.makedirs(os.path.dirname(STATS_FILE), exist_ok=True)
+    stats = {
+        'updated': datetime.now(timezone.utc).isoformat(),
+        'interval': INTERVAL,
+        'stale_after': STALE_AFTER,
+        'docker_rtt_ms': docker_rtt,
+        'peers': [peer.to_dict() for peer in peers.values()],
+    }
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(STATS_FILE))
+    with os.fdopen(fd, 'w') as f:
+        json.dump(stats, f)
+    os.replace(tmp, STATS_FILE)
+
+def report(peers, docker_rtt):
+    docker = ', '.join(f"{t} {format_ms(ms)}" for t, ms in docker_rtt.items())
+    online = [p for p in peers.values() if p.online]
+    log(f"{len(online)}/{len(peers)} peers online | docker {docker or '-'}")
+    for peer in online:
+        loss = f" ({peer.loss}% loss)" if peer.loss else ''
+        log(f"  {peer.name}: ↓ {format_rate(peer.down)} ↑ {format_rate(peer.up)}, "
+            f"tunnel {format_ms(peer.rtt)}{loss}, handshake {format_age(peer.age)}")
+
+# ============================================
+# Main loop
+# ============================================
+
+def main():
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    log("Starting WireGuard peer monitor...")
+
+    api = WgEasy(WG_URL, WG_PASSWORD)
+    if not wait_for_wg_easy(api) or not api.login():
+        sys.exit(1)
+
+    peers = {}
+    docker_rtt = {}
+    next_probe = 0
+    next_report = time.monotonic() + REPORT_INTERVAL
+
+    while RUNNING:
+        started = time.monotonic()
+        try:
+            clients = api.clients()
+        except (OSError, RuntimeError, ValueError, http.client.HTTPException) as e:
+            log(f"⚠ Poll failed: {e}")
+            clients = None
+
+        if clients is not None:
+            now = time.time()
+            seen = set()
+            for client in clients:
+                peer = peers.get(client['id'])
+                if peer is None:
+                    peer = peers[client['id']] = Peer(client)
+                peer.update(client, now)
+                seen.add(peer.id)
+            for gone in set(peers) - seen:
+                log(f"ℹ {peers.pop(gone).name}: removed")
+
+            if started >= next_probe:
+                next_probe = started + PROBE_INTERVAL
+                for peer in peers.values():
+                    if peer.online and peer.address:
+                        peer.rtt, peer.loss = ping(peer.address)
+                docker_rtt = {target: tcp_connect(target) for target in PROBE_TARGETS}
+
+            try:
+                write_stats(peers, docker_rtt)
+            except OSError as e:
+                log(f"⚠ Could not write {STATS_FILE}: {e}")
+
+            if started >= next_report:
+                next_report = started + REPORT_INTERVAL
+                report(peers, docker_rtt)
+
+        # Sleep in short steps so SIGTERM stops the container promptly
+        deadline = started + INTERVAL
+        while RUNNING and time.monotonic() < deadline:
+            time.sleep(min(1, deadline - time.monotonic()))
+
+    log("✓ Stopped")
+
+if __name__ == "__main__":
+    main()